@@ -0,0 +1,153 @@
+"""
+Headless batch conversion of colour lists.
+
+Reads one colour per line in any of the formats of parsers.py ("#FF0000",
+"#FF000080", "255, 0, 0", "cmyk(0%, 100%, 100%, 0%)") and writes every
+representation as CSV or JSON lines. The alpha of a hex code with one goes to a
+column of its own, 0 - 255 and 255 for the other forms:
+
+    python -m batch tokens.txt --format jsonl --output tokens.jsonl
+    cat tokens.txt | python -m batch --workers 4 > tokens.csv
+
+The input is streamed in chunks, so memory use does not grow with the input size.
+Invalid lines are reported on stderr and skipped.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import colorspace
+import parsers
+
+FIELDS = ("input", "hex", "rgb", "cmyk", "hsl", "alpha")
+
+
+def read_lines(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield number, line
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def convert_chunk(chunk):
+    """Convert a list of (line number, text) pairs into (rows, errors)."""
+    lines, kinds, values, alphas, errors = [], [], [], [], []
+    for number, line in chunk:
+        result = parsers.parse_color(line)
+        if isinstance(result, parsers.ParseError):
+            errors.append((number, line, result))
+        else:
+            lines.append(line)
+            kinds.append(result.kind)
+            values.append(result.values)
+            alphas.append(result.alpha)
+    if not lines:
+        return [], errors
+
+    is_cmyk = np.array([kind == "cmyk" for kind in kinds])
+    rgb16 = np.empty((len(lines), 3), dtype=np.int32)
+    if (~is_cmyk).any():
+        rgb16[~is_cmyk] = colorspace.rgb_to_rgb16(
+            [value for value, cmyk in zip(values, is_cmyk) if not cmyk])
+    if is_cmyk.any():
+        rgb16[is_cmyk] = colorspace.cmyk_to_rgb16(
+            [value for value, cmyk in zip(values, is_cmyk) if cmyk])
+
+    rgb = colorspace.rgb16_to_rgb(rgb16)
+    # The HSL hue and not the HSV one of rgb16_to_hue, 0 for achromatic colours
+    hsl = colorspace.rgb16_to_hsl(rgb16)
+    hsl[:, 0] = np.maximum(hsl[:, 0], 0)
+    hsl[:, 1:] = hsl[:, 1:] * 100 // 255
+
+    rows = list(zip(
+        lines,
+        colorspace.rgb_to_hex(rgb).tolist(),
+        rgb.tolist(),
+        colorspace.rgb16_to_cmyk(rgb16).tolist(),
+        hsl.tolist(),
+        alphas
+    ))
+    return rows, errors
+
+
+def convert(lines, chunk_size: int = 10000, workers: int = 1):
+    """Yield (rows, errors) per chunk, in input order."""
+    chunks = chunked(lines, chunk_size)
+
+    if workers <= 1:
+        yield from map(convert_chunk, chunks)
+        return
+
+    # Only a bounded number of chunks is in flight so memory stays constant.
+    with ProcessPoolExecutor(workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(convert_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def write_csv(results, output):
+    writer = csv.writer(output)
+    writer.writerow(FIELDS)
+    for rows, errors in results:
+        report(errors)
+        writer.writerows(
+            (line, hex_code, ", ".join(map(str, rgb)), ", ".join(map(str, cmyk)),
+             ", ".join(map(str, hsl)), alpha)
+            for line, hex_code, rgb, cmyk, hsl, alpha in rows
+        )
+
+
+def write_jsonl(results, output):
+    for rows, errors in results:
+        report(errors)
+        output.writelines(json.dumps(dict(zip(FIELDS, row))) + "\n" for row in rows)
+
+
+def report(errors):
+    for number, line, error in errors:
+        print(f"line {number}, column {error.position + 1}: {error.message} in {line!r}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", nargs="?", default="-", help="input file, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-f", "--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8",
+                                                       newline="")
+    try:
+        results = convert(read_lines(source), args.chunk_size, args.workers)
+        {"csv": write_csv, "jsonl": write_jsonl}[args.format](results, target)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput of batch.py, with its hsl column checked against QColor.
+
+    python -m benchmarks.bench_batch [--count N] [--workers 1 --workers 4]
+
+Random colours, as hex codes, RGB triples and CMYK percentages in turn, are
+converted by batch.convert. Every row's hsl column must equal hslHue(),
+hslSaturation() and lightness() of the same colour as a QColor, the last two on
+the 0 - 100 scale of the picker and the hue 0 for achromatic colours. The
+benchmark exits with status 1 if any does not.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from PySide6.QtGui import QColor
+
+import batch
+
+
+def sample(count: int) -> list:
+    """(line, QColor) pairs."""
+    rng = random.Random(0)
+    samples = []
+    for number in range(count):
+        if number % 3 == 2:
+            cmyk = [rng.randrange(101) for _ in range(4)]
+            samples.append((", ".join(map(str, cmyk)),
+                            QColor.fromCmykF(*(value / 100 for value in cmyk))))
+            continue
+        rgb = [rng.randrange(256) for _ in range(3)]
+        # Some greys, the hue of an achromatic colour is a case of its own
+        if number % 50 == 0:
+            rgb = [rgb[0]] * 3
+        line = "#%02X%02X%02X" % tuple(rgb) if number % 3 else ", ".join(map(str, rgb))
+        samples.append((line, QColor(*rgb)))
+    return samples
+
+
+def expected_hsl(color: QColor) -> list:
+    return [max(color.hslHue(), 0), color.hslSaturation() * 100 // 255,
+            color.lightness() * 100 // 255]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, action="append",
+                        help="worker processes, can be repeated")
+    args = parser.parse_args()
+
+    samples = sample(args.count)
+    lines = [(number, line) for number, (line, _) in enumerate(samples, 1)]
+    print(f"{'workers':<8}{'colours/s':>12}")
+    for workers in args.workers or [1]:
+        start = time.perf_counter()
+        rows = [row for chunk, _ in batch.convert(lines, args.chunk_size, workers)
+                for row in chunk]
+        print(f"{workers:<8}{len(rows) / (time.perf_counter() - start):>12.0f}")
+
+    mismatches = [(line, hsl, expected_hsl(color))
+                  for (line, _, _, _, hsl, _), (_, color) in zip(rows, samples)
+                  if hsl != expected_hsl(color)]
+    for line, hsl, expected in mismatches[:10]:
+        print(f"{line!r}: hsl {hsl}, QColor {expected}", file=sys.stderr)
+    if mismatches:
+        print(f"{len(mismatches)} of {len(rows)} hsl values differ from QColor", file=sys.stderr)
+        sys.exit(1)
+    print(f"hsl of all {len(rows)} colours equal to QColor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+colorspace.py against QColor, for speed and for exactly the same results.
+
+    python -m benchmarks.bench_colorspace [--count 20000]
+
+Every conversion runs on --count random colours, vectorised and as a loop over
+QColor. HSL to RGB is checked for whole and fractional hues, the latter against
+QColor.fromHslF, whose hue is rounded in single precision. The benchmark exits
+with status 1 if any result differs from QColor's.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from PySide6.QtGui import QColor
+
+import colorspace
+
+
+def rgb16(color: QColor) -> tuple:
+    rgba64 = color.rgba64()
+    return rgba64.red(), rgba64.green(), rgba64.blue()
+
+
+def hsl(color: QColor) -> tuple:
+    return color.hslHue(), color.hslSaturation(), color.lightness()
+
+
+def cases(count: int) -> list:
+    """(name, input, vectorised function, QColor function of one input row)."""
+    rng = np.random.default_rng(0)
+    hsls = np.stack([rng.integers(-1, 360, count), rng.integers(0, 256, count),
+                     rng.integers(0, 256, count)], axis=-1)
+    hsls_f = np.stack([rng.random(count) * 360, hsls[:, 1], hsls[:, 2]], axis=-1)
+    rgb16s = rng.integers(0, 65536, (count, 3))
+    cmyk = rng.integers(0, 101, (count, 4))
+    return [
+        ("hsl_to_rgb16", hsls, colorspace.hsl_to_rgb16,
+         lambda row: rgb16(QColor.fromHsl(*map(int, row)))),
+        ("hsl_to_rgb16 fractional", hsls_f, colorspace.hsl_to_rgb16,
+         lambda row: rgb16(QColor.fromHslF(row[0] / 360, row[1] / 255, row[2] / 255))),
+        ("rgb16_to_hsl", rgb16s, colorspace.rgb16_to_hsl,
+         lambda row: hsl(QColor.fromRgba64(*map(int, row)))),
+        ("rgb16_to_hue", rgb16s, colorspace.rgb16_to_hue,
+         lambda row: QColor.fromRgba64(*map(int, row)).hue()),
+        ("cmyk_to_rgb16", cmyk, colorspace.cmyk_to_rgb16,
+         lambda row: rgb16(QColor.fromCmykF(*(value / 100 for value in row)))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'conversion':<26}{'numpy ms':>10}{'QColor ms':>11}{'differ':>8}")
+    for name, values, vectorised, single in cases(args.count):
+        start = time.perf_counter()
+        result = vectorised(values)
+        numpy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        expected = np.array([single(row) for row in values.tolist()])
+        qcolor_ms = (time.perf_counter() - start) * 1000
+
+        differ = np.flatnonzero((result != expected).reshape(len(values), -1).any(axis=-1))
+        print(f"{name:<26}{numpy_ms:>10.2f}{qcolor_ms:>11.2f}{len(differ):>8}")
+        for index in differ[:5]:
+            print(f"  {values[index].tolist()}: {result[index].tolist()}, "
+                  f"QColor {expected[index].tolist()}", file=sys.stderr)
+        failed = failed or len(differ) > 0
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Contrast scoring and the compliance suggestion per colour update.
+
+    python -m benchmarks.bench_contrast [--references 48] [--updates 5000]
+
+Half the references are light backgrounds, half light text colours, so the picked
+colour is scored both ways and a dark enough colour passes everything. Every
+update scores a random HSL colour with WCAG and APCA and, for the current
+standard, suggests the nearest passing lightness. Times are per update in
+microseconds, the budget is a millisecond.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import contrast
+import float_color
+
+BUDGET_US = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--references", type=int, default=48)
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    backgrounds = [tuple(random.randrange(200, 256) for _ in range(3))
+                   for _ in range(args.references // 2)]
+    foregrounds = [tuple(random.randrange(215, 256) for _ in range(3))
+                   for _ in range(args.references - len(backgrounds))]
+    colors = [(random.uniform(0, 360), random.uniform(0, 100), random.uniform(0, 100))
+              for _ in range(args.updates)]
+    rgbfs = [tuple(float_color.hsl_to_rgb((hue, saturation / 100, lightness / 100)).tolist())
+             for hue, saturation, lightness in colors]
+
+    print(f"{args.references} references, budget {BUDGET_US} us")
+    print(f"{'standard':<10}{'suggested':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for standard in (contrast.WCAG, contrast.APCA):
+        checker = contrast.ContrastChecker(backgrounds, foregrounds, standard)
+        suggested = 0
+        times = []
+        for hsl, rgbf in zip(colors, rgbfs):
+            start = time.perf_counter()
+            scores = checker.score(rgbf)
+            passes = checker.passes(scores)[standard == contrast.APCA]
+            if not passes and checker.suggest(*hsl) is not None:
+                suggested += 1
+            times.append((time.perf_counter() - start) * 1e6)
+
+        times.sort()
+        print(f"{standard:<10}{suggested:>10}{statistics.median(times):>10.1f}"
+              f"{times[int(len(times) * 0.99)]:>10.1f}{times[-1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
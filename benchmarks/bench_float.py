@@ -0,0 +1,80 @@
+"""
+Float colour pipeline: a 4K gradient preview against the frame budget.
+
+    python -m benchmarks.bench_float [--width 3840 --height 2160] [--runs 20]
+
+"gradient" renders the dithered preview between two colours into a reused image,
+like a preview that follows the picked colour. "gradient (new)" allocates a new
+image every time. "convert" and "convert icc" turn width colours from sRGB into
+Display P3, exactly and through Qt's ICC transform. "export" builds the 16 bit
+image of a full frame of float pixels, as the PNG palette export does for its
+bands; it is a one-off and not held to the frame budget.
+
+A case whose median misses the frame budget is marked and the benchmark exits
+with status 1, the preview follows the picked colour and has to keep up.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+from PySide6.QtGui import QColorSpace
+
+import float_color
+
+FRAME_MS = 1000 / 60
+
+
+def timed(function, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    colors = rng.random((args.width, 3), dtype=np.float32)
+    frame = rng.random((args.height, args.width, 3), dtype=np.float32)
+    p3 = QColorSpace(QColorSpace.DisplayP3)
+    preview = float_color.gradient((1, 0, 0), (0, 0, 1), args.width, args.height)
+
+    cases = (
+        ("gradient", lambda: float_color.gradient(
+            (1, 0, 0), (0, 0, 1), args.width, args.height, image=preview)),
+        ("gradient (new)", lambda: float_color.gradient(
+            (1, 0, 0), (0, 0, 1), args.width, args.height)),
+        ("convert", lambda: float_color.convert(colors, "srgb", "display-p3")),
+        ("convert icc", lambda: float_color.convert(colors, "srgb", p3)),
+        ("export", lambda: float_color.export_image(frame, "display-p3")),
+    )
+
+    print(f"{args.width}x{args.height}, frame budget {FRAME_MS:.1f} ms")
+    print(f"{'case':<16}{'median ms':>10}{'max ms':>10}{'budget':>8}")
+    misses = []
+    for name, function in cases:
+        per_frame = name != "export"
+        times = timed(function, args.runs if per_frame else max(1, args.runs // 5))
+        median = statistics.median(times)
+        if per_frame and median > FRAME_MS:
+            misses.append(name)
+        budget = "-" if not per_frame else "MISS" if median > FRAME_MS else "ok"
+        print(f"{name:<16}{median:>10.2f}{max(times):>10.2f}{budget:>8}")
+
+    if misses:
+        print(f"\nover the {FRAME_MS:.1f} ms frame budget: {', '.join(misses)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Ramp interpolation and palette file generation throughput.
+
+    python -m benchmarks.bench_generator [--steps 4096] [--lines 20000] [--workers 1 4] [--trace]
+
+First a single ramp of --steps colours between two stops is timed in every
+interpolation space. Then --lines random brand colours are turned into 11 step
+tonal scales plus tints and written to an in-memory file in every format, with
+each of the --workers pool sizes. Only the encoded chunks in flight are held,
+with --trace the peak traced memory of the writing process shows that it does not
+grow with the number of lines. Tracing slows the runs down several times.
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+import tracemalloc
+
+import palette_generator
+import swatch_files
+
+
+class NullOutput(io.RawIOBase):
+    # Counts bytes instead of keeping them, and seeks for the ASE block count
+    def __init__(self):
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return offset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--steps", type=int, default=4096)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--trace", action="store_true", help="measure the peak memory")
+    args = parser.parse_args()
+
+    print(f"{args.steps} step ramp")
+    for space in palette_generator.SPACES:
+        times = []
+        for _ in range(50):
+            start = time.perf_counter()
+            palette_generator.ramp([(1, 0.2, 0), (0, 0.3, 1)], args.steps, space)
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"  {space:<8}{statistics.median(times):>8.2f} ms")
+
+    random.seed(0)
+    lines = [(number, f"c{number}: #{random.randrange(1 << 24):06X}")
+             for number in range(1, args.lines + 1)]
+    options = palette_generator.Options(11, "oklab", ("tints",))
+
+    print(f"{args.lines} lines, {2 * args.lines} palettes")
+    print(f"{'format':<8}{'workers':>8}{'seconds':>10}{'MB out':>10}{'peak MB':>10}")
+    for file_format in swatch_files.WRITERS:
+        for workers in args.workers:
+            output = NullOutput()
+            if args.trace:
+                tracemalloc.start()
+            start = time.perf_counter()
+            palette_generator.write(
+                palette_generator.generate(iter(lines), options._replace(format=file_format),
+                                           workers=workers),
+                swatch_files.WRITERS[file_format](output))
+            seconds = time.perf_counter() - start
+            peak = "-"
+            if args.trace:
+                peak = f"{tracemalloc.get_traced_memory()[1] / 1e6:.1f}"
+                tracemalloc.stop()
+            print(f"{file_format:<8}{workers:>8}{seconds:>10.2f}{output.size / 1e6:>10.1f}"
+                  f"{peak:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cost and accuracy of the hue indicator position per input event.
+
+    python -m benchmarks.bench_indicator [--radius 165] [--events 200000]
+
+"before" is the trig expression the wheel used to evaluate on every event,
+truncated to a QPoint. "table" is RingGeometry.point() for integer angles and
+"fractional" the same for angles in hundredths of a degree, interpolated between
+two table entries. The error is the distance to the exact position on the circle.
+"""
+
+import argparse
+import math
+import random
+import time
+
+from PySide6.QtCore import QPoint
+
+from ring_geometry import RingGeometry
+
+
+def before(size: int, radius: int, angle: float) -> QPoint:
+    return QPoint(
+        int(size + radius * math.sin(math.radians(angle + 180))),
+        int(size + radius * math.cos(math.radians(angle + 180))),
+    )
+
+
+def error(point, size: int, radius: int, angle: float) -> float:
+    exact_x = size + radius * math.sin(math.radians(angle + 180))
+    exact_y = size + radius * math.cos(math.radians(angle + 180))
+    return math.hypot(point.x() - exact_x, point.y() - exact_y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--radius", type=int, default=165)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    size = args.radius + 35
+    random.seed(0)
+    integer_angles = [random.randrange(360) for _ in range(args.events)]
+    fractional_angles = [random.randrange(36000) / 100 for _ in range(args.events)]
+
+    start = time.perf_counter()
+    geometry = RingGeometry(size, args.radius)
+    build = time.perf_counter() - start
+
+    cases = (
+        ("before", integer_angles, lambda angle: before(size, args.radius, angle)),
+        ("table", integer_angles, geometry.point),
+        ("before", fractional_angles, lambda angle: before(size, args.radius, angle)),
+        ("fractional", fractional_angles, geometry.point),
+    )
+
+    print(f"table built in {build * 1e6:.0f} us")
+    print(f"{'method':<12}{'angles':<12}{'ns/event':>10}{'max error px':>14}")
+    for name, angles, position in cases:
+        start = time.perf_counter()
+        for angle in angles:
+            position(angle)
+        elapsed = time.perf_counter() - start
+
+        worst = max(error(position(angle), size, args.radius, angle) for angle in angles[:20000])
+        kind = "integer" if angles is integer_angles else "fractional"
+        print(f"{name:<12}{kind:<12}{elapsed / len(angles) * 1e9:>10.0f}{worst:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
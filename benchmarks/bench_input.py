@@ -0,0 +1,91 @@
+"""
+Work done for a high polling rate mouse dragging the hue.
+
+    python -m benchmarks.bench_input [--rate 1000] [--seconds 2]
+
+Mouse moves arrive at --rate per second for --seconds while the event loop runs.
+Reported are the moves received out of the --rate * --seconds due, which is fewer
+when handling a move takes longer than 1 / --rate, and for those the states the
+wheel applied, the colour state recomputes and the paint events, with and without
+InputCoalescer. With it the
+applied count should follow the screen's refresh rate. Without a display, run it
+with QT_QPA_PLATFORM=offscreen.
+"""
+
+import argparse
+import math
+import time
+
+from PySide6.QtCore import QElapsedTimer, QEvent, QEventLoop, QPointF, Qt
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QApplication
+
+from color_picker import PyColorPicker
+from input_coalescer import InputCoalescer
+
+
+def drag(app: QApplication, rate: int, seconds: float) -> dict:
+    picker = PyColorPicker(None)
+    picker.show()
+    app.processEvents()
+
+    wheel = picker.wheel
+    center = wheel.rect().center()
+    paint_events = wheel.paint_events
+    recomputes = sum(picker.state.recomputes.values())
+
+    def send(kind: QEvent.Type, degrees: float):
+        pos = QPointF(center.x() + wheel.radius * math.cos(math.radians(degrees)),
+                      center.y() + wheel.radius * math.sin(math.radians(degrees)))
+        app.sendEvent(wheel, QMouseEvent(kind, pos, pos, Qt.LeftButton, Qt.LeftButton,
+                                          Qt.NoModifier))
+
+    send(QEvent.MouseButtonPress, 0)
+    total = round(rate * seconds)
+    deadline = seconds * 1000
+    clock = QElapsedTimer()
+    clock.start()
+    moves = 0
+    while clock.elapsed() < deadline and moves < total:
+        # Moves that are due by now, then whatever the event loop has to do. When a
+        # move takes longer than 1 / rate this never catches up, so the deadline ends it.
+        while moves < min(total, clock.elapsed() * rate / 1000) and clock.elapsed() < deadline:
+            moves += 1
+            send(QEvent.MouseMove, moves * 360 / total)
+        app.processEvents(QEventLoop.AllEvents)
+        time.sleep(0.0002)
+    app.processEvents()
+
+    # Counted before the release, which would add work of its own
+    result = {
+        "due": total,
+        "received": moves,
+        "applied": wheel.input.applied,
+        "recomputes": sum(picker.state.recomputes.values()) - recomputes,
+        "paints": wheel.paint_events - paint_events,
+        "refresh": 1000 / wheel.input.frame_interval(),
+    }
+    send(QEvent.MouseButtonRelease, 360)
+    app.processEvents()
+    picker.deleteLater()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rate", type=int, default=1000, help="mouse moves per second")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    print(f"{'mode':<12}{'due':>8}{'received':>10}{'applied':>10}{'recomputes':>12}"
+          f"{'paints':>8}{'refresh Hz':>12}")
+    for name, enabled in (("coalesced", True), ("immediate", False)):
+        InputCoalescer.enabled = enabled
+        result = drag(app, args.rate, args.seconds)
+        print(f"{name:<12}{result['due']:>8}{result['received']:>10}{result['applied']:>10}"
+              f"{result['recomputes']:>12}{result['paints']:>8}{result['refresh']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
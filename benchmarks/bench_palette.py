@@ -0,0 +1,78 @@
+"""
+Throughput of the palette extraction in megapixels per second.
+
+    python -m benchmarks.bench_palette [--width 6000 --height 4000] [--max-pixels N]
+
+The input is a synthetic photo-like image: smooth gradients, a few coloured regions
+and sensor noise. Each method is timed on the NumPy array, on a QImage and, with
+--full, without downsampling.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PySide6.QtGui import QImage
+
+import palette
+
+
+def synthetic_photo(width: int, height: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    x /= width
+    y /= height
+
+    image = np.empty((height, width, 3), dtype=np.float32)
+    image[..., 0] = 60 + 150 * x
+    image[..., 1] = 90 + 100 * y
+    image[..., 2] = 200 - 120 * x * y
+
+    for _ in range(6):
+        center_x, center_y, radius = rng.random(3) * (1, 1, 0.3) + (0, 0, 0.05)
+        inside = (x - center_x) ** 2 + (y - center_y) ** 2 < radius ** 2
+        image[inside] = rng.integers(0, 256, 3)
+
+    image += rng.normal(0, 4, (height, width, 1)).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def measure(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--max-pixels", type=int, default=palette.DEFAULT_MAX_PIXELS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--full", action="store_true", help="also time without downsampling")
+    args = parser.parse_args()
+
+    array = synthetic_photo(args.width, args.height)
+    image = QImage(array.tobytes(), args.width, args.height, args.width * 3,
+                   QImage.Format_RGB888).convertToFormat(QImage.Format_RGBA8888)
+    megapixels = args.width * args.height / 1e6
+
+    cases = [("array", array, args.max_pixels), ("qimage", image, args.max_pixels)]
+    if args.full:
+        cases.append(("array full", array, 0))
+
+    print(f"{megapixels:.1f} MP, at most {args.max_pixels} sampled pixels")
+    print(f"{'method':<12}{'input':<12}{'seconds':>10}{'MP/s':>10}")
+    for method in palette.METHODS:
+        for name, source, max_pixels in cases:
+            seconds = measure(lambda: palette.extract_palette(
+                source, args.count, method, max_pixels), args.repeat)
+            print(f"{method:<12}{name:<12}{seconds:>10.3f}{megapixels / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
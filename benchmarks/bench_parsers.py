@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of parsers.py against the regex checks the picker used before.
+
+    python -m benchmarks.bench_parsers [--count N]
+
+The parsers check ranges and accept more forms than the old checks, for about
+the same time per string.
+"""
+
+import argparse
+import random
+import re
+import timeit
+
+import parsers
+
+
+def legacy_hex(text: str):
+    if not re.search(r'^#(?:[0-9a-fA-F]{3}){1,2}$', text):
+        return None
+    value = int(text[1:], 16)
+    return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
+
+def legacy_rgb(text: str):
+    if not re.search(r"\d{1,3},\s*\d{1,3},\s*\d{1,3}", text):
+        return None
+    if text.count(",") > 2:
+        return None
+    r, g, b = text.strip().split(",")
+    return int(r), int(g), int(b)
+
+
+def legacy_cmyk(text: str):
+    if not re.search(r"\d{1,3},\s*\d{1,3},\s*\d{1,3},\s*\d{1,3}", text):
+        return None
+    if text.count(",") > 3:
+        return None
+    c, m, y, k = text.strip().split(",")
+    return int(c), int(m), int(y), int(k)
+
+
+def sample(count: int):
+    rng = random.Random(0)
+    hex_codes = [f"#{rng.randrange(1 << 24):06X}" for _ in range(count)]
+    rgb = [", ".join(str(rng.randrange(256)) for _ in range(3)) for _ in range(count)]
+    cmyk = [", ".join(str(rng.randrange(101)) for _ in range(4)) for _ in range(count)]
+    return hex_codes, rgb, cmyk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    hex_codes, rgb, cmyk = sample(args.count)
+    cases = (
+        ("hex", hex_codes, legacy_hex, parsers.parse_hex),
+        ("rgb", rgb, legacy_rgb, parsers.parse_rgb),
+        ("cmyk", cmyk, legacy_cmyk, parsers.parse_cmyk),
+    )
+
+    print(f"{'form':<6}{'legacy ns':>12}{'parsers ns':>12}{'speedup':>10}")
+    for name, texts, legacy, current in cases:
+        times = []
+        for function in (legacy, current):
+            best = min(timeit.repeat(lambda: list(map(function, texts)),
+                                     number=1, repeat=args.repeat))
+            times.append(best / len(texts) * 1e9)
+        print(f"{name:<6}{times[0]:>12.0f}{times[1]:>12.0f}{times[0] / times[1]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
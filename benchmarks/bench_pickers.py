@@ -0,0 +1,108 @@
+"""
+Construction time and memory of many pickers in one window.
+
+    python -m benchmarks.bench_pickers [--count 500] [--columns 10]
+
+Each mode runs in a fresh interpreter so the memory numbers do not mix. "full"
+builds every picker with its editors, "lightweight" builds swatches that create
+their editors on focus. The grid sits in a 1280x800 scroll area. Memory is the
+growth of the resident set size.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ("full", "lightweight")
+
+
+def resident_mb() -> float:
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # Peak instead of current size, kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def child(mode: str, count: int, columns: int):
+    from PySide6.QtWidgets import QApplication, QGridLayout, QScrollArea, QWidget
+
+    from color_picker import PyColorPicker
+
+    app = QApplication([])
+    # Like a theme editor, a scrolled grid in a window of ordinary size
+    scroll_area = QScrollArea()
+    scroll_area.resize(1280, 800)
+    host = QWidget()
+    layout = QGridLayout(host)
+
+    # Warm up imports, fonts and icons so only the per picker cost is measured
+    PyColorPicker(None, lightweight=mode == "lightweight").deleteLater()
+    app.processEvents()
+
+    memory = resident_mb()
+    start = time.perf_counter()
+    pickers = [PyColorPicker(host, lightweight=mode == "lightweight") for _ in range(count)]
+    for index, picker in enumerate(pickers):
+        layout.addWidget(picker, index // columns, index % columns)
+    built = time.perf_counter()
+    built_memory = resident_mb()
+
+    scroll_area.setWidget(host)
+    scroll_area.show()
+    app.processEvents()
+    shown = time.perf_counter()
+    shown_memory = resident_mb()
+
+    result = {
+        "construct ms": (built - start) * 1000,
+        "show ms": (shown - built) * 1000,
+        "construct MB": built_memory - memory,
+        "show MB": shown_memory - built_memory,
+    }
+
+    if mode == "lightweight":
+        start = time.perf_counter()
+        pickers[0].expand()
+        app.processEvents()
+        result["expand ms"] = (time.perf_counter() - start) * 1000
+
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--platform", default="offscreen", help="Qt platform plugin")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.count, args.columns)
+        return
+
+    print(f"{args.count} pickers")
+    print(f"{'mode':<13}{'build ms':>10}{'show ms':>10}{'build MB':>10}{'show MB':>10}"
+          f"{'expand ms':>11}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_pickers", "--child", mode,
+             "--count", str(args.count), "--columns", str(args.columns)],
+            env=dict(os.environ, QT_QPA_PLATFORM=args.platform),
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        expand = f"{result['expand ms']:>11.1f}" if "expand ms" in result else f"{'-':>11}"
+        print(f"{mode:<13}{result['construct ms']:>10.0f}{result['show ms']:>10.0f}"
+              f"{result['construct MB']:>10.1f}{result['show MB']:>10.1f}{expand}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Colour server throughput with thousands of subscribers while the colour changes.
+
+    python -m benchmarks.bench_server [--subscribers 2000] [--seconds 3]
+
+A child process connects --subscribers sockets that subscribe and read every
+push, and one more that pipelines --requests "get" requests and a single convert
+of --convert colours. Meanwhile the picker's lightness changes every millisecond
+in the GUI process. Reported are the child's request and conversion rates, the
+pushes each subscriber received, the time of one broadcast to all of them and
+the longest the GUI event loop was kept from running. Without a display, run it
+with QT_QPA_PLATFORM=offscreen.
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import color_server
+
+SOCKET_NAME = f"color-picker-bench-{os.getpid()}"
+
+
+def drain(sockets: list, counts: dict, stop: threading.Event):
+    selector = selectors.DefaultSelector()
+    for subscriber in sockets:
+        subscriber.setblocking(False)
+        selector.register(subscriber, selectors.EVENT_READ, bytearray())
+    while not stop.is_set():
+        for key, _ in selector.select(0.05):
+            buffer = key.data
+            buffer += key.fileobj.recv(1 << 16)
+            while len(buffer) >= 4:
+                (size,) = color_server.HEADER.unpack_from(buffer)
+                if len(buffer) < 4 + size:
+                    break
+                del buffer[:4 + size]
+                counts[key.fileobj] = counts.get(key.fileobj, 0) + 1
+
+
+def child(name: str, subscribers: int, requests: int, colors: int):
+    sockets = []
+    for _ in range(subscribers):
+        client = color_server.Client(name)
+        client.request("subscribe")
+        sockets.append(client.socket)
+
+    counts, stop = {}, threading.Event()
+    thread = threading.Thread(target=drain, args=(sockets, counts, stop))
+    thread.start()
+
+    client = color_server.Client(name)
+    start = time.perf_counter()
+    sent = 0
+    for received in range(requests):
+        # At most color_server.MAX_PIPELINE requests in flight
+        while sent < min(requests, received + color_server.MAX_PIPELINE):
+            client.send("get")
+            sent += 1
+        client.receive()
+    gets = requests / (time.perf_counter() - start)
+
+    batch = [f"{index % 256}, {index // 256 % 256}, {index // 65536 % 256}"
+             for index in range(colors)]
+    start = time.perf_counter()
+    results = client.request("convert", colors=batch)["results"]
+    converts = len(results) / (time.perf_counter() - start)
+
+    # The last pushes are still on their way
+    time.sleep(0.5)
+    stop.set()
+    thread.join()
+    pushes = [counts.get(subscriber, 0) for subscriber in sockets]
+    print(json.dumps({"gets/s": gets, "colours/s": converts, "pushes min": min(pushes),
+                      "pushes median": statistics.median(pushes)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0, help="colour changes for")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--convert", type=int, default=100000, help="colours in one request")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.subscribers, args.requests, args.convert)
+        return
+
+    from PySide6.QtCore import QEventLoop
+    from PySide6.QtWidgets import QApplication
+
+    from color_picker import PyColorPicker
+
+    app = QApplication([])
+    picker = PyColorPicker(None)
+    picker.show()
+    app.processEvents()
+
+    server = color_server.ColorServer(SOCKET_NAME)
+    broadcasts = []
+    broadcast = server.broadcast
+
+    def timed_broadcast(state=None):
+        start = time.perf_counter()
+        broadcast(state)
+        broadcasts.append((time.perf_counter() - start) * 1000)
+
+    server.broadcast = timed_broadcast
+    server.set_state(picker.state)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_server", "--child", server.name(),
+         "--subscribers", str(args.subscribers), "--requests", str(args.requests),
+         "--convert", str(args.convert)],
+        stdout=subprocess.PIPE, text=True)
+
+    # Connecting is not measured, the colour only starts changing once all are in
+    while len(server.subscribers) < args.subscribers and process.poll() is None:
+        app.processEvents(QEventLoop.AllEvents, 10)
+
+    stall = 0.0
+    changes = 0
+    start = last = time.perf_counter()
+    while process.poll() is None or time.perf_counter() - start < args.seconds:
+        if time.perf_counter() - start < args.seconds:
+            changes += 1
+            picker.state.set_hsl(changes % 360, 100, 50)
+        app.processEvents(QEventLoop.AllEvents)
+        now = time.perf_counter()
+        stall = max(stall, (now - last) * 1000)
+        last = now
+        time.sleep(0.001)
+    result = json.loads(process.stdout.read().strip().splitlines()[-1])
+    server.close()
+
+    broadcasts.sort()
+    print(f"{args.subscribers} subscribers, {changes} colour changes, {server.pushes} pushes, "
+          f"refresh {1000 / server.coalescer.frame_interval():.0f} Hz")
+    print(f"gets/s          {result['gets/s']:>12.0f}")
+    print(f"colours/s       {result['colours/s']:>12.0f}")
+    print(f"pushes received {result['pushes min']:>12} min {result['pushes median']:>8} median")
+    print(f"broadcast ms    {statistics.median(broadcasts):>12.2f} p50 {broadcasts[-1]:>8.2f} max")
+    print(f"loop stall ms   {stall:>12.2f} max")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Cold-start benchmark: time to tray and time to the first window paint.
+
+    python -m benchmarks.bench_startup [--runs 10] [--platform offscreen]
+
+Every run starts a fresh interpreter, the clock starts right before the process is
+spawned. "lazy" is the current startup, the window is opened as soon as the tray is
+up. "eager" builds the window before the tray, the way main() used to. The OS file
+cache stays warm between runs, so the numbers are for a warm disk.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("lazy", "eager")
+
+
+def child(mode: str):
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    import main
+
+    marks = {}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if (event.type() == QEvent.Paint and "paint" not in marks
+                    and watched.isWidgetType() and watched.window() is tray.window):
+                marks["paint"] = time.monotonic()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    app = QApplication([])
+    app.setQuitOnLastWindowClosed(False)
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+
+    tray = main.ColorTray(prewarm_delay=-1)
+    if mode == "eager":
+        tray.get_window()
+    tray.setVisible(True)
+
+    def tray_ready():
+        marks["tray"] = time.monotonic()
+        tray.open_window()
+
+    # The tray counts as up once the event loop runs
+    QTimer.singleShot(0, tray_ready)
+    app.exec()
+
+    print(json.dumps(marks))
+
+
+def run(mode: str, platform: str) -> dict:
+    environment = dict(os.environ, QT_QPA_PLATFORM=platform)
+    start = time.monotonic()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+        env=environment, capture_output=True, text=True, check=True
+    ).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {name: mark - start for name, mark in marks.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--platform", default="offscreen", help="Qt platform plugin")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'mode':<8}{'tray ms':>10}{'(min)':>8}{'paint ms':>10}{'(min)':>8}")
+    for mode in MODES:
+        results = [run(mode, args.platform) for _ in range(args.runs)]
+        tray = [result["tray"] * 1000 for result in results]
+        paint = [result["paint"] * 1000 for result in results]
+        print(f"{mode:<8}{statistics.median(tray):>10.0f}{min(tray):>8.0f}"
+              f"{statistics.median(paint):>10.0f}{min(paint):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
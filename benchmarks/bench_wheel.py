@@ -0,0 +1,88 @@
+"""
+Frame time of the colour wheel while the hue is dragged around the ring.
+
+    python -m benchmarks.bench_wheel [--size 1000] [--frames 720]
+
+The mouse is moved in half degree steps, every move is followed by the repaint it
+causes. The first lap renders the saturation/lightness square of every hue, the
+second one finds the last hsl_square.CACHE_SIZE of them cached. Frame times are
+the wheel's own paint event timings. Without a display, run it with
+QT_QPA_PLATFORM=offscreen.
+"""
+
+import argparse
+import math
+import statistics
+from collections import deque
+
+from PySide6.QtCore import QEvent, QPointF, Qt
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QApplication
+
+import hsl_square
+from color_picker import PyColorPicker
+from input_coalescer import InputCoalescer
+
+# Frame budget at 1000x1000 for the drag to keep up with a 240 Hz display
+BUDGET_MS = 4.0
+
+
+def mouse_event(kind: QEvent.Type, pos: QPointF) -> QMouseEvent:
+    return QMouseEvent(kind, pos, pos, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+
+def drag(app: QApplication, wheel, steps: int) -> list:
+    center = wheel.rect().center()
+    radius = wheel.radius
+
+    def point(step: int) -> QPointF:
+        radians = math.radians(step / 2)
+        return QPointF(center.x() + radius * math.cos(radians),
+                       center.y() + radius * math.sin(radians))
+
+    wheel.frame_times.clear()
+    app.sendEvent(wheel, mouse_event(QEvent.MouseButtonPress, point(0)))
+    for step in range(steps):
+        app.sendEvent(wheel, mouse_event(QEvent.MouseMove, point(step)))
+        app.processEvents()
+    app.sendEvent(wheel, mouse_event(QEvent.MouseButtonRelease, point(steps)))
+    return list(wheel.frame_times)
+
+
+def report(name: str, frame_times: list):
+    frame_times = sorted(frame_times)
+    p95 = frame_times[int(len(frame_times) * 0.95)]
+    print(f"{name:<8}{len(frame_times):>8}{statistics.median(frame_times):>10.2f}"
+          f"{p95:>10.2f}{frame_times[-1]:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--size", type=int, default=1000, help="wheel width in pixels")
+    parser.add_argument("--frames", type=int, default=720, help="mouse moves per lap")
+    args = parser.parse_args()
+
+    # Every move is painted, so the numbers are per frame and not per coalesced batch
+    InputCoalescer.enabled = False
+
+    app = QApplication([])
+    picker = PyColorPicker(None)
+    picker.setFixedSize(args.size, args.size + picker.FULL_SIZE.height() - 400)
+    picker.wheel.setFixedSize(args.size, args.size)
+    picker.show()
+    app.processEvents()
+
+    wheel = picker.wheel
+    wheel.frame_times = deque(maxlen=args.frames)
+    print(f"wheel {wheel.width()}x{wheel.height()}, "
+          f"square {wheel.square_rect().width()} px, budget {BUDGET_MS} ms")
+    print(f"{'lap':<8}{'frames':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+
+    hsl_square.clear()
+    report("cold", drag(app, wheel, args.frames))
+    report("warm", drag(app, wheel, args.frames))
+    print(f"square cache: {dict(hsl_square.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Widget interactions driven headless, with JSON baselines to catch regressions.
+
+    python -m benchmarks.bench_widgets [--interactions 400] [--repeat 5]
+    python -m benchmarks.bench_widgets --save benchmarks/baselines/widgets.json
+    python -m benchmarks.bench_widgets --compare benchmarks/baselines/widgets.json
+
+Every scenario sends synthetic input to a PyColorPicker on the offscreen Qt
+platform: mouse moves along the wheel's ring and through its square, scroll
+steps, keystrokes into the HEX, RGB and CMYK DisplayGroup edits and arrow keys
+sweeping both PyIconSliders. Each interaction is followed by the event loop
+running until it is idle, so the picker is up to date and painted before the
+next one. InputCoalescer is off, every input is applied on its own.
+
+Reported per scenario, the best of --repeat runs after a warm up run:
+
+    events/s      interactions per second, including their repaints
+    p50/p95 ms    time of one interaction until the event loop is idle
+    paint ms      p50 and p95 of the wheel's paint events
+    KiB/op        peak Python memory allocated during one interaction, from a
+                  separate run under tracemalloc
+    blocks/op     Python memory blocks still allocated afterwards, per interaction
+
+--save writes the results as a baseline. --compare prints the change against a
+baseline and exits with status 1 if any metric got worse by more than
+--tolerance. Timings are only comparable on the machine the baseline was saved
+on, the environment is stored with it and a mismatch is warned about.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+# Headless unless a platform is asked for, before Qt is loaded
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import __version__ as pyside_version
+from PySide6.QtCore import QEvent, QPoint, QPointF, Qt
+from PySide6.QtGui import QMouseEvent, QWheelEvent
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication
+
+from color_picker import PyColorPicker
+from input_coalescer import InputCoalescer
+
+# Name, whether a higher value is better and the change below which it is noise
+METRICS = (
+    ("events/s", True, 0.0),
+    ("p50 ms", False, 0.05),
+    ("p95 ms", False, 0.1),
+    ("paint p50 ms", False, 0.05),
+    ("paint p95 ms", False, 0.1),
+    ("KiB/op", False, 0.5),
+    ("blocks/op", False, 1.0),
+)
+
+
+def mouse_event(kind: QEvent.Type, pos: QPointF) -> QMouseEvent:
+    return QMouseEvent(kind, pos, pos, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+
+def drag(app: QApplication, widget, points: list):
+    """Press on the first point, then yield one interaction per move."""
+    app.sendEvent(widget, mouse_event(QEvent.MouseButtonPress, points[0]))
+    for point in points[1:]:
+        yield lambda point=point: app.sendEvent(widget, mouse_event(QEvent.MouseMove, point))
+    app.sendEvent(widget, mouse_event(QEvent.MouseButtonRelease, points[-1]))
+
+
+def ring_drag(app: QApplication, picker: PyColorPicker, count: int):
+    wheel = picker.wheel
+    center = wheel.rect().center()
+    points = [QPointF(center.x() + wheel.radius * math.cos(math.radians(step)),
+                      center.y() + wheel.radius * math.sin(math.radians(step)))
+              for step in range(count + 1)]
+    return drag(app, wheel, points)
+
+
+def square_drag(app: QApplication, picker: PyColorPicker, count: int):
+    # A Lissajous curve, so both saturation and lightness keep changing
+    square = picker.wheel.square_rect()
+    points = [QPointF(square.center().x() + square.width() * 0.45 * math.sin(step * 0.05),
+                      square.center().y() + square.height() * 0.45 * math.sin(step * 0.07))
+              for step in range(count + 1)]
+    return drag(app, picker.wheel, points)
+
+
+def scroll(app: QApplication, picker: PyColorPicker, count: int):
+    wheel = picker.wheel
+    pos = QPointF(wheel.rect().center())
+    for step in range(count):
+        # A lap down and a lap up, a notch of 120 is one degree of hue
+        delta = -120 if step % 720 < 360 else 120
+        event = QWheelEvent(pos, pos, QPoint(), QPoint(0, delta), Qt.NoButton, Qt.NoModifier,
+                            Qt.NoScrollPhase, False)
+        yield lambda event=event: app.sendEvent(wheel, event)
+
+
+def typing(group: str, format_color):
+    def scenario(app: QApplication, picker: PyColorPicker, count: int):
+        edit = getattr(picker, group).edit
+        rng = random.Random(0)
+        keys = 0
+        while keys < count:
+            edit.selectAll()
+            for char in format_color(*(rng.randrange(256) for _ in range(3)))[:count - keys]:
+                keys += 1
+                yield lambda char=char: QTest.keyClick(edit, char)
+    return scenario
+
+
+def sweep(slider: str):
+    def scenario(app: QApplication, picker: PyColorPicker, count: int):
+        control = getattr(picker, slider).slider
+        control.setValue(0)
+        for step in range(count):
+            # Up to 100 and back down, one step per key press
+            key = Qt.Key_Right if step // 100 % 2 == 0 else Qt.Key_Left
+            yield lambda key=key: QTest.keyClick(control, key)
+    return scenario
+
+
+def cmyk_text(red: int, green: int, blue: int) -> str:
+    key = 255 - max(red, green, blue)
+    if key == 255:
+        return "0, 0, 0, 100"
+    return ", ".join(str(round(100 * (255 - key - value) / (255 - key)))
+                     for value in (red, green, blue)) + f", {round(100 * key / 255)}"
+
+
+SCENARIOS = {
+    "ring drag": ring_drag,
+    "square drag": square_drag,
+    "scroll": scroll,
+    "hex typing": typing("hex_group", lambda *rgb: "#%02X%02X%02X" % rgb),
+    "rgb typing": typing("rgb_group", lambda *rgb: ", ".join(map(str, rgb))),
+    "cmyk typing": typing("cmyk_group", cmyk_text),
+    "saturation sweep": sweep("saturation"),
+    "lightness sweep": sweep("luminance"),
+}
+
+
+def idle(app: QApplication):
+    # Twice, events posted by the first round (the state's recompute timer and
+    # the repaints it causes) are handled by the second
+    app.processEvents()
+    app.processEvents()
+
+
+def run(app: QApplication, scenario, count: int) -> dict:
+    picker = PyColorPicker(None)
+    picker.show()
+    idle(app)
+    wheel = picker.wheel
+    wheel.frame_times = deque(maxlen=count)
+
+    times = []
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    for interaction in scenario(app, picker, count):
+        begin = time.perf_counter()
+        interaction()
+        idle(app)
+        times.append((time.perf_counter() - begin) * 1000)
+    elapsed = time.perf_counter() - start
+    # Picker state such as the paint times is sized by count, it is not a leak
+    paints = sorted(wheel.frame_times) or [0.0]
+    wheel.frame_times.clear()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    times.sort()
+    result = {
+        "events/s": len(times) / elapsed,
+        "p50 ms": statistics.median(times),
+        "p95 ms": times[int(len(times) * 0.95)],
+        "paint p50 ms": statistics.median(paints),
+        "paint p95 ms": paints[int(len(paints) * 0.95)],
+        "blocks/op": retained / len(times),
+    }
+    picker.deleteLater()
+    idle(app)
+    return result
+
+
+def allocations(app: QApplication, scenario, count: int) -> float:
+    """Mean peak KiB allocated by one interaction and the repaints it causes."""
+    picker = PyColorPicker(None)
+    picker.show()
+    idle(app)
+
+    peaks = []
+    tracemalloc.start()
+    for interaction in scenario(app, picker, count):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        interaction()
+        idle(app)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    picker.deleteLater()
+    idle(app)
+    return statistics.mean(peaks) / 1024
+
+
+def environment() -> dict:
+    return {
+        "machine": platform.node(),
+        "processor": platform.machine(),
+        "python": platform.python_version(),
+        "pyside": pyside_version,
+        "platform": os.environ["QT_QPA_PLATFORM"],
+    }
+
+
+def benchmark(app: QApplication, names: list, count: int, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        scenario = SCENARIOS[name]
+        # Caches, fonts and the square's renders are warm for every measured run
+        run(app, scenario, count)
+        runs = [run(app, scenario, count) for _ in range(repeat)]
+        # Like timeit the best run counts, slower ones were disturbed by something else
+        result = {metric: (max if higher_is_better else min)(run_[metric] for run_ in runs)
+                  for metric, higher_is_better, _ in METRICS if metric in runs[0]}
+        result["KiB/op"] = allocations(app, scenario, max(1, count // 4))
+        results[name] = result
+        print_result(name, result)
+    return results
+
+
+def print_header():
+    print(f"{'scenario':<18}" + "".join(f"{metric:>14}" for metric, _, _ in METRICS))
+
+
+def print_result(name: str, result: dict):
+    print(f"{name:<18}" + "".join(f"{result[metric]:>14.2f}" for metric, _, _ in METRICS))
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print the change of every metric, return the regressions as (scenario, metric)."""
+    regressions = []
+    print(f"\nchange against the baseline, tolerance {tolerance:.0%}")
+    print_header()
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<18}{'not in the baseline':>14}")
+            continue
+        cells = []
+        for metric, higher_is_better, noise in METRICS:
+            old, new = baseline[name][metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            worse = old - new if higher_is_better else new - old
+            regressed = worse > noise and worse > abs(old) * tolerance
+            if regressed:
+                regressions.append((name, metric))
+            cells.append(f"{change:>+12.0%}{' !' if regressed else '  '}")
+        print(f"{name:<18}" + "".join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--interactions", type=int, default=400, help="per scenario run")
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per scenario")
+    parser.add_argument("--scenario", action="append", choices=tuple(SCENARIOS),
+                        help="run only this scenario, can be repeated")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail on regressions against it")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative change that counts as a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    # Every input is applied and painted, so the numbers are per interaction
+    InputCoalescer.enabled = False
+
+    app = QApplication([])
+    print(f"{args.interactions} interactions, {args.repeat} runs, "
+          f"platform {os.environ['QT_QPA_PLATFORM']}")
+    print_header()
+    results = benchmark(app, args.scenario or list(SCENARIOS), args.interactions, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"environment": environment(), "interactions": args.interactions,
+                       "scenarios": results}, file, indent=2)
+            file.write("\n")
+        print(f"\nbaseline saved to {args.save}")
+
+    if baseline is not None:
+        if baseline["environment"] != environment():
+            print(f"\nwarning: the baseline comes from {baseline['environment']}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline["scenarios"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: " +
+                  ", ".join(f"{name} {metric}" for name, metric in regressions))
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Text forms of a colour and the clipboard payloads built from them.
+
+Every colour is formatted once, the picker fields and the clipboard share the same
+strings. copy_colors() puts one QMimeData with several types on the clipboard:
+
+    text/plain              HEX codes, one per line
+    text/css                custom properties, --color-1: #RRGGBB; overridden with
+                            color(display-p3 ...) on wide gamut screens
+    application/json        {"hex", "rgb", "cmyk", "srgb", "display-p3",
+                            "linear-srgb"} per colour, the last three unrounded floats
+    application/x-color     the first colour, Qt's own colour type
+"""
+
+import json
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+from PySide6.QtCore import QMimeData
+from PySide6.QtGui import QColor, QGuiApplication
+
+import colorspace
+import float_color
+
+
+class ColorText(NamedTuple):
+    rgb: tuple
+    cmyk: tuple
+    # sRGB in 0 - 1 before rounding to 8 bit
+    rgbf: tuple
+    hex: str
+    rgb_text: str
+    cmyk_text: str
+    css: str
+
+
+@lru_cache(maxsize=1024)
+def format_color(rgb: tuple, cmyk: tuple, rgbf: tuple = None) -> ColorText:
+    return ColorText(
+        rgb, cmyk, rgbf or tuple(value / 255 for value in rgb),
+        "#{:02X}{:02X}{:02X}".format(*rgb),
+        ", ".join(map(str, rgb)),
+        ", ".join(map(str, cmyk)),
+        "rgb({}, {}, {})".format(*rgb),
+    )
+
+
+def format_colors(rgbs) -> list:
+    """ColorText of many colours, the CMYK values are converted in one go."""
+    rgbs = np.asarray(rgbs, dtype=np.int32).reshape(-1, 3)
+    cmyks = colorspace.rgb_to_cmyk(rgbs)
+    return [format_color(tuple(rgb), tuple(cmyk))
+            for rgb, cmyk in zip(rgbs.tolist(), cmyks.tolist())]
+
+
+def mime_data(texts: list) -> QMimeData:
+    data = QMimeData()
+    if not texts:
+        return data
+
+    data.setText("\n".join(text.hex for text in texts))
+
+    # Every space converted for all colours at once
+    srgb = np.array([text.rgbf for text in texts], dtype=np.float64)
+    spaces = {"srgb": srgb.tolist()}
+    for space in ("display-p3", "linear-srgb"):
+        spaces[space] = float_color.convert(srgb, "srgb", space).tolist()
+
+    css = "".join(f"  --color-{index}: {text.hex};\n" for index, text in enumerate(texts, 1))
+    css_p3 = "".join(
+        "    --color-{}: color(display-p3 {:.6g} {:.6g} {:.6g});\n".format(index, *p3)
+        for index, p3 in enumerate(spaces["display-p3"], 1))
+    css = f":root {{\n{css}}}\n@media (color-gamut: p3) {{\n  :root {{\n{css_p3}  }}\n}}\n"
+    data.setData("text/css", css.encode())
+
+    objects = [{"hex": text.hex, "rgb": list(text.rgb), "cmyk": list(text.cmyk),
+                **{space: values[index] for space, values in spaces.items()}}
+               for index, text in enumerate(texts)]
+    data.setData("application/json",
+                 json.dumps(objects[0] if len(objects) == 1 else objects).encode())
+
+    data.setColorData(QColor(*texts[0].rgb))
+    return data
+
+
+def copy_text(text: str):
+    QGuiApplication.clipboard().setText(text)
+
+
+def copy_colors(texts: list):
+    # A single clipboard change, however many colours and types there are
+    QGuiApplication.clipboard().setMimeData(mime_data(texts))
@@ -1,40 +1,93 @@
-import math
-import re
+import time
+from collections import deque
 
-from PySide6.QtCore import Qt, QPoint, Signal, QSize, QRect
+from PySide6.QtCore import Qt, QPoint, Signal, QSize, QRect, QRectF
 from PySide6.QtGui import QPaintEvent, QPainter, QPen, QColor, QBrush, QConicalGradient, \
-    QMouseEvent, QClipboard, QIcon, QResizeEvent, QCursor, QWheelEvent, QKeyEvent, \
-    QFont, QImage
+    QMouseEvent, QResizeEvent, QCursor, QWheelEvent, QKeyEvent, \
+    QFont, QImage, QPixmap, QRegion, QFontMetrics, QPalette, QFocusEvent, QAction, QKeySequence
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QFrame, QLabel, QHBoxLayout, QLineEdit, \
-    QPushButton, QGraphicsDropShadowEffect
-
+    QPushButton, QGraphicsDropShadowEffect, QToolTip
+
+import clipboard
+import hsl_square
+import named_colors
+import parsers
+import pixmap_cache
+import profiler
+from color_state import ColorState
+from contrast_bar import PyContrastBar
+from input_coalescer import InputCoalescer
+from ring_geometry import RingGeometry
 from slider import PyIconSlider
 
 
 class PyColorPicker(QFrame):
-    def __init__(self, parent: QWidget):
+    """
+    With lightweight=True the picker starts as a small swatch that only holds its
+    ColorState. The editors are built the first time it gets focus, which keeps
+    grids of hundreds of pickers cheap, and collapse() or Escape shrinks it back.
+    """
+
+    FULL_SIZE = QSize(400, 640)
+    COMPACT_SIZE = QSize(120, 40)
+
+    # Shared by every picker instead of parsing a style sheet per instance
+    background_palette = None
+
+    # A colour the user copied, with the format it was copied as
+    color_committed = Signal(QColor, str)
+
+    def __init__(self, parent: QWidget, lightweight: bool = False):
         super().__init__(parent)
 
         self.setObjectName("py_color_picker")
-        self.setStyleSheet("QFrame#py_color_picker{background: #292929}")
-
-        self.setFixedSize(400, 600)
+        if PyColorPicker.background_palette is None:
+            PyColorPicker.background_palette = QPalette(self.palette())
+            PyColorPicker.background_palette.setColor(QPalette.Window, QColor("#292929"))
+            PyColorPicker.background_palette.setColor(QPalette.WindowText, QColor("#FFF"))
+        self.setPalette(self.background_palette)
+        self.setAutoFillBackground(True)
 
         self.color = QColor(255, 0, 0)
 
+        self.state = ColorState(self)
+        self.state.changed.connect(self.sync_views)
+
+        self.lightweight = lightweight
+        self.editors = []
+
+        self.copy_all_action = QAction("Copy all formats", self)
+        self.copy_all_action.setShortcut(QKeySequence("Ctrl+Shift+C"))
+        self.copy_all_action.setShortcutContext(Qt.WidgetWithChildrenShortcut)
+        self.copy_all_action.triggered.connect(self.copy_all)
+        self.addAction(self.copy_all_action)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+        if lightweight:
+            self.setFixedSize(self.COMPACT_SIZE)
+            self.setFocusPolicy(Qt.StrongFocus)
+            self.setCursor(QCursor(Qt.PointingHandCursor))
+        else:
+            self.build_editors()
+
+    def build_editors(self):
+        self.setFixedSize(self.FULL_SIZE)
+
         self.hex_group = DisplayGroup("HEX", self)
-        self.hex_group.edit.setText("#FF0000")
+        self.hex_group.set_text("#FF0000")
+        self.hex_group.edit.editingFinished.connect(self.finish_hex)
 
         self.rgb_group = DisplayGroup("RGB", self)
-        self.rgb_group.edit.setText("255, 0, 0")
+        self.rgb_group.set_text("255, 0, 0")
 
         self.cmyk_group = DisplayGroup("CMYK", self)
-        self.cmyk_group.edit.setText("0, 100, 100, 0")
+        self.cmyk_group.set_text("0, 100, 100, 0")
 
         self.wheel = PyColorWheel(self)
-        self.wheel.angle_changed.connect(self.set_color)
+        self.wheel.angle_changed.connect(self.set_hue)
+        self.wheel.square_changed.connect(self.set_saturation_lightness)
 
-        self.saturation = PyIconSlider(self, QIcon("icons/droplet.svg"), Qt.Horizontal)
+        self.saturation = PyIconSlider(self, "icons/droplet.svg", Qt.Horizontal)
         self.saturation.slider.setRange(0, 100)
         self.saturation.slider.setValue(100)
         self.saturation.slider.valueChanged.connect(self.set_color)
@@ -42,7 +95,7 @@ class PyColorPicker(QFrame):
         self.saturation.value_edit.setValue(100)
         self.saturation.icon_label.setToolTip("Saturation")
 
-        self.luminance = PyIconSlider(self, QIcon("icons/sun.svg"), Qt.Horizontal)
+        self.luminance = PyIconSlider(self, "icons/sun.svg", Qt.Horizontal)
         self.luminance.slider.setRange(0, 100)
         self.luminance.slider.setValue(50)
 
@@ -50,6 +103,9 @@ class PyColorPicker(QFrame):
         self.luminance.value_edit.setValue(50)
         self.luminance.icon_label.setToolTip("Luminance")
 
+        self.contrast = PyContrastBar(self)
+        self.contrast.suggestion_clicked.connect(self.set_saturation_lightness)
+
         self.layout_ = QVBoxLayout(self)
         self.layout_.setContentsMargins(0, 0, 0, 0)
         self.layout_.setSpacing(0)
@@ -61,164 +117,211 @@ class PyColorPicker(QFrame):
         self.layout_.addWidget(self.wheel)
         self.layout_.addWidget(self.saturation)
         self.layout_.addWidget(self.luminance)
+        self.layout_.addWidget(self.contrast)
 
-    def set_color_by_hex(self):
-        if not re.search(r'^#(?:[0-9a-fA-F]{3}){1,2}$', self.hex_group.edit.text()):
-            return
-        else:
-            self.color = QColor(self.hex_group.edit.text())
-
-            self.saturation.slider.blockSignals(True)
-            self.luminance.slider.blockSignals(True)
-            self.wheel.blockSignals(True)
-
-            self.saturation.slider.setValue(int(self.color.hslSaturation() / 255 * 100))
-            self.saturation.value_edit.setValue(int(self.color.hslSaturation() / 255 * 100))
-
-            self.luminance.slider.setValue(int(self.color.lightness() / 255 * 100))
-            self.luminance.value_edit.setValue(int(self.color.lightness() / 255 * 100))
-
-            self.wheel.set_angle()
-
-            self.saturation.slider.blockSignals(False)
-            self.luminance.slider.blockSignals(False)
-            self.wheel.blockSignals(False)
+        self.editors = [self.hex_group, self.rgb_group, self.cmyk_group,
+                        self.wheel, self.saturation, self.luminance, self.contrast]
 
-            self.cmyk_group.edit.setText(
-                f"{round(self.color.cyanF() * 100)},"
-                f" {round(self.color.magentaF() * 100)},"
-                f" {round(self.color.yellowF() * 100)},"
-                f" {round(self.color.blackF() * 100)}"
-            )
-
-            self.rgb_group.edit.setText(
-                f"{self.color.red()}, {self.color.green()}, {self.color.blue()}"
-            )
-
-            self.update()
-
-    def set_color_by_rgb(self):
-        if not re.search(r"\d{1,3},\s*\d{1,3},\s*\d{1,3}", self.rgb_group.edit.text()):
-            return
+    def expand(self):
+        if not self.editors:
+            self.build_editors()
+            # The state may have changed while only the swatch existed
+            self.sync_views(ColorState.EXTERNAL)
         else:
+            self.setFixedSize(self.FULL_SIZE)
 
-            if self.rgb_group.edit.text().count(",") > 2:
-                return
-
-            r, g, b = self.rgb_group.edit.text().strip().split(",")
-            self.color = QColor(int(r), int(g), int(b))
+        for editor in self.editors:
+            editor.show()
 
-            self.saturation.slider.blockSignals(True)
-            self.luminance.slider.blockSignals(True)
-            self.wheel.blockSignals(True)
-
-            self.saturation.slider.setValue(self.color.hslSaturation() / 255 * 100)
-            self.saturation.value_edit.setValue(int(self.color.hslSaturation() / 255 * 100))
-
-            self.luminance.slider.setValue(int(self.color.lightness() / 255 * 100))
-            self.luminance.value_edit.setValue(int(self.color.lightness() / 255 * 100))
-
-            self.wheel.set_angle()
-
-            self.saturation.slider.blockSignals(False)
-            self.luminance.slider.blockSignals(False)
-            self.wheel.blockSignals(False)
-
-            self.hex_group.edit.setText(self.color.name(QColor.HexRgb).upper())
-            self.cmyk_group.edit.setText(
-                f"{round(self.color.cyanF() * 100)},"
-                f" {round(self.color.magentaF() * 100)},"
-                f" {round(self.color.yellowF() * 100)},"
-                f" {round(self.color.blackF() * 100)}"
-            )
-
-            self.update()
-
-    def set_color_by_cmyk(self):
-        if not re.search(r"\d{1,3},\s*\d{1,3},\s*\d{1,3},\s*\d{1,3}", self.cmyk_group.edit.text()):
+    def collapse(self):
+        if not self.lightweight:
             return
-        else:
-
-            if self.cmyk_group.edit.text().count(",") > 3:
-                return
 
-            c, m, y, k = self.cmyk_group.edit.text().strip().split(",")
-            self.color = QColor.fromCmyk(int(c), int(m), int(y), int(k))
+        for editor in self.editors:
+            editor.hide()
+        self.setFixedSize(self.COMPACT_SIZE)
+        self.update()
 
-            self.saturation.slider.blockSignals(True)
-            self.luminance.slider.blockSignals(True)
-            self.wheel.blockSignals(True)
+    def is_expanded(self) -> bool:
+        return bool(self.editors) and self.editors[0].isVisibleTo(self)
 
-            self.saturation.slider.setValue(int(self.color.hslSaturation() / 255 * 100))
-            self.saturation.value_edit.setValue(int(self.color.hslSaturation() / 255 * 100))
+    def focusInEvent(self, event: QFocusEvent) -> None:
+        if self.lightweight and not self.is_expanded():
+            self.expand()
+        super().focusInEvent(event)
 
-            self.luminance.slider.setValue(int(self.color.lightness() / 255 * 100))
-            self.luminance.value_edit.setValue(int(self.color.lightness() / 255 * 100))
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        if self.lightweight and event.key() == Qt.Key_Escape:
+            self.collapse()
+        else:
+            super().keyPressEvent(event)
 
-            self.wheel.set_angle()
+    def paintEvent(self, event: QPaintEvent) -> None:
+        if self.is_expanded():
+            super().paintEvent(event)
+            return
 
-            self.saturation.slider.blockSignals(False)
-            self.luminance.slider.blockSignals(False)
-            self.wheel.blockSignals(False)
+        # Compact swatch: the colour and its hex code
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        swatch = QRect(4, 4, self.height() - 8, self.height() - 8)
+        painter.setPen(QPen(QColor("#8A8A8A"), 1))
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(swatch, 4, 4)
+        painter.setPen(QColor("#FFF") if not self.hasFocus() else QColor("#6495ED"))
+        painter.drawText(self.rect().adjusted(swatch.right() + 8, 0, 0, 0),
+                         Qt.AlignLeft | Qt.AlignVCenter, self.state.text.hex)
+
+    @profiler.timed("picker set_color_by_hex", "input")
+    def set_color_by_hex(self):
+        # The picker has no alpha, so #RGBA and #RRGGBBAA are refused. That also keeps
+        # "#FF00", on the way to "#FF0000", from applying as yellow.
+        result = parsers.parse_hex(self.hex_group.edit.text(), alpha=False)
+        if isinstance(result, parsers.ParsedColor):
+            self.state.set_hex(result.values)
+
+    @profiler.timed("picker finish_hex", "input")
+    def finish_hex(self):
+        result = parsers.parse_hex(self.hex_group.edit.text(), alpha=False)
+        if isinstance(result, parsers.ParsedColor):
+            self.state.set_hex(result.values)
+        else:
+            self.hex_group.show_error(result)
 
-            self.hex_group.edit.setText(self.color.name(QColor.HexRgb).upper())
-            self.rgb_group.edit.setText(
-                f"{self.color.red()}, {self.color.green()}, {self.color.blue()}"
-            )
+    @profiler.timed("picker set_color_by_rgb", "input")
+    def set_color_by_rgb(self):
+        result = parsers.parse_rgb(self.rgb_group.edit.text())
+        if isinstance(result, parsers.ParsedColor):
+            self.state.set_rgb(result.values)
 
-            self.update()
+    @profiler.timed("picker set_color_by_cmyk", "input")
+    def set_color_by_cmyk(self):
+        # The field shows percentages, so it is read back as percentages as well
+        result = parsers.parse_cmyk(self.cmyk_group.edit.text())
+        if isinstance(result, parsers.ParsedColor):
+            self.state.set_cmyk(result.values)
 
+    @profiler.timed("picker set_color", "input")
     def set_color(self):
-        self.saturation.value_edit.setValue(self.saturation.slider.value())
-        self.luminance.value_edit.setValue(self.luminance.slider.value())
-
-        self.color = QColor.fromHsl(
-            (360 - self.wheel.angle) % 360,
-            round(self.saturation.slider.value() / 100 * 255),
-            round(self.luminance.slider.value() / 100 * 255),
-            a=255
-        )
-
-        self.hex_group.edit.blockSignals(True)
-        self.rgb_group.edit.blockSignals(True)
-        self.cmyk_group.edit.blockSignals(True)
-
-        self.hex_group.edit.setText(self.color.name(QColor.HexRgb).upper())
-        self.rgb_group.edit.setText(
-            f"{self.color.red()},"
-            f" {self.color.green()},"
-            f" {self.color.blue()}")
-
-        self.cmyk_group.edit.setText(
-            f"{round(self.color.cyanF() * 100)},"
-            f" {round(self.color.magentaF() * 100)},"
-            f" {round(self.color.yellowF() * 100)},"
-            f" {round(self.color.blackF() * 100)}"
+        # The wheel keeps saturation and lightness for set_hue, even before the
+        # state has recomputed
+        self.wheel.set_saturation_lightness(self.saturation.slider.value(),
+                                            self.luminance.slider.value())
+        self.state.set_hsl(
+            self.wheel.hue(),
+            self.saturation.slider.value(),
+            self.luminance.slider.value()
         )
 
-        self.hex_group.edit.blockSignals(False)
-        self.rgb_group.edit.blockSignals(False)
-        self.cmyk_group.edit.blockSignals(False)
+    @profiler.timed("picker set_saturation_lightness", "input")
+    def set_saturation_lightness(self, saturation: float, lightness: float):
+        # The sliders show the rounded percentages, the state keeps the fractions
+        for control, value in ((self.saturation, saturation), (self.luminance, lightness)):
+            control.slider.blockSignals(True)
+            control.value_edit.blockSignals(True)
+            control.slider.setValue(round(value))
+            control.value_edit.setValue(round(value))
+            control.slider.blockSignals(False)
+            control.value_edit.blockSignals(False)
+        self.state.set_hsl(self.wheel.hue(), saturation, lightness)
+
+    @profiler.timed("picker set_hue", "input")
+    def set_hue(self):
+        # Keeps fractional saturation and lightness picked in the square
+        self.state.set_hsl(self.wheel.hue(), self.wheel.saturation, self.wheel.lightness)
+
+    @profiler.timed("picker set_picked_color", "input")
+    def set_picked_color(self, color: QColor):
+        self.state.set_external((color.red(), color.green(), color.blue()))
+
+    @profiler.timed("picker sync_views")
+    def sync_views(self, source: str):
+        # Every view except the one that caused the change is refreshed exactly once,
+        # with its signals blocked so nothing feeds back into the state.
+        state = self.state
+        self.color = QColor.fromRgba64(*state.rgb16.tolist())
+
+        if not self.editors:
+            self.update()
+            return
 
-        self.update()
+        views = {
+            ColorState.HEX: (self.hex_group, state.text.hex),
+            ColorState.RGB: (self.rgb_group, state.text.rgb_text),
+            ColorState.CMYK: (self.cmyk_group, state.text.cmyk_text),
+        }
+        for view_source, (group, text) in views.items():
+            if view_source != source:
+                group.set_text(text)
+
+        for control, value in ((self.saturation, state.saturation),
+                               (self.luminance, state.lightness)):
+            control.slider.blockSignals(True)
+            control.value_edit.blockSignals(True)
+            control.slider.setValue(round(value))
+            control.value_edit.setValue(round(value))
+            control.slider.blockSignals(False)
+            control.value_edit.blockSignals(False)
+
+        self.wheel.set_color_name(named_colors.default_index().nearest(state.rgb))
+        self.wheel.set_saturation_lightness(state.saturation, state.lightness)
+        self.contrast.set_color(state.rgbf, state.hue, state.saturation, state.lightness)
+
+        if source == ColorState.HSL:
+            self.wheel.update_preview()
+        else:
+            self.wheel.set_angle(state.hue)
 
     def get_hex(self):
-        QClipboard().setText(str(self.color.name(QColor.HexRgb).upper()))
+        self.state.flush()
+        clipboard.copy_text(self.state.text.hex)
+        self.color_committed.emit(self.color, "hex")
 
     def get_rgb(self):
-        QClipboard().setText(f"{self.color.red()}, {self.color.green()}, {self.color.blue()}")
+        self.state.flush()
+        clipboard.copy_text(self.state.text.rgb_text)
+        self.color_committed.emit(self.color, "rgb")
 
     def get_cmyk(self):
-        QClipboard().setText(
-            f"{int(self.color.cyanF() * 100)},"
-            f" {int(self.color.magentaF() * 100)},"
-            f" {int(self.color.yellowF() * 100)},"
-            f" {int(self.color.blackF() * 100)}"
-        )
+        # The same rounded percentages as the CMYK field
+        self.state.flush()
+        clipboard.copy_text(self.state.text.cmyk_text)
+        self.color_committed.emit(self.color, "cmyk")
+
+    def copy_all(self):
+        self.state.flush()
+        clipboard.copy_colors([self.state.text])
+        self.color_committed.emit(self.color, "all")
+
+
+def hue_gradient() -> QConicalGradient:
+    gradient = QConicalGradient()
+    gradient.setAngle(90)
+    gradient.setColorAt(0, QColor(255, 0, 0, 255))
+    gradient.setColorAt(1.0 / 6, QColor(255, 0, 255, 255))
+    gradient.setColorAt(2.0 / 6, QColor(0, 0, 255, 255))
+    gradient.setColorAt(3.0 / 6, QColor(0, 255, 255, 255))
+    gradient.setColorAt(4.0 / 6, QColor(0, 255, 0, 255))
+    gradient.setColorAt(5.0 / 6, QColor(255, 255, 0, 255))
+    gradient.setColorAt(1, QColor(255, 0, 0, 255))
+    return gradient
 
 
 class PyColorWheel(QWidget):
+    """
+    Hue ring around a saturation/lightness square. The square of the current hue
+    comes from hsl_square, its marker shows the picked colour.
+    """
+
     angle_changed = Signal()
+    # Saturation and lightness in percent, picked in the square, fractional
+    square_changed = Signal(float, float)
+
+    # One gradient and one rendered ring per geometry for all wheels, a grid of
+    # pickers of the same size shares a single pixmap.
+    gradient = hue_gradient()
+    ring_caches = {}
+    ring_geometries = {}
 
     def __init__(self, parent: QWidget, arc_width: int = 50, margin: int = 10):
         super().__init__(parent)
@@ -228,44 +331,58 @@ class PyColorWheel(QWidget):
         self.ctrl_pressed = False
 
         self.angle = 0
+        self.saturation = 100
+        self.lightness = 50
         self.arc_width = arc_width
         self.margin = margin
 
         self.size = self.width() // 2
 
         self.radius = self.size - self.margin - self.arc_width // 2
-        self.indicator_pos = self.indicator_pos = QPoint(
-            int(self.size + self.radius * math.sin(math.radians(self.angle + 180))),
-            int(self.size + self.radius * math.cos(math.radians(self.angle + 180))),
-        )
+        self.ring = self.ring_geometry()
+        self.indicator_pos = self.ring.point(self.angle)
+
+        self.ring_cache = None
+        self.ring_cache_key = None
+
+        # "ring" or "square" while the left button is held
+        self.dragging = None
+        # Mouse moves and scrolling are applied once per frame
+        self.input = InputCoalescer(self, self.apply_input)
+
+        self.label_font = QFont("Times New Roman", 12)
+        self.name_font = QFont("Times New Roman", 10)
+        self.color_name = ""
+
+        # Pixels covered by the region of the last paint event and over the widget's
+        # lifetime, to measure what the partial repaints save.
+        self.repainted_pixels = 0
+        self.repainted_pixels_total = 0
+        self.paint_events = 0
+        # Milliseconds spent in the last paint events
+        self.frame_times = deque(maxlen=240)
+
+    def ring_cache_key_for_current_state(self):
+        return self.width(), self.height(), self.arc_width, self.margin, self.devicePixelRatioF()
+
+    def render_ring_cache(self):
+        # The background and the hue ring never change while the indicator moves,
+        # so they are rendered once per geometry and blitted on every repaint.
+        self.ring_cache_key = self.ring_cache_key_for_current_state()
+        self.ring_cache = self.ring_caches.get(self.ring_cache_key)
+        if self.ring_cache is not None:
+            return
 
-        self.gradient = QConicalGradient()
-        self.gradient.setAngle(90)
-        self.gradient.setColorAt(0, QColor(255, 0, 0, 255))
-        self.gradient.setColorAt(1.0 / 6, QColor(255, 0, 255, 255))
-        self.gradient.setColorAt(2.0 / 6, QColor(0, 0, 255, 255))
-        self.gradient.setColorAt(3.0 / 6, QColor(0, 255, 255, 255))
-        self.gradient.setColorAt(4.0 / 6, QColor(0, 255, 0, 255))
-        self.gradient.setColorAt(5.0 / 6, QColor(255, 255, 0, 255))
-        self.gradient.setColorAt(1, QColor(255, 0, 0, 255))
+        dpr = self.devicePixelRatioF()
 
-    def resizeEvent(self, event: QResizeEvent) -> None:
-        self.size = self.width() // 2
+        self.ring_cache = QPixmap(round(self.width() * dpr), round(self.height() * dpr))
+        self.ring_cache.setDevicePixelRatio(dpr)
+        self.ring_cache.fill(QColor("#292929"))
 
-        self.radius = self.size - self.margin - self.arc_width // 2
         self.gradient.setCenter(self.rect().center())
 
-        self.indicator_pos = self.indicator_pos = QPoint(
-            int(self.size + self.radius * math.sin(math.radians(self.angle + 180))),
-            int(self.size + self.radius * math.cos(math.radians(self.angle + 180))),
-        )
-
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter(self)
+        painter = QPainter(self.ring_cache)
         painter.setRenderHint(QPainter.Antialiasing)
-
-        painter.fillRect(self.rect(), QColor("#292929"))
-
         painter.setPen(QPen(QBrush(self.gradient), self.arc_width))
         painter.drawArc(self.margin + self.arc_width // 2,
                         self.margin + self.arc_width // 2,
@@ -273,42 +390,219 @@ class PyColorWheel(QWidget):
                         self.radius * 2,
                         0 * 16,
                         360 * 16)
+        painter.end()
+
+        self.ring_caches[self.ring_cache_key] = self.ring_cache
+
+    def ring_geometry(self) -> RingGeometry:
+        key = self.size, self.radius
+        geometry = self.ring_geometries.get(key)
+        if geometry is None:
+            geometry = self.ring_geometries[key] = RingGeometry(*key)
+        return geometry
+
+    def hue(self) -> float:
+        return (360 - self.angle) % 360
+
+    def indicator_rect(self) -> QRect:
+        # Indicator radius plus half the 3px pen and a pixel for anti-aliasing
+        extent = self.arc_width // 2 + 2
+        return QRectF(self.indicator_pos.x() - extent, self.indicator_pos.y() - extent,
+                      2 * extent + 1, 2 * extent + 1).toAlignedRect()
+
+    def inner_radius(self) -> int:
+        return self.radius - self.arc_width // 2
+
+    def square_rect(self) -> QRect:
+        # Leaves room for the hue label above and the colour name below the square
+        half = int(self.inner_radius() * 0.62)
+        return QRect(self.size - half, self.size - half, 2 * half, 2 * half)
+
+    def marker_pos(self) -> QPoint:
+        square = self.square_rect()
+        return QPoint(square.left() + round(self.saturation / 100 * (square.width() - 1)),
+                      square.top() + round((100 - self.lightness) / 100 * (square.height() - 1)))
+
+    def preview_rect(self) -> QRect:
+        # The marker in the square is filled with the picked colour
+        extent = 10
+        marker = self.marker_pos()
+        return QRect(marker.x() - extent, marker.y() - extent, 2 * extent + 1, 2 * extent + 1)
+
+    def label_rect(self) -> QRect:
+        # Between the hue ring and the top of the square
+        height = QFontMetrics(self.label_font).height() + 4
+        middle = (self.size - self.inner_radius() + self.square_rect().top()) // 2
+        return QRect(self.size - self.size // 4, middle - height // 2, self.size // 2, height)
+
+    def name_rect(self) -> QRect:
+        # Between the bottom of the square and the hue ring
+        height = QFontMetrics(self.name_font).height() + 4
+        middle = (self.square_rect().bottom() + self.size + self.inner_radius()) // 2
+        return QRect(self.size - self.size // 2, middle - height // 2, self.size, height)
+
+    def set_saturation_lightness(self, saturation: float, lightness: float):
+        if (saturation, lightness) == (self.saturation, self.lightness):
+            return
+        old_preview_rect = self.preview_rect()
+        self.saturation = saturation
+        self.lightness = lightness
+        self.update(QRegion(old_preview_rect) + QRegion(self.preview_rect()))
+
+    def set_color_name(self, named_color):
+        # Colours further than a just noticeable difference are marked as approximate
+        if named_color is None:
+            name = ""
+        elif named_color.distance < 2.3:
+            name = named_color.name
+        else:
+            name = f"~ {named_color.name}"
 
-        painter.setPen(QPen(QColor("#FFF"), 3.0))
-        painter.drawEllipse(self.indicator_pos, self.arc_width // 2 - 1, self.arc_width // 2 - 1)
+        if name != self.color_name:
+            self.color_name = name
+            self.update(self.name_rect())
 
-        painter.setPen(QPen(self.parent().color, self.arc_width * 0.6))
-        painter.drawArc(
-            self.size - self.arc_width,
-            self.size - self.arc_width,
-            self.size // 2, self.size // 2,
-            0 * 16, 360 * 16
+    def update_preview(self):
+        self.update(QRegion(self.preview_rect()) + QRegion(self.label_rect()))
+
+    def update_indicator(self, old_indicator_rect: QRect):
+        self.update(
+            QRegion(old_indicator_rect)
+            + QRegion(self.indicator_rect())
+            + QRegion(self.square_rect())
+            + QRegion(self.label_rect())
         )
 
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        self.size = self.width() // 2
 
+        self.radius = self.size - self.margin - self.arc_width // 2
 
-        painter.setPen(QPen(QColor("#FFF"), 3.0))
-        painter.setFont(QFont("Times New Roman", 12))
-        painter.drawText(self.rect(), Qt.AlignHCenter | Qt.AlignVCenter,
-                         f"{(360 - self.angle) % 360}")
+        self.render_ring_cache()
 
-    def mouseMoveEvent(self, event: QMouseEvent) -> None:
-        if event.buttons() == Qt.LeftButton:
-            radians = math.atan2(event.pos().y() - self.size, event.pos().x() - self.size)
-            degrees = -(math.degrees(radians) + 90) % 360
+        self.ring = self.ring_geometry()
+        self.indicator_pos = self.ring.point(self.angle)
 
-            self.indicator_pos = QPoint(
-                int(self.size + self.radius * math.sin(math.radians(degrees + 180))),
-                int(self.size + self.radius * math.cos(math.radians(degrees + 180))),
-            )
+    @profiler.timed("wheel paint", "paint")
+    def paintEvent(self, event: QPaintEvent) -> None:
+        # The device pixel ratio changes without a resize when the window moves
+        # to another screen.
+        if self.ring_cache_key != self.ring_cache_key_for_current_state():
+            self.render_ring_cache()
 
-            self.angle = int(degrees)
-            self.angle_changed.emit()
+        start = time.perf_counter()
+        painter = QPainter(self)
 
-            self.update()
+        region = event.region()
+        self.repainted_pixels = sum(rect.width() * rect.height() for rect in region)
+        self.repainted_pixels_total += self.repainted_pixels
+        self.paint_events += 1
 
+        dpr = self.ring_cache.devicePixelRatio()
+        for rect in region:
+            painter.drawPixmap(QRectF(rect), self.ring_cache, QRectF(
+                rect.x() * dpr, rect.y() * dpr, rect.width() * dpr, rect.height() * dpr))
+
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        if region.intersects(self.indicator_rect()):
+            painter.setPen(QPen(QColor("#FFF"), 3.0))
+            painter.drawEllipse(self.indicator_pos,
+                                self.arc_width // 2 - 1, self.arc_width // 2 - 1)
+
+        square = self.square_rect()
+        if region.intersects(square):
+            dpr = self.devicePixelRatioF()
+            # Squares a fraction of a degree apart look the same, one per integer hue
+            image = hsl_square.image(round(self.hue()) % 360, round(square.width() * dpr))
+            painter.drawImage(QRectF(square), image)
+
+        if region.intersects(self.preview_rect()):
+            painter.setPen(QPen(QColor("#FFF"), 2.0))
+            painter.setBrush(self.parent().color)
+            painter.drawEllipse(self.marker_pos(), 7, 7)
+
+        if region.intersects(self.label_rect()):
+            painter.setPen(QPen(QColor("#FFF"), 3.0))
+            painter.setFont(self.label_font)
+            painter.drawText(self.label_rect(), Qt.AlignCenter,
+                             f"{round(self.hue()) % 360}")
+
+        if region.intersects(self.name_rect()):
+            painter.setPen(QPen(QColor("#8A8A8A")))
+            painter.setFont(self.name_font)
+            painter.drawText(self.name_rect(), Qt.AlignCenter, self.color_name)
+
+        painter.end()
+        self.frame_times.append((time.perf_counter() - start) * 1000)
+
+    def pick_in_square(self, pos: QPoint):
+        square = self.square_rect()
+        x = min(max(pos.x() - square.left(), 0), square.width() - 1)
+        y = min(max(pos.y() - square.top(), 0), square.height() - 1)
+        saturation = x / (square.width() - 1) * 100
+        lightness = 100 - y / (square.height() - 1) * 100
+
+        self.set_saturation_lightness(saturation, lightness)
+        self.square_changed.emit(saturation, lightness)
+
+    def move_indicator(self, angle: float):
+        old_indicator_rect = self.indicator_rect()
+        self.angle = angle
+        self.indicator_pos = self.ring.point(angle)
+        self.update_indicator(old_indicator_rect)
+
+    def drag_ring(self, pos: QPoint):
+        # Hundredths of a degree, the resolution QColor keeps
+        self.move_indicator(round(RingGeometry.angle_at(self.size, pos.x(), pos.y()), 2) % 360)
+        self.angle_changed.emit()
+
+    def scroll(self, steps: int):
+        self.move_indicator((self.angle + steps) % 360)
+        self.angle_changed.emit()
+
+    @profiler.timed("wheel apply_input")
+    def apply_input(self, state: tuple):
+        kind, value = state
+        if kind == "scroll":
+            self.scroll(value)
+        elif kind == "square":
+            self.pick_in_square(value)
+        else:
+            self.drag_ring(value)
+
+        # Brings the picker up to date in the same frame, so it is painted once
+        self.parent().state.flush()
+
+    @staticmethod
+    def merge_input(pending: tuple, state: tuple) -> tuple:
+        # Scroll steps add up, a pointer position replaces whatever was pending
+        if pending[0] == state[0] == "scroll":
+            return "scroll", pending[1] + state[1]
+        return state
+
+    @profiler.timed("wheel mouseMoveEvent", "input")
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        if event.buttons() == Qt.LeftButton:
+            self.input.push(("square" if self.dragging == "square" else "ring", event.pos()))
+
+    @profiler.timed("wheel mousePressEvent", "input")
     def mousePressEvent(self, event: QMouseEvent) -> None:
         self.setFocus()
+        if event.button() != Qt.LeftButton:
+            return
+
+        self.input.flush()
+        if self.square_rect().contains(event.pos()):
+            self.dragging = "square"
+            self.pick_in_square(event.pos())
+        else:
+            self.dragging = "ring"
+
+    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+        # The last position counts even if its frame has not come yet
+        self.input.flush()
+        self.dragging = None
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
         self.ctrl_pressed = event.key() == Qt.Key_Control
@@ -317,30 +611,15 @@ class PyColorWheel(QWidget):
         if event.key() == Qt.Key_Control:
             self.ctrl_pressed = False
 
+    @profiler.timed("wheel wheelEvent", "input")
     def wheelEvent(self, event: QWheelEvent) -> None:
         self.setFocus()
         increment = 10 if self.ctrl_pressed else 1
-        self.angle += increment if event.angleDelta().y() < 0 else - increment
-        self.angle %= 360
+        self.input.push(("scroll", increment if event.angleDelta().y() < 0 else - increment),
+                        self.merge_input)
 
-        self.indicator_pos = QPoint(
-            int(self.size + self.radius * math.sin(math.radians(self.angle + 180))),
-            int(self.size + self.radius * math.cos(math.radians(self.angle + 180))),
-        )
-        self.angle_changed.emit()
-        self.update()
-
-    def set_angle(self):
-        self.angle = 360 - self.parent().color.hue()
-        if self.angle == -1:
-            self.angle = 0
-
-        self.indicator_pos = QPoint(
-            int(self.size + self.radius * math.sin(math.radians(self.angle + 180))),
-            int(self.size + self.radius * math.cos(math.radians(self.angle + 180))),
-        )
-
-        self.update()
+    def set_angle(self, hue: float):
+        self.move_indicator(0 if hue == -1 else 360 - hue)
 
 
 class DisplayGroup(QFrame):
@@ -359,7 +638,7 @@ class DisplayGroup(QFrame):
         self.copy_btn.setToolTip(f"Copy {title}")
         self.copy_btn.setFixedSize(40, 40)
         self.copy_btn.setCursor(QCursor(Qt.PointingHandCursor))
-        self.copy_btn.setIcon(QIcon("icons/copy.svg"))
+        self.copy_btn.setIcon(pixmap_cache.icon("icons/copy.svg", 24))
         self.copy_btn.setIconSize(QSize(24, 24))
 
         self.layout_ = QHBoxLayout(self)
@@ -373,3 +652,15 @@ class DisplayGroup(QFrame):
 
         self.edit.textEdited.connect(getattr(self.parent(), "set_color_by_" + title.lower()))
         self.copy_btn.clicked.connect(getattr(self.parent(), "get_" + title.lower()))
+
+    def set_text(self, text: str):
+        """Show text without emitting any signal."""
+        self.edit.blockSignals(True)
+        self.edit.setText(text)
+        self.edit.blockSignals(False)
+
+    def show_error(self, error: parsers.ParseError):
+        """Point at the offending character of the text with the parser's message."""
+        self.edit.setCursorPosition(error.position)
+        QToolTip.showText(self.edit.mapToGlobal(self.edit.cursorRect().bottomLeft()),
+                          error.message, self.edit)
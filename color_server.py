@@ -0,0 +1,471 @@
+"""
+The picked colour and batch conversions for other programs, on a local socket.
+
+Started by main.py when the COLOR_PICKER_SERVER environment variable is set, 1
+for the default socket name or a name or path of its own:
+
+    COLOR_PICKER_SERVER=1 python main.py
+    python -m color_server get
+    python -m color_server convert "#3366CC" "255, 149, 0"
+    python -m color_server subscribe
+
+Every message in both directions is a frame, a 4 byte big-endian length and that
+many bytes of UTF-8 JSON. Requests may be sent without waiting for the answers,
+which come back in request order with the request's "id":
+
+    {"id": 1, "op": "get"}
+    {"id": 1, "color": {"hex": "#3366CC", "rgb": [...], "cmyk": [...], "hsl": [...],
+                        "srgb": [...]}}
+
+    {"id": 2, "op": "subscribe"}            {"id": 2, "ok": true}
+    {"event": "color", "color": {...}}      pushed right away and on every change
+    {"id": 3, "op": "unsubscribe"}          {"id": 3, "ok": true}
+
+    {"id": 4, "op": "convert", "colors": ["#FF0000", "cmyk(0%, 10%, 80%, 0%)", "x"]}
+    {"id": 4, "results": [{"hex": ..., "rgb": ..., "cmyk": ..., "hsl": ..., "alpha": 255},
+                          ..., {"error": "...", "position": 0}]}
+
+A failed request is answered with {"id": ..., "error": "..."}. Colours are
+pushed at most once per display frame, the same encoded frame to every
+subscriber, and a subscriber that does not read its socket gets the latest
+colour once it catches up instead of every one it missed. Conversions run on a
+thread pool, so the GUI thread only reads and writes the sockets.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+from collections import deque
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from input_coalescer import InputCoalescer
+
+ENV_VAR = "COLOR_PICKER_SERVER"
+DEFAULT_NAME = "color-picker"
+
+HEADER = struct.Struct(">I")
+# Larger frames are refused and their connection is closed
+MAX_FRAME = 16 << 20
+# Larger frames are decoded on the thread pool, only convert requests may be that large
+LARGE_FRAME = 64 << 10
+# Colours converted and encoded at a time, json holds the GIL while it encodes
+CONVERT_CHUNK = 1000
+# Requests per connection that may wait for their answer before no more are read
+MAX_PIPELINE = 64
+# Connections waiting to be accepted, thousands of clients may connect at once
+BACKLOG = 1024
+# Unsent bytes above which a subscriber is skipped until it has read them
+MAX_BACKLOG = 64 << 10
+
+
+def encode(message: dict) -> bytes:
+    data = json.dumps(message, separators=(",", ":")).encode()
+    return HEADER.pack(len(data)) + data
+
+
+def color_message(state) -> dict:
+    return {
+        "hex": state.hex,
+        "rgb": list(state.rgb),
+        "cmyk": list(state.cmyk),
+        # Hue 0 for greys, as in the results of convert, not QColor's -1
+        "hsl": [max(state.hue, 0), state.saturation, state.lightness],
+        "srgb": list(state.rgbf),
+    }
+
+
+def decode(data: bytes) -> dict:
+    request = json.loads(data)
+    if not isinstance(request, dict):
+        raise ValueError("a request is a JSON object")
+    return request
+
+
+def convert(colors: list) -> list:
+    """The batch converter's fields of every colour, or its parse error."""
+    # Imported here, NumPy is not loaded at startup when the tray comes up first
+    import batch
+
+    rows, errors = batch.convert_chunk(list(enumerate(colors)))
+    results = [None] * len(colors)
+    for number, _, error in errors:
+        results[number] = {"error": error.message, "position": error.position}
+    rows = iter(rows)
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = dict(zip(batch.FIELDS[1:], next(rows)[1:]))
+    return results
+
+
+def encode_results(request_id, colors: list) -> bytes:
+    # Chunk by chunk, so the GUI thread gets the GIL in between
+    results = ",".join(json.dumps(convert(colors[start:start + CONVERT_CHUNK]),
+                                  separators=(",", ":"))[1:-1]
+                       for start in range(0, len(colors), CONVERT_CHUNK))
+    data = f'{{"id":{json.dumps(request_id)},"results":[{results}]}}'.encode()
+    return HEADER.pack(len(data)) + data
+
+
+def check_colors(request: dict) -> list:
+    colors = request.get("colors")
+    if not isinstance(colors, list) or not all(isinstance(color, str) for color in colors):
+        raise ValueError("colors is a list of strings")
+    return colors
+
+
+class ConvertTask(QRunnable):
+    """Converts the colours of a request, decoding it first if it is still bytes."""
+
+    def __init__(self, connection: "Connection", slot: list, request):
+        super().__init__()
+
+        self.connection = connection
+        self.slot = slot
+        self.request = request
+
+    def run(self):
+        request_id = None
+        try:
+            request = self.request
+            if isinstance(request, bytes):
+                request = decode(request)
+            request_id = request.get("id")
+            if request.get("op") != "convert":
+                raise ValueError(f"only convert requests can be over {LARGE_FRAME} bytes")
+            data = encode_results(request_id, check_colors(request))
+        except Exception as error:
+            data = encode({"id": request_id, "error": str(error)})
+        self.connection.answered.emit(self.slot, data)
+
+
+class Connection(QObject):
+    """
+    One client. Answers wait in a queue of slots in request order, a slot is
+    filled right away or by a ConvertTask, and the filled ones at the head are
+    written.
+    """
+
+    # Emitted on the thread of the task with the slot and its encoded answer
+    answered = Signal(object, bytes)
+
+    def __init__(self, server: "ColorServer", socket_: QLocalSocket):
+        super().__init__()
+
+        self.server = server
+        self.socket = socket_
+        # Unix sockets are non-blocking file descriptors that pushes are written to
+        self.fd = socket_.socketDescriptor() if os.name == "posix" else None
+        # Something went through Qt's write buffer, which may not be empty yet
+        self.buffered = False
+        self.buffer = bytearray()
+        self.answers = deque()
+        self.subscribed = False
+        self.reading = False
+        # A colour was skipped because the client was behind
+        self.stale = False
+
+        self.answered.connect(self.fill)
+        self.socket.readyRead.connect(self.read)
+        self.socket.disconnected.connect(self.close)
+
+    def read(self):
+        if self.socket is None:
+            return
+        self.buffer += self.socket.readAll().data()
+
+        self.reading = True
+        try:
+            self.parse()
+        finally:
+            self.reading = False
+
+    def parse(self):
+        while len(self.answers) < MAX_PIPELINE and len(self.buffer) >= HEADER.size:
+            (size,) = HEADER.unpack_from(self.buffer)
+            if size > MAX_FRAME:
+                self.write(encode({"error": f"frame of {size} bytes is too large"}))
+                self.socket.disconnectFromServer()
+                return
+            if len(self.buffer) < HEADER.size + size:
+                return
+            data = bytes(self.buffer[HEADER.size:HEADER.size + size])
+            del self.buffer[:HEADER.size + size]
+            self.handle(data)
+
+    def handle(self, data: bytes):
+        slot = [None]
+        self.answers.append(slot)
+        if len(data) > LARGE_FRAME:
+            self.server.pool.start(ConvertTask(self, slot, data))
+            return
+        try:
+            request = decode(data)
+        except ValueError as error:
+            self.fill(slot, encode({"id": None, "error": str(error)}))
+            return
+
+        request_id = request.get("id")
+        op = request.get("op")
+        if op == "get":
+            self.fill(slot, encode({"id": request_id, "color": self.server.color()}))
+        elif op in ("subscribe", "unsubscribe"):
+            self.server.subscribe(self, op == "subscribe")
+            answer = encode({"id": request_id, "ok": True})
+            if op == "subscribe" and self.server.state is not None:
+                # The current colour right after the answer, not only from the next change
+                answer += self.server.color_frame()
+            self.fill(slot, answer)
+        elif op == "convert":
+            self.server.pool.start(ConvertTask(self, slot, request))
+        else:
+            self.fill(slot, encode({"id": request_id, "error": f"unknown op {op!r}"}))
+
+    @Slot(object, bytes)
+    def fill(self, slot: list, data: bytes):
+        slot[0] = data
+        if self.socket is None:
+            return
+        while self.answers and self.answers[0][0] is not None:
+            self.write(self.answers.popleft()[0])
+        # Requests left unread while the queue was full
+        if not self.reading and self.buffer and len(self.answers) < MAX_PIPELINE:
+            self.read()
+
+    def write(self, data: bytes):
+        self.buffered = True
+        self.socket.write(data)
+
+    def push(self, data: bytes):
+        pending = self.socket.bytesToWrite() if self.buffered else 0
+        self.buffered = pending > 0
+        if pending == 0 and self.fd is not None:
+            # Straight to the socket, queueing in Qt and flushing from the event loop
+            # cost several times the write itself for every subscriber
+            try:
+                written = os.write(self.fd, data)
+            except BlockingIOError:
+                written = 0
+            except OSError:
+                # Disconnected, the socket reports it in the event loop
+                return
+            if written < len(data):
+                self.write(data[written:])
+        elif pending <= MAX_BACKLOG:
+            self.write(data)
+        elif not self.stale:
+            # Only a client that is behind is told about its writes
+            self.stale = True
+            self.socket.bytesWritten.connect(self.catch_up)
+
+    def catch_up(self):
+        if self.socket is None or self.socket.bytesToWrite() > MAX_BACKLOG:
+            return
+        self.stale = False
+        self.socket.bytesWritten.disconnect(self.catch_up)
+        if self.subscribed:
+            self.push(self.server.color_frame())
+
+    def close(self):
+        if self.socket is None:
+            return
+        self.server.remove(self)
+        self.socket.deleteLater()
+        self.socket = None
+
+
+class ColorServer(QObject):
+    """
+    Serves the colour of a ColorState, set with set_state() once the picker is
+    built, on a QLocalServer only the current user can connect to.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, max_threads: int = 2, parent: QObject = None):
+        super().__init__(parent)
+
+        self.state = None
+        self.coalescer = None
+        self.frame = None
+
+        self.connections = set()
+        self.subscribers = set()
+        # Colours pushed to the subscribers, for the benchmark
+        self.pushes = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.setListenBacklogSize(BACKLOG)
+        self.server.setMaxPendingConnections(BACKLOG)
+        self.server.newConnection.connect(self.accept)
+        self.listen(name)
+
+    def listen(self, name: str):
+        # QLocalServer replaces the socket file of another picker without asking,
+        # it is only left to it if nothing answers there, after a crash
+        path = socket_path(name)
+        with socket.socket(socket.AF_UNIX) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                pass
+            else:
+                raise OSError(f"another colour server is listening on {path}")
+        if not self.server.listen(name):
+            raise OSError(f"cannot listen on {path}: {self.server.errorString()}")
+
+    def name(self) -> str:
+        return self.server.fullServerName()
+
+    def set_state(self, state):
+        """Serve the colour of state, its parent's screen sets the push rate."""
+        self.state = state
+        self.frame = None
+        self.coalescer = InputCoalescer(state.parent(), self.broadcast)
+        state.changed.connect(self.changed)
+
+    def color(self):
+        if self.state is None:
+            return None
+        # An edit still waiting for the state's timer is answered already
+        self.state.flush()
+        return color_message(self.state)
+
+    def color_frame(self) -> bytes:
+        if self.state is not None:
+            self.state.flush()
+        # Encoded once for all subscribers
+        if self.frame is None:
+            self.frame = encode({"event": "color", "color": self.color()})
+        return self.frame
+
+    def changed(self):
+        self.frame = None
+        if self.subscribers:
+            self.coalescer.push(True)
+
+    def broadcast(self, _=None):
+        data = self.color_frame()
+        self.pushes += 1
+        for connection in self.subscribers:
+            connection.push(data)
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            self.connections.add(Connection(self, self.server.nextPendingConnection()))
+
+    def subscribe(self, connection: Connection, subscribed: bool):
+        connection.subscribed = subscribed
+        if subscribed:
+            self.subscribers.add(connection)
+        else:
+            self.subscribers.discard(connection)
+
+    def remove(self, connection: Connection):
+        self.connections.discard(connection)
+        self.subscribers.discard(connection)
+
+    def close(self):
+        self.server.close()
+        for connection in list(self.connections):
+            if connection.socket is not None:
+                connection.socket.abort()
+        # Conversions nobody waits for any more, only the running ones are finished
+        self.pool.clear()
+        self.pool.waitForDone()
+
+
+def socket_path(name: str) -> str:
+    # Where QLocalServer puts a name without a directory on Unix
+    return name if os.path.isabs(name) else os.path.join(tempfile.gettempdir(), name)
+
+
+def name_from_environment():
+    """The socket name the environment asks for, or None."""
+    value = os.environ.get(ENV_VAR, "")
+    if not value or value == "0":
+        return None
+    return DEFAULT_NAME if value == "1" else value
+
+
+def start_from_environment():
+    """A ColorServer if the environment asks for one, otherwise None."""
+    name = name_from_environment()
+    if name is None:
+        return None
+    try:
+        return ColorServer(name)
+    except OSError as error:
+        # Most likely another picker serves the name, this one runs without
+        print(f"colour server not started: {error}", file=sys.stderr)
+        return None
+
+
+class Client:
+    """Blocking client without Qt, for scripts and the command line."""
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.socket = socket.socket(socket.AF_UNIX)
+        self.socket.connect(socket_path(name))
+        self.file = self.socket.makefile("rb")
+        self.next_id = 0
+
+    def send(self, op: str, **fields) -> int:
+        self.next_id += 1
+        self.socket.sendall(encode({"id": self.next_id, "op": op, **fields}))
+        return self.next_id
+
+    def receive(self) -> dict:
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ConnectionError("the colour server closed the connection")
+        (size,) = HEADER.unpack(header)
+        return json.loads(self.file.read(size))
+
+    def request(self, op: str, **fields) -> dict:
+        self.send(op, **fields)
+        return self.receive()
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m color_server",
+                                     description="Query a running colour picker.")
+    parser.add_argument("op", choices=("get", "convert", "subscribe"))
+    parser.add_argument("colors", nargs="*", help="colours to convert")
+    parser.add_argument("--name", default=name_from_environment() or DEFAULT_NAME,
+                        help="socket name or path")
+    args = parser.parse_args(argv)
+
+    try:
+        client = Client(args.name)
+    except OSError as error:
+        parser.error(f"no colour server at {socket_path(args.name)}: {error}")
+    try:
+        if args.op == "get":
+            print(json.dumps(client.request("get")["color"]))
+        elif args.op == "convert":
+            for result in client.request("convert", colors=args.colors)["results"]:
+                print(json.dumps(result))
+        else:
+            client.request("subscribe")
+            while True:
+                print(json.dumps(client.receive()["color"]), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
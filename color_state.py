@@ -0,0 +1,125 @@
+from collections import Counter
+
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import clipboard
+import colorspace
+import float_color
+import profiler
+
+
+class ColorState(QObject):
+    """
+    Single source of truth for the picker colour.
+
+    Inputs only record which representation changed and its new value. The other
+    representations are derived once per event loop turn by a zero delay timer, so
+    a burst of slider ticks results in a single recompute and a single `changed`.
+    """
+
+    HEX = "hex"
+    RGB = "rgb"
+    CMYK = "cmyk"
+    HSL = "hsl"
+    # Colours that come from outside the picker fields, every view is refreshed
+    EXTERNAL = "external"
+
+    changed = Signal(str)
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+
+        self.source = self.HSL
+        self.pending = None
+
+        self.rgb16 = colorspace.rgb_to_rgb16((255, 0, 0))
+        self.hue = 0
+        self.saturation = 100
+        self.lightness = 50
+        self.hex = "#FF0000"
+        self.rgb = (255, 0, 0)
+        self.cmyk = (0, 100, 100, 0)
+        # The colour without 8 or 16 bit rounding, sRGB in 0 - 1
+        self.rgbf = (1.0, 0.0, 0.0)
+        # Formatted once per colour, shared by the fields and the clipboard
+        self.text = clipboard.format_color(self.rgb, self.cmyk, self.rgbf)
+
+        # Debug counters, how many inputs of each source arrived and how many
+        # recomputes they caused.
+        self.inputs = Counter()
+        self.recomputes = Counter()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.recompute)
+
+    def set_hex(self, rgb):
+        self.schedule(self.HEX, colorspace.rgb_to_rgb16(rgb))
+
+    def set_rgb(self, rgb):
+        self.schedule(self.RGB, colorspace.rgb_to_rgb16(rgb))
+
+    def set_cmyk(self, cmyk):
+        self.schedule(self.CMYK, cmyk)
+
+    def set_external(self, rgb):
+        self.schedule(self.EXTERNAL, colorspace.rgb_to_rgb16(rgb))
+
+    def set_hsl(self, hue: float, saturation: float, lightness: float):
+        # Saturation and lightness are percentages, fractional ones from the square
+        self.schedule(self.HSL, (hue, saturation, lightness))
+
+    def schedule(self, source: str, value):
+        self.inputs[source] += 1
+        self.pending = source, value
+        profiler.hop_start(self)
+        self.timer.start()
+
+    def flush(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.recompute()
+
+    @profiler.timed("state recompute")
+    def recompute(self):
+        if self.pending is None:
+            return
+        profiler.hop_end(self, "state input to recompute")
+
+        self.source, value = self.pending
+        self.pending = None
+        self.recomputes[self.source] += 1
+
+        if self.source == self.HSL:
+            self.hue, self.saturation, self.lightness = value
+            rgbf = float_color.hsl_to_rgb((self.hue, self.saturation / 100, self.lightness / 100))
+            self.rgbf = tuple(rgbf.tolist())
+            # Every other representation comes from the float colour as well, rounding
+            # saturation and lightness to 8 bits first would leave 101 x 101 steps
+            self.rgb16 = np.round(rgbf * 65535).astype(np.int32)
+        else:
+            if self.source == self.CMYK:
+                self.rgb16 = colorspace.cmyk_to_rgb16(value)
+            else:
+                self.rgb16 = value
+
+            _, saturation, lightness = colorspace.rgb16_to_hsl(self.rgb16).tolist()
+            self.hue = int(colorspace.rgb16_to_hue(self.rgb16))
+            self.saturation = int(saturation / 255 * 100)
+            self.lightness = int(lightness / 255 * 100)
+            self.rgbf = tuple((self.rgb16 / 65535).tolist())
+
+        rgb = colorspace.rgb16_to_rgb(self.rgb16)
+        self.rgb = tuple(rgb.tolist())
+        self.hex = str(colorspace.rgb_to_hex(rgb))
+        self.cmyk = tuple(colorspace.rgb16_to_cmyk(self.rgb16).tolist())
+        self.text = clipboard.format_color(self.rgb, self.cmyk, self.rgbf)
+
+        self.changed.emit(self.source)
+
+    def recomputes_per_input(self) -> dict:
+        return {
+            source: self.recomputes[source] / count for source, count in self.inputs.items()
+        }
@@ -1,18 +1,47 @@
 import datetime
-
-from PySide6.QtCore import Qt, QEvent, QTimer
-from PySide6.QtGui import QCursor, QMouseEvent, QEnterEvent, QIcon, QKeyEvent, QPixmap
-from PySide6.QtWidgets import QMainWindow, QVBoxLayout, QFrame, QLabel, QHBoxLayout, QPushButton
-
+import os
+
+from PySide6.QtCore import Qt, QEvent, QTimer, QPoint, QFileSystemWatcher
+from PySide6.QtGui import QCursor, QMouseEvent, QEnterEvent, QKeyEvent, QPixmap, QColor, \
+    QDragEnterEvent, QDropEvent, QImage, QAction
+from PySide6.QtWidgets import QMainWindow, QVBoxLayout, QFrame, QLabel, QHBoxLayout, QPushButton, \
+    QMenu, QFileDialog
+
+import clipboard
+import history
+import named_colors
+import palette_generator
+import pixmap_cache
+import profiler
+import swatch_files
 from color_picker import PyColorPicker
+from eyedropper import Eyedropper
+from gradient_bar import PyGradientBar
+from palette import PaletteExtractor
+from palette_bar import PyPaletteBar
+from profile_overlay import PyProfileOverlay
+from screenshot_saver import ScreenshotSaver
 
 
 class ColorWindow(QMainWindow):
+    HISTORY_SIZE = 10
+    SCALE_STEPS = 11
+
+    # Save dialog filters and the swatch_files format of each, the PNG keeps 16 bits
+    EXPORT_FILTERS = {
+        "CSS custom properties (*.css)": "css",
+        "Adobe Swatch Exchange (*.ase)": "ase",
+        "GIMP palette (*.gpl)": "gpl",
+        "JSON design tokens (*.json)": "json",
+        "PNG swatches, 16 bit (*.png)": "png",
+    }
+
     def __init__(self):
         super().__init__()
 
-        self.setFixedSize(400, 675)
+        self.setFixedSize(400, 715)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.Window)
+        self.setAcceptDrops(True)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.statusBar().setSizeGripEnabled(False)
         self.statusBar().hide()
@@ -44,14 +73,209 @@ class ColorWindow(QMainWindow):
         self.title_bar = ColorTitleBar(self)
         self.color_picker = PyColorPicker(self)
 
+        # Only shown once an image was dropped, the window grows by its height
+        self.palette_bar = PyPaletteBar(self)
+        self.palette_bar.hide()
+        self.history_bar = PyPaletteBar(self)
+        self.history_bar.hide()
+        self.gradient_bar = PyGradientBar(self)
+        self.gradient_bar.hide()
+
         self.central_layout = QVBoxLayout(self.central_frame)
         self.central_layout.setContentsMargins(0, 0, 0, 0)
         self.central_layout.setSpacing(20)
         self.central_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
 
         self.central_layout.addWidget(self.title_bar)
+        self.central_layout.addWidget(self.palette_bar)
+        self.central_layout.addWidget(self.history_bar)
+        self.central_layout.addWidget(self.gradient_bar)
         self.central_layout.addWidget(self.color_picker)
 
+        self.eyedropper = Eyedropper()
+        self.eyedropper.color_picked.connect(self.color_picker.set_picked_color)
+        self.title_bar.eyedropper_btn.clicked.connect(self.eyedropper.start)
+
+        self.palette_extractor = PaletteExtractor(parent=self)
+        self.palette_extractor.progress.connect(
+            lambda percent: self.title_bar.title_label.setText(f"Palette {percent}%"))
+        self.palette_extractor.extracted.connect(self.set_palette)
+        self.palette_extractor.failed.connect(lambda error: self.title_bar.title_label.clear())
+        self.palette_bar.color_clicked.connect(self.color_picker.set_picked_color)
+        self.contrast_backgrounds_action = QAction("Check contrast on these backgrounds",
+                                                   self.palette_bar)
+        self.contrast_backgrounds_action.triggered.connect(
+            lambda: self.set_contrast_references(self.palette_bar.colors, []))
+        self.contrast_foregrounds_action = QAction("Check contrast with these as text",
+                                                   self.palette_bar)
+        self.contrast_foregrounds_action.triggered.connect(
+            lambda: self.set_contrast_references([], self.palette_bar.colors))
+        self.palette_bar.addActions([self.contrast_backgrounds_action,
+                                     self.contrast_foregrounds_action])
+
+        self.harmony_menu = QMenu("Harmonies", self)
+        for kind in ("scale",) + palette_generator.HARMONIES:
+            action = self.harmony_menu.addAction("Tonal scale" if kind == "scale"
+                                                 else kind.capitalize().replace("-", " "))
+            action.triggered.connect(lambda checked=False, kind=kind: self.show_harmony(kind))
+        self.export_action = QAction("Export palette...", self)
+        self.export_action.triggered.connect(self.export_palette)
+        self.gradient_action = QAction("Show gradient to complement", self)
+        self.gradient_action.triggered.connect(self.show_gradient)
+        self.color_picker.addActions([self.harmony_menu.menuAction(), self.gradient_action,
+                                      self.export_action])
+        self.color_picker.state.changed.connect(
+            lambda source: self.gradient_bar.set_color(self.color_picker.state.rgbf))
+
+        # Floats over the picker, only shown while profiling
+        self.profile_overlay = PyProfileOverlay(self.central_frame)
+        self.profile_overlay.move(10, self.title_bar.height() + 10)
+        if profiler.enabled:
+            self.profile_overlay.start()
+
+        self.history = self.open_history()
+        self.history_watcher = None
+        if isinstance(self.history, history.HistoryWriter):
+            self.color_picker.color_committed.connect(self.add_history)
+            self.eyedropper.color_picked.connect(
+                lambda color: self.add_history(color, "eyedropper"))
+            self.title_bar.screenshot_btn.clicked.connect(
+                lambda: self.add_history(self.color_picker.color, "screenshot"))
+        elif self.history is not None:
+            # Another instance writes, follow its appends
+            self.history_watcher = QFileSystemWatcher([self.history.path], self)
+            self.history_watcher.fileChanged.connect(self.update_history)
+        self.history_bar.color_clicked.connect(self.color_picker.set_picked_color)
+        if self.history is not None:
+            self.copy_history_action = QAction("Copy whole history", self.history_bar)
+            self.copy_history_action.triggered.connect(self.copy_history)
+            self.history_bar.addAction(self.copy_history_action)
+        self.update_history()
+
+    def dragEnterEvent(self, event: QDragEnterEvent) -> None:
+        mime_data = event.mimeData()
+        if mime_data.hasImage() or any(url.isLocalFile() for url in mime_data.urls()):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event: QDropEvent) -> None:
+        mime_data = event.mimeData()
+        files = [url.toLocalFile() for url in mime_data.urls() if url.isLocalFile()]
+
+        # Files are decoded by the worker, only dropped image data is already in memory
+        if files:
+            self.palette_extractor.extract(files[0])
+        elif mime_data.hasImage():
+            self.palette_extractor.extract(QImage(mime_data.imageData()))
+        else:
+            return
+        event.acceptProposedAction()
+
+    def show_bar(self, bar: QFrame):
+        if bar.isHidden():
+            bar.show()
+            self.setFixedHeight(self.height() + bar.height() + self.central_layout.spacing())
+
+    def set_palette(self, swatches: list):
+        self.title_bar.title_label.clear()
+        if not swatches:
+            return
+
+        self.show_bar(self.palette_bar)
+        self.palette_bar.set_swatches(swatches)
+        self.color_picker.set_picked_color(QColor(*swatches[0].rgb))
+
+    def toggle_profiling(self):
+        if profiler.enabled:
+            profiler.disable()
+            self.profile_overlay.stop()
+        else:
+            profiler.enable()
+            self.profile_overlay.start()
+
+    def set_contrast_references(self, backgrounds: list, foregrounds: list):
+        self.color_picker.contrast.set_references(
+            [(color.red(), color.green(), color.blue()) for color in backgrounds],
+            [(color.red(), color.green(), color.blue()) for color in foregrounds])
+
+    def harmony_colors(self, kind: str):
+        self.color_picker.state.flush()
+        rgbf = self.color_picker.state.rgbf
+        if kind == "scale":
+            return palette_generator.tonal_scale(rgbf, self.SCALE_STEPS)
+        return palette_generator.harmony(rgbf, kind)
+
+    def show_harmony(self, kind: str):
+        colors = [QColor.fromRgbF(*rgb) for rgb in self.harmony_colors(kind).tolist()]
+        self.show_bar(self.palette_bar)
+        self.palette_bar.set_colors(colors,
+                                    [f"{color.name().upper()} ({kind})" for color in colors])
+
+    def show_gradient(self):
+        self.color_picker.state.flush()
+        self.gradient_bar.set_color(self.color_picker.state.rgbf)
+        self.show_bar(self.gradient_bar)
+
+    def export_palette(self):
+        # The tonal scale and every harmony of the picked colour, named after it
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export palette", "", ";;".join(self.EXPORT_FILTERS))
+        if not path:
+            return
+        writers = {**swatch_files.WRITERS, **swatch_files.IMAGE_WRITERS}
+        extension = os.path.splitext(path)[1][1:].lower()
+        file_format = extension if extension in writers \
+            else self.EXPORT_FILTERS.get(selected, "css")
+        writer_class = writers[file_format]
+
+        name = named_colors.default_index().nearest(self.color_picker.state.rgb).name
+        file = open(path, "wb") if writer_class.binary else open(path, "w", encoding="utf-8")
+        with file:
+            writer = writer_class(file, name)
+            writer.write(name, self.harmony_colors("scale"))
+            for kind in palette_generator.HARMONIES:
+                writer.write(f"{name}-{kind}", self.harmony_colors(kind))
+            writer.close()
+
+    @staticmethod
+    def open_history():
+        # Only one window can write, the others show the history read-only
+        try:
+            return history.HistoryWriter()
+        except history.HistoryLocked:
+            try:
+                return history.HistoryReader(history.default_path())
+            except (OSError, ValueError):
+                return None
+        except (OSError, ValueError):
+            return None
+
+    def add_history(self, color: QColor, source: str):
+        self.history.append((color.red(), color.green(), color.blue(), color.alpha()), source)
+        self.update_history()
+
+    def copy_history(self):
+        # Newest first and every colour once, in a single clipboard change
+        rgbs = dict.fromkeys(map(tuple, self.history.records()["rgba"][::-1, :3].tolist()))
+        clipboard.copy_colors(clipboard.format_colors(list(rgbs)))
+
+    def update_history(self):
+        if self.history is None:
+            return
+        if self.history_watcher is not None and not self.history_watcher.files():
+            # A compaction replaced the file, which ends the watch
+            self.history_watcher.addPath(self.history.path)
+
+        records = self.history.recent(self.HISTORY_SIZE)
+        if not records:
+            return
+
+        self.show_bar(self.history_bar)
+        self.history_bar.set_colors(
+            [QColor(*record.rgba) for record in records],
+            [f"{QColor(*record.rgba).name().upper()} ({record.source}, "
+             f"{datetime.datetime.fromtimestamp(record.timestamp):%Y-%m-%d %H:%M})"
+             for record in records])
+
 
 class ColorTitleBar(QFrame):
     def __init__(self, window: QMainWindow, height: int = 40, button_height: float = 0.8):
@@ -63,6 +287,7 @@ class ColorTitleBar(QFrame):
         self.last_mouse_position = None
         self.window = window
         self.maximized = False
+        self.screenshot_saver = ScreenshotSaver(parent=self)
 
 
         # SETUP
@@ -79,24 +304,32 @@ class ColorTitleBar(QFrame):
         self.title_label = QLabel(self)
         self.title_label.setObjectName("title_label")
 
+        self.eyedropper_btn = QPushButton(self)
+        self.eyedropper_btn.setObjectName("eyedropper_btn")
+        self.eyedropper_btn.setFixedSize(int(button_height * height), int(button_height * height))
+        self.eyedropper_btn.setToolTip("Pick color from screen")
+        self.eyedropper_btn.setIcon(pixmap_cache.icon("icons/droplet.svg", 16))
+
         self.screenshot_btn = QPushButton(self)
         self.screenshot_btn.setObjectName("screenshot_btn")
         self.screenshot_btn.clicked.connect(self.take_screenshot)
         self.screenshot_btn.setFixedSize(int(button_height * height), int(button_height * height))
-        self.screenshot_btn.setToolTip("Screenshot")
-        self.screenshot_btn.setIcon(QIcon("icons/image.svg"))
+        self.screenshot_btn.setToolTip("Screenshot (right click for the file format)")
+        self.screenshot_btn.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.screenshot_btn.customContextMenuRequested.connect(self.show_screenshot_menu)
+        self.screenshot_btn.setIcon(pixmap_cache.icon("icons/image.svg", 16))
 
         self.minimize_btn = QPushButton(self)
         self.minimize_btn.setObjectName("minimize_btn")
         self.minimize_btn.setFixedSize(int(button_height * height), int(button_height * height))
         self.minimize_btn.setToolTip("Minimize")
-        self.minimize_btn.setIcon(QIcon("icons/minus.svg"))
+        self.minimize_btn.setIcon(pixmap_cache.icon("icons/minus.svg", 16))
 
         self.exit_btn = QPushButton(self)
         self.exit_btn.setFixedSize(int(button_height * height), int(button_height * height))
         self.exit_btn.setObjectName("exit_btn")
         self.exit_btn.setToolTip("Exit")
-        self.exit_btn.setIcon(QIcon("icons/x.svg"))
+        self.exit_btn.setIcon(pixmap_cache.icon("icons/x.svg", 16))
 
         # CONNECTIONS
         # ------------------------------------------------------------------------------------------
@@ -117,6 +350,7 @@ class ColorTitleBar(QFrame):
 
         self.layout_.addWidget(self.title_label)
         self.layout_.addStretch()
+        self.layout_.addWidget(self.eyedropper_btn)
         self.layout_.addWidget(self.screenshot_btn)
         self.layout_.addWidget(self.minimize_btn)
         self.layout_.addWidget(self.exit_btn)
@@ -130,7 +364,10 @@ class ColorTitleBar(QFrame):
         self.setCursor(QCursor(Qt.ArrowCursor))
 
     def mouseDoubleClickEvent(self, event: QMouseEvent) -> None:
-        if event.buttons() == Qt.LeftButton:
+        # Ctrl+Shift is the hidden switch for the profiling overlay
+        if event.modifiers() == Qt.ControlModifier | Qt.ShiftModifier:
+            self.window.toggle_profiling()
+        elif event.buttons() == Qt.LeftButton:
             self.window.move(0, 0)
 
     def mouseMoveEvent(self, event: QMouseEvent):
@@ -144,6 +381,17 @@ class ColorTitleBar(QFrame):
             self.window.move(new_pos)
 
     def take_screenshot(self):
-        import datetime
-        self.parent().grab().save(
-            f"screenshots/{datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}_img.png")
+        # Only the grab happens on the GUI thread, encoding and writing are done by the saver
+        self.screenshot_saver.save(self.parent().grab().toImage())
+
+    def show_screenshot_menu(self, pos: QPoint):
+        menu = QMenu(self)
+        for image_format in self.screenshot_saver.available_formats():
+            action = menu.addAction(image_format.upper())
+            action.setCheckable(True)
+            action.setChecked(image_format == self.screenshot_saver.image_format)
+            action.setData(image_format)
+
+        action = menu.exec(self.screenshot_btn.mapToGlobal(pos))
+        if action is not None:
+            self.screenshot_saver.image_format = action.data()
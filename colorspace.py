@@ -0,0 +1,276 @@
+"""
+Vectorised HSL/RGB/CMYK/HEX conversions that reproduce QColor's results exactly.
+
+QColor keeps every component as a 16 bit integer and converts between colour models
+in single precision floats, so the functions below do the same with NumPy arrays.
+Colours are arrays whose last axis holds the components; any leading shape works and
+a single colour can be passed as a plain tuple. No QApplication is needed.
+
+Component ranges follow the QColor integer API:
+
+    rgb     0 - 255 (rgb16: 0 - 65535)
+    hsl     hue 0 - 359 (-1 for achromatic), saturation and lightness 0 - 255;
+            a fractional hue is kept to a hundredth of a degree like QColor.fromHslF
+    cmyk    percentages 0 - 100 as shown in the picker
+    lab     CIELAB (D65), L 0 - 100, float64; QColor has no equivalent
+"""
+
+import numpy as np
+
+USHRT_MAX = np.float32(65535)
+ACHROMATIC = 65535
+
+_HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+_HEX_VALUES = np.full(256, -1, dtype=np.int16)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_VALUES[_c] = _i
+    _HEX_VALUES[ord(chr(_c).upper())] = _i
+
+
+def _q_round(values: np.ndarray) -> np.ndarray:
+    # qRound(float) for non-negative values: int(d + 0.5f)
+    return np.floor(values + np.float32(0.5)).astype(np.int32)
+
+
+def _div_257(values: np.ndarray) -> np.ndarray:
+    # QColor rounds to nearest when it goes from 16 to 8 bit components
+    return (values + 128) // 257
+
+
+def _components(values, count: int, dtype=np.int32) -> np.ndarray:
+    values = np.asarray(values, dtype=dtype)
+    if values.shape[-1:] != (count,):
+        raise ValueError(f"expected {count} components on the last axis, got shape {values.shape}")
+    return values
+
+
+def rgb_to_rgb16(rgb) -> np.ndarray:
+    return _components(rgb, 3) * 0x101
+
+
+def rgb16_to_rgb(rgb16) -> np.ndarray:
+    return _div_257(_components(rgb16, 3))
+
+
+def hsl_to_rgb16(hsl) -> np.ndarray:
+    """Same as QColor.fromHsl(h, s, l).rgba64(), or fromHslF(h / 360, s / 255, l / 255)
+    for a fractional hue.
+    """
+    values = _components(hsl, 3, dtype=np.float64)
+    hsl = values.astype(np.int32)
+
+    # QColor stores the hue in hundredths of a degree. fromHsl takes whole degrees,
+    # fromHslF takes the hue as a float fraction of the circle and rounds it times
+    # 36000 in single precision.
+    hue = values[..., 0] % 360
+    hue_f = (hue / 360).astype(np.float32)
+    hue16 = np.where(values[..., 0] == -1, ACHROMATIC,
+                     np.where(hue == np.floor(hue), hue * 100,
+                              _q_round(hue_f * np.float32(36000)))).astype(np.int32)
+    saturation16 = hsl[..., 1] * 0x101
+    lightness16 = hsl[..., 2] * 0x101
+
+    h = np.where(hue16 == 36000, 0, hue16).astype(np.float32) / np.float32(36000)
+    s = saturation16.astype(np.float32) / USHRT_MAX
+    l = lightness16.astype(np.float32) / USHRT_MAX
+
+    temp2 = np.where(l < 0.5, l * (np.float32(1) + s), l + s - (l * s))
+    temp1 = np.float32(2) * l - temp2
+
+    third = np.float32(1) / np.float32(3)
+    channels = []
+    for temp3 in (h + third, h, h - third):
+        temp3 = np.where(temp3 < 0, temp3 + np.float32(1),
+                         np.where(temp3 > 1, temp3 - np.float32(1), temp3))
+        sixtemp3 = temp3 * np.float32(6)
+
+        channel = np.select(
+            [sixtemp3 < 1, temp3 * np.float32(2) < 1, temp3 * np.float32(3) < 2],
+            [
+                temp1 + (temp2 - temp1) * sixtemp3,
+                temp2,
+                temp1 + (temp2 - temp1) * (np.float32(2) / np.float32(3) - temp3) * np.float32(6),
+            ],
+            temp1
+        )
+        channel = _q_round(channel * USHRT_MAX)
+        channels.append(np.where(channel == 1, 0, channel))
+
+    rgb16 = np.stack(channels, axis=-1)
+
+    achromatic = (saturation16 == 0) | (hue16 == ACHROMATIC)
+    rgb16 = np.where(achromatic[..., None], lightness16[..., None], rgb16)
+    return np.where((lightness16 == 0)[..., None] & ~achromatic[..., None], 0, rgb16)
+
+
+def hsl_to_rgb(hsl) -> np.ndarray:
+    return rgb16_to_rgb(hsl_to_rgb16(hsl))
+
+
+def rgb16_to_hsl(rgb16) -> np.ndarray:
+    """Same as (hslHue(), hslSaturation(), lightness()) of a QColor with these components.
+
+    The hue is -1 for achromatic colours.
+    """
+    rgb16 = _components(rgb16, 3)
+
+    # Saturation and lightness are taken from the integer components, which is what
+    # makes e.g. (16, 48, 43) round up to exactly half saturation.
+    delta16 = rgb16.max(axis=-1) - rgb16.min(axis=-1)
+    delta2_16 = rgb16.max(axis=-1) + rgb16.min(axis=-1)
+    achromatic = delta16 == 0
+    denominator = np.where(delta2_16 < 65535, delta2_16, 2 * 65535 - delta2_16)
+    saturation = delta16.astype(np.float32) / np.where(achromatic, 1, denominator).astype(np.float32)
+
+    hue16 = _hue16(rgb16)
+    saturation16 = np.where(achromatic, 0, _q_round(saturation * USHRT_MAX))
+    lightness16 = (delta2_16 + 1) // 2
+
+    return np.stack([
+        np.where(hue16 == ACHROMATIC, -1, hue16 // 100),
+        _div_257(saturation16),
+        _div_257(lightness16),
+    ], axis=-1)
+
+
+def rgb_to_hsl(rgb) -> np.ndarray:
+    return rgb16_to_hsl(rgb_to_rgb16(rgb))
+
+
+def rgb16_to_hue(rgb16) -> np.ndarray:
+    """Same as QColor.hue(), -1 for achromatic colours."""
+    hue16 = _hue16(rgb16)
+    return np.where(hue16 == ACHROMATIC, -1, hue16 // 100)
+
+
+def _hue16(rgb16) -> np.ndarray:
+    # The hue in hundredths of a degree as QColor stores it for HSV and HSL alike.
+    # The differences are taken between the integer components. From float components
+    # a hue of exactly half a hundredth can come out just below it and round down.
+    rgb16 = _components(rgb16, 3)
+    r, g, b = rgb16[..., 0], rgb16[..., 1], rgb16[..., 2]
+
+    maximum = rgb16.max(axis=-1)
+    delta = maximum - rgb16.min(axis=-1)
+    safe_delta = np.where(delta == 0, 1, delta).astype(np.float32)
+
+    hue = np.select(
+        [r == maximum, g == maximum],
+        [
+            (g - b).astype(np.float32) / safe_delta,
+            np.float32(2) + (b - r).astype(np.float32) / safe_delta,
+        ],
+        np.float32(4) + (r - g).astype(np.float32) / safe_delta
+    )
+    hue = np.where(hue < 0, hue + np.float32(6), hue)
+
+    return np.where(delta == 0, ACHROMATIC, _q_round(hue * np.float32(6000)))
+
+
+def rgb16_to_cmyk16(rgb16) -> np.ndarray:
+    rgb = _components(rgb16, 3)
+    cmy = np.float32(1) - rgb.astype(np.float32) / USHRT_MAX
+
+    k = cmy.min(axis=-1)
+    # Black divides by zero, QColor special cases it and so do we below
+    cmy = (cmy - k[..., None]) / np.where(k == 1, np.float32(1), np.float32(1) - k)[..., None]
+
+    cmyk16 = _q_round(np.concatenate([cmy, k[..., None]], axis=-1) * USHRT_MAX)
+
+    black = (rgb == 0).all(axis=-1)[..., None]
+    return np.where(black, np.array([0, 0, 0, ACHROMATIC]), cmyk16)
+
+
+def rgb16_to_cmyk(rgb16) -> np.ndarray:
+    """CMYK percentages as displayed by the picker, round(QColor.cyanF() * 100) etc."""
+    cmyk_f = (rgb16_to_cmyk16(rgb16).astype(np.float32) / USHRT_MAX).astype(np.float64)
+    return np.round(cmyk_f * 100).astype(np.int32)
+
+
+def rgb_to_cmyk(rgb) -> np.ndarray:
+    return rgb16_to_cmyk(rgb_to_rgb16(rgb))
+
+
+def cmyk_to_rgb16(cmyk) -> np.ndarray:
+    """Same as QColor.fromCmykF(c / 100, m / 100, y / 100, k / 100).rgba64()."""
+    cmyk = _components(cmyk, 4, dtype=np.float64)
+    cmyk16 = _q_round((cmyk / 100).astype(np.float32) * USHRT_MAX)
+
+    cmyk_f = cmyk16.astype(np.float32) / USHRT_MAX
+    cmy, k = cmyk_f[..., :3], cmyk_f[..., 3:]
+    return _q_round((np.float32(1) - (cmy * (np.float32(1) - k) + k)) * USHRT_MAX)
+
+
+def cmyk_to_rgb(cmyk) -> np.ndarray:
+    return rgb16_to_rgb(cmyk_to_rgb16(cmyk))
+
+
+def rgb_to_hex(rgb) -> np.ndarray:
+    """Upper case "#RRGGBB" strings, same as QColor.name(QColor.HexRgb).upper()."""
+    rgb = _components(rgb, 3)
+
+    chars = np.empty(rgb.shape[:-1] + (7,), dtype=np.uint8)
+    chars[..., 0] = ord("#")
+    chars[..., 1::2] = _HEX_DIGITS[rgb >> 4]
+    chars[..., 2::2] = _HEX_DIGITS[rgb & 0xF]
+
+    return np.ascontiguousarray(chars).view("S7")[..., 0].astype("U7")
+
+
+def hex_to_rgb(hex_codes) -> np.ndarray:
+    """Parse "#RGB" and "#RRGGBB" strings like QColor(name) does."""
+    codes = np.asarray(hex_codes, dtype=str)
+    length = codes.dtype.itemsize // 4
+    if length == 0:
+        raise ValueError("empty hex code")
+
+    # Unicode arrays store one 32 bit code point per character, NUL padded
+    chars = np.ascontiguousarray(codes)[..., None].view(np.uint32).reshape(codes.shape + (length,))
+    lengths = (chars != 0).sum(axis=-1)
+    if length < 4 or (chars[..., 0] != ord("#")).any() or not np.isin(lengths, (4, 7)).all():
+        raise ValueError("hex codes must look like #RGB or #RRGGBB")
+
+    chars = np.where(chars < 256, chars, 0)
+    digits = _HEX_VALUES[chars[..., 1:7]]
+    digits = np.pad(digits, [(0, 0)] * (digits.ndim - 1) + [(0, 6 - digits.shape[-1])])
+
+    long_form = lengths == 7
+    used = np.arange(6) < np.where(long_form, 6, 3)[..., None]
+    if (digits < 0)[used].any():
+        raise ValueError("hex codes may only contain the digits 0-9 and A-F")
+
+    digits = digits.astype(np.int32)
+    return np.where(
+        long_form[..., None],
+        digits[..., 0::2] * 16 + digits[..., 1::2],
+        digits[..., :3] * 17
+    )
+
+
+# Linear sRGB to CIE XYZ (D65) and the D65 reference white
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def srgb_to_linear(rgb) -> np.ndarray:
+    values = np.asarray(rgb, dtype=np.float64) / 255
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def rgb_to_lab(rgb) -> np.ndarray:
+    xyz = srgb_to_linear(_components(rgb, 3)) @ _RGB_TO_XYZ.T / _WHITE
+
+    epsilon = 216 / 24389
+    kappa = 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
@@ -0,0 +1,274 @@
+"""
+WCAG 2.x contrast ratios and APCA lightness contrast against reference colours.
+
+The picked colour is scored as text against the background references and as a
+background against the foreground references:
+
+    checker = contrast.ContrastChecker([(255, 255, 255), (18, 18, 18)], [(0, 0, 0)])
+    checker.score((0.2, 0.4, 0.6))      # Scores(wcag=array([...]), apca=array([...]))
+    checker.suggest(210, 50, 40)        # lightness in percent that passes, or None
+
+The luminances of the references are computed once when they are set, a colour
+update only computes its own two luminances and compares them with all references
+in one NumPy expression.
+
+Both luminances rise with the HSL lightness at any hue and saturation, so the
+lightnesses that fail against one reference form a single interval. The failing
+luminance intervals of all references are merged when the references or targets
+change. A suggestion finds the gap the colour is in and bisects the lightness for
+its two edges, the nearer one wins.
+"""
+
+import bisect
+from typing import NamedTuple
+
+import numpy as np
+
+import float_color
+
+WCAG = "wcag"
+APCA = "apca"
+
+# Large text and UI needs WCAG 3:1 and APCA Lc 45, body text 4.5:1 and Lc 60
+WCAG_TARGET = 4.5
+APCA_TARGET = 60.0
+
+# Text on a white page
+DEFAULT_BACKGROUNDS = ((255, 255, 255),)
+DEFAULT_FOREGROUNDS = ()
+
+# Lightness steps of the bisection, 2 ** -17 is below a 16 bit step
+BISECT_STEPS = 17
+
+# APCA-W3 0.0.98G constants
+_APCA_COEFFICIENTS = (0.2126729, 0.7151522, 0.0721750)
+_APCA_BLACK_CLAMP = 0.022
+_APCA_BLACK_EXPONENT = 1.414
+_APCA_SCALE = 1.14
+_APCA_OFFSET = 0.027
+_APCA_LOW_CLIP = 0.1
+_APCA_MIN_DELTA = 0.0005
+
+_WCAG_COEFFICIENTS = (0.2126, 0.7152, 0.0722)
+
+
+class Scores(NamedTuple):
+    # Ratio from 1 to 21 per reference
+    wcag: np.ndarray
+    # Signed Lc per reference, negative for light text on a dark background
+    apca: np.ndarray
+
+
+def relative_luminance(rgbf) -> np.ndarray:
+    """WCAG relative luminance of sRGB colours in 0 - 1."""
+    linear = float_color.srgb_decode(np.asarray(rgbf, dtype=np.float64))
+    return linear @ np.array(_WCAG_COEFFICIENTS)
+
+
+def apca_luminance(rgbf) -> np.ndarray:
+    """APCA screen luminance, with the soft clamp of near black already applied."""
+    rgbf = np.clip(np.asarray(rgbf, dtype=np.float64), 0, 1)
+    y = rgbf ** 2.4 @ np.array(_APCA_COEFFICIENTS)
+    return np.where(y < _APCA_BLACK_CLAMP,
+                    y + np.abs(_APCA_BLACK_CLAMP - y) ** _APCA_BLACK_EXPONENT, y)
+
+
+def wcag_ratio(luminance, other) -> np.ndarray:
+    lighter = np.maximum(luminance, other)
+    darker = np.minimum(luminance, other)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def apca_contrast(text, background) -> np.ndarray:
+    """Lc of text on background, both apca_luminance() values."""
+    text = np.asarray(text, dtype=np.float64)
+    background = np.asarray(background, dtype=np.float64)
+
+    normal = background > text
+    sapc = np.where(normal, background ** 0.56 - text ** 0.57,
+                    background ** 0.65 - text ** 0.62) * _APCA_SCALE
+    return _apca_lc(sapc, np.abs(background - text))
+
+
+def _apca_lc(sapc: np.ndarray, delta: np.ndarray) -> np.ndarray:
+    # Scaled lightness difference to Lc, with the low contrast clip
+    lc = np.where(sapc >= _APCA_LOW_CLIP, sapc - _APCA_OFFSET,
+                  np.where(sapc <= -_APCA_LOW_CLIP, sapc + _APCA_OFFSET, 0.0))
+    return np.where(delta < _APCA_MIN_DELTA, 0.0, lc * 100)
+
+
+def _hue_factors(hue: float) -> tuple:
+    # Scalar float_color.hsl_to_rgb split in two: a channel is
+    # lightness - saturation * min(lightness, 1 - lightness) * factor, and the
+    # factors only depend on the hue
+    return tuple(max(-1.0, min(k - 3, 9 - k, 1.0))
+                 for k in ((n + hue / 30) % 12 for n in (0, 8, 4)))
+
+
+def _srgb_decode(value: float) -> float:
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _wcag_key(red: float, green: float, blue: float) -> float:
+    red_weight, green_weight, blue_weight = _WCAG_COEFFICIENTS
+    return red_weight * _srgb_decode(red) + green_weight * _srgb_decode(green) + \
+        blue_weight * _srgb_decode(blue)
+
+
+def _apca_key(red: float, green: float, blue: float) -> float:
+    red_weight, green_weight, blue_weight = _APCA_COEFFICIENTS
+    y = red_weight * max(0.0, red) ** 2.4 + green_weight * max(0.0, green) ** 2.4 + \
+        blue_weight * max(0.0, blue) ** 2.4
+    return y + (_APCA_BLACK_CLAMP - y) ** _APCA_BLACK_EXPONENT if y < _APCA_BLACK_CLAMP else y
+
+
+class ContrastChecker:
+    """
+    Scores colours against fixed background and foreground references. Colours are
+    sRGB tuples in 0 - 255 for the references and floats in 0 - 1 for the scored
+    colour, as ColorState.rgbf holds it.
+    """
+
+    def __init__(self, backgrounds=DEFAULT_BACKGROUNDS, foregrounds=DEFAULT_FOREGROUNDS,
+                 standard: str = WCAG, wcag_target: float = WCAG_TARGET,
+                 apca_target: float = APCA_TARGET):
+        self.standard = standard
+        self.wcag_target = wcag_target
+        self.apca_target = apca_target
+        self.set_references(backgrounds, foregrounds)
+
+    def set_references(self, backgrounds, foregrounds):
+        self.backgrounds = [tuple(rgb) for rgb in backgrounds]
+        self.foregrounds = [tuple(rgb) for rgb in foregrounds]
+
+        rgbf = np.array(self.backgrounds + self.foregrounds, dtype=np.float64).reshape(-1, 3) / 255
+        self.luminance = relative_luminance(rgbf)
+        self.apca_y = apca_luminance(rgbf)
+        self.apca_powers = {exponent: self.apca_y ** exponent
+                            for exponent in (0.56, 0.57, 0.62, 0.65)}
+        # The picked colour is text on the first len(backgrounds) references
+        self.is_background = np.arange(len(rgbf)) < len(self.backgrounds)
+        self.update_gaps()
+
+    def set_standard(self, standard: str, target: float = None):
+        self.standard = standard
+        if target is not None:
+            if standard == WCAG:
+                self.wcag_target = target
+            else:
+                self.apca_target = target
+        self.update_gaps()
+
+    def __len__(self) -> int:
+        return len(self.luminance)
+
+    def score(self, rgbf) -> Scores:
+        # Scalar luminances of the one colour, the powers of the references are cached
+        y = _wcag_key(*rgbf)
+        apca_y = _apca_key(*rgbf)
+        wcag = (np.maximum(self.luminance, y) + 0.05) / (np.minimum(self.luminance, y) + 0.05)
+
+        # Reference darker than the colour: normal polarity if the colour is the
+        # background, reverse if it is the text, and the other way round
+        darker = self.apca_y < apca_y
+        sapc = np.where(
+            self.is_background,
+            np.where(darker, self.apca_powers[0.65] - apca_y ** 0.62,
+                     self.apca_powers[0.56] - apca_y ** 0.57),
+            np.where(darker, apca_y ** 0.56 - self.apca_powers[0.57],
+                     apca_y ** 0.65 - self.apca_powers[0.62])) * _APCA_SCALE
+        return Scores(wcag, _apca_lc(sapc, np.abs(self.apca_y - apca_y)))
+
+    def passes(self, scores: Scores) -> tuple:
+        """Whether the colour passes WCAG and APCA against every reference."""
+        if not len(self):
+            return True, True
+        return (bool(scores.wcag.min() >= self.wcag_target),
+                bool(np.abs(scores.apca).min() >= self.apca_target))
+
+    def failing_intervals(self) -> np.ndarray:
+        """(n, 2) luminances per reference between which the standard fails, open."""
+        if self.standard == WCAG:
+            # ratio >= target below (y + 0.05) / target - 0.05 and above
+            # (y + 0.05) * target - 0.05, with y the reference's luminance
+            y = self.luminance + 0.05
+            return np.stack([y / self.wcag_target - 0.05, y * self.wcag_target - 0.05], axis=1)
+
+        # The Lc formulas solved for the colour's luminance, on the dark and light side
+        step = (self.apca_target / 100 + _APCA_OFFSET) / _APCA_SCALE
+        y = self.apca_y
+        with np.errstate(invalid="ignore"):
+            as_text = np.stack([(y ** 0.56 - step) ** (1 / 0.57),
+                                (y ** 0.65 + step) ** (1 / 0.62)], axis=1)
+            as_background = np.stack([(y ** 0.62 - step) ** (1 / 0.65),
+                                      (y ** 0.57 + step) ** (1 / 0.56)], axis=1)
+        intervals = np.where(self.is_background[:, None], as_text, as_background)
+        # Without a dark side nothing below the reference passes
+        intervals[:, 0] = np.nan_to_num(intervals[:, 0], nan=-np.inf)
+        return intervals
+
+    def update_gaps(self):
+        # Merged failing intervals, sorted, as lists for the bisect module
+        self.gap_starts = []
+        self.gap_ends = []
+        for start, end in sorted(self.failing_intervals().tolist()):
+            if self.gap_ends and start < self.gap_ends[-1]:
+                self.gap_ends[-1] = max(self.gap_ends[-1], end)
+            else:
+                self.gap_starts.append(start)
+                self.gap_ends.append(end)
+
+    def suggest(self, hue: float, saturation: float, lightness: float):
+        """
+        Nearest lightness in percent at which hue and saturation pass the current
+        standard against every reference, the lightness itself if it passes and
+        None if no lightness does.
+        """
+        saturation /= 100
+        red, green, blue = _hue_factors(max(0.0, hue))
+        key = _wcag_key if self.standard == WCAG else _apca_key
+
+        def luminance(value: float) -> float:
+            a = saturation * min(value, 1 - value)
+            return key(value - a * red, value - a * green, value - a * blue)
+
+        y = luminance(lightness / 100)
+        index = bisect.bisect_right(self.gap_starts, y) - 1
+        if index < 0 or y <= self.gap_starts[index] or y >= self.gap_ends[index]:
+            return lightness
+
+        candidates = []
+        start, end = self.gap_starts[index], self.gap_ends[index]
+        if start >= luminance(0.0):
+            # Largest lightness whose luminance is at most the gap's start
+            low, high = 0.0, lightness / 100
+            for _ in range(BISECT_STEPS):
+                middle = (low + high) / 2
+                if luminance(middle) <= start:
+                    low = middle
+                else:
+                    high = middle
+            candidates.append(low)
+        if end <= luminance(1.0):
+            low, high = lightness / 100, 1.0
+            for _ in range(BISECT_STEPS):
+                middle = (low + high) / 2
+                if luminance(middle) >= end:
+                    high = middle
+                else:
+                    low = middle
+            candidates.append(high)
+
+        if not candidates:
+            return None
+        return min(candidates, key=lambda value: abs(value - lightness / 100)) * 100
+
+
+def format_scores(checker: ContrastChecker, scores: Scores) -> str:
+    """One line per reference, for a tooltip."""
+    lines = []
+    references = [(rgb, "background") for rgb in checker.backgrounds] + \
+                 [(rgb, "text") for rgb in checker.foregrounds]
+    for (rgb, role), ratio, lc in zip(references, scores.wcag.tolist(), scores.apca.tolist()):
+        lines.append(f"#{'%02X%02X%02X' % rgb} {role}: {ratio:.2f}:1, Lc {lc:.0f}")
+    return "\n".join(lines)
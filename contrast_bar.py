@@ -0,0 +1,126 @@
+from PySide6.QtCore import Qt, Signal, QEvent
+from PySide6.QtGui import QAction, QColor, QCursor, QPainter, QPaintEvent, QPen
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QToolTip, QWidget
+
+import contrast
+import float_color
+import profiler
+
+
+class PyContrastBar(QFrame):
+    """
+    WCAG ratio and APCA Lc of the picked colour against the worst reference, and a
+    swatch with the nearest lightness that passes. A click on the swatch picks it.
+    """
+
+    # Saturation and lightness in percent of the suggested colour
+    suggestion_clicked = Signal(float, float)
+
+    def __init__(self, parent: QWidget = None, height: int = 40):
+        super().__init__(parent)
+
+        self.setFixedHeight(height)
+
+        self.checker = contrast.ContrastChecker()
+        self.rgbf = None
+        self.scores = None
+        self.hsl = (0, 100, 50)
+        self.suggestion = None
+
+        self.label = QLabel(self)
+        self.suggestion_btn = SwatchButton(self)
+        self.suggestion_btn.setFixedSize(100, height - 10)
+        self.suggestion_btn.setCursor(QCursor(Qt.PointingHandCursor))
+        self.suggestion_btn.clicked.connect(
+            lambda: self.suggestion_clicked.emit(self.hsl[1], self.suggestion))
+        self.suggestion_btn.hide()
+
+        self.layout_ = QHBoxLayout(self)
+        self.layout_.setContentsMargins(10, 0, 10, 0)
+        self.layout_.addWidget(self.label)
+        self.layout_.addWidget(self.suggestion_btn)
+
+        self.apca_action = QAction("Suggest by APCA", self)
+        self.apca_action.setCheckable(True)
+        self.apca_action.toggled.connect(self.set_apca)
+        self.addAction(self.apca_action)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+    def set_references(self, backgrounds: list, foregrounds: list):
+        self.checker.set_references(backgrounds, foregrounds)
+        self.refresh()
+
+    def set_apca(self, apca: bool):
+        self.checker.set_standard(contrast.APCA if apca else contrast.WCAG)
+        self.refresh()
+
+    def set_color(self, rgbf: tuple, hue: float, saturation: float, lightness: float):
+        self.rgbf = rgbf
+        self.hsl = hue, saturation, lightness
+        self.refresh()
+
+    @profiler.timed("contrast refresh")
+    def refresh(self):
+        if self.rgbf is None:
+            return
+
+        checker = self.checker
+        self.scores = checker.score(self.rgbf)
+        if not len(checker):
+            self.label.setText("No contrast references")
+            self.suggestion_btn.hide()
+            return
+
+        wcag_passes, apca_passes = checker.passes(self.scores)
+        self.label.setText(
+            f"WCAG {self.scores.wcag.min():.2f}:1 {'✓' if wcag_passes else '✗'}   "
+            f"APCA Lc {abs(self.scores.apca).min():.0f} {'✓' if apca_passes else '✗'}")
+
+        passes = apca_passes if checker.standard == contrast.APCA else wcag_passes
+        self.suggestion = None if passes else checker.suggest(*self.hsl)
+        if self.suggestion is None:
+            self.suggestion_btn.hide()
+            return
+
+        hue, saturation, _ = self.hsl
+        color = QColor.fromRgbF(*float_color.hsl_to_rgb(
+            (max(0, hue), saturation / 100, self.suggestion / 100)).tolist())
+        self.suggestion_btn.set_color(color)
+        self.suggestion_btn.setToolTip(
+            f"Nearest lightness that passes {self.target_text()}: {self.suggestion:.1f}%")
+        self.suggestion_btn.show()
+
+    def target_text(self) -> str:
+        if self.checker.standard == contrast.APCA:
+            return f"APCA Lc {self.checker.apca_target:g}"
+        return f"WCAG {self.checker.wcag_target:g}:1"
+
+    def event(self, event: QEvent) -> bool:
+        # The per reference list is only formatted when it is shown
+        if event.type() == QEvent.ToolTip and self.scores is not None:
+            QToolTip.showText(event.globalPos(), contrast.format_scores(self.checker, self.scores),
+                              self)
+            return True
+        return super().event(event)
+
+
+class SwatchButton(QPushButton):
+    # Painted instead of styled, a style sheet per slider tick would be parsed every time
+
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent)
+        self.color = QColor()
+
+    def set_color(self, color: QColor):
+        if color != self.color:
+            self.color = color
+            self.update()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor("#8A8A8A"), 1))
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(self.rect().adjusted(1, 1, -1, -1), 4, 4)
+        painter.setPen(QColor("#000") if self.color.lightnessF() > 0.5 else QColor("#FFF"))
+        painter.drawText(self.rect(), Qt.AlignCenter, self.color.name().upper())
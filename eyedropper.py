@@ -0,0 +1,156 @@
+import time
+from collections import deque
+
+from PySide6.QtCore import Qt, QPoint, QRect, QTimer, Signal
+from PySide6.QtGui import QColor, QCursor, QGuiApplication, QImage, QKeyEvent, QMouseEvent, \
+    QPainter, QPaintEvent, QPen, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+class Eyedropper(QWidget):
+    """
+    Magnifying loupe that samples the screen colour under the cursor.
+
+    While active only a small square around the cursor is grabbed, at most once per
+    display refresh and only when the cursor moved. The grab is copied into a
+    preallocated image, and the sample is the average of the pixels around the
+    centre. A left click emits color_picked. A right click or Escape cancels.
+    """
+
+    color_picked = Signal(QColor)
+
+    def __init__(self, grab_radius: int = 7, zoom: int = 10, average_radius: int = 1,
+                 label_height: int = 24):
+        super().__init__(None, Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+
+        self.grab_radius = grab_radius
+        self.zoom = zoom
+        self.average_radius = average_radius
+        self.label_height = label_height
+
+        loupe_size = (2 * grab_radius + 1) * zoom
+        self.setFixedSize(loupe_size, loupe_size + label_height)
+
+        self.buffer = QImage()
+        self.color = QColor()
+        self.cursor_pos = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+
+        # Grab plus averaging time of the recent samples in seconds, and how many
+        # samples took longer than one display refresh.
+        self.sample_times = deque(maxlen=240)
+        self.samples = 0
+        self.over_budget = 0
+        self.frame_budget = 1 / 60
+
+    def start(self):
+        screen = QGuiApplication.screenAt(QCursor.pos()) or QGuiApplication.primaryScreen()
+        self.frame_budget = 1 / (screen.refreshRate() or 60)
+
+        self.cursor_pos = None
+        self.timer.setInterval(max(1, int(self.frame_budget * 1000)))
+        self.timer.start()
+
+        self.show()
+        self.grabMouse(QCursor(Qt.CrossCursor))
+        self.grabKeyboard()
+        self.sample()
+
+    def stop(self):
+        self.timer.stop()
+        self.releaseMouse()
+        self.releaseKeyboard()
+        self.hide()
+
+    def sample(self):
+        pos = QCursor.pos()
+        if pos == self.cursor_pos:
+            return
+
+        start = time.perf_counter()
+
+        self.cursor_pos = pos
+        screen = QGuiApplication.screenAt(pos)
+        if screen is None:
+            return
+
+        local = pos - screen.geometry().topLeft()
+        size = 2 * self.grab_radius + 1
+        self.copy_into_buffer(screen.grabWindow(
+            0, local.x() - self.grab_radius, local.y() - self.grab_radius, size, size))
+        self.color = self.average_color()
+
+        elapsed = time.perf_counter() - start
+        self.sample_times.append(elapsed)
+        self.samples += 1
+        if elapsed > self.frame_budget:
+            self.over_budget += 1
+
+        self.move(pos + QPoint(20, 20))
+        self.update()
+
+    def copy_into_buffer(self, pixmap: QPixmap):
+        # The buffer is only reallocated when the grab size changes, e.g. when the
+        # cursor moves to a screen with another device pixel ratio.
+        if self.buffer.size() != pixmap.size():
+            self.buffer = QImage(pixmap.size(), QImage.Format_RGB32)
+        self.buffer.setDevicePixelRatio(pixmap.devicePixelRatio())
+
+        painter = QPainter(self.buffer)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()
+
+    def average_color(self) -> QColor:
+        if self.buffer.isNull():
+            return QColor()
+
+        # At high DPI the averaged area covers the same logical pixels
+        radius = round(self.average_radius * self.buffer.devicePixelRatio())
+        center_x = self.buffer.width() // 2
+        center_y = self.buffer.height() // 2
+
+        red = green = blue = count = 0
+        for y in range(max(0, center_y - radius), min(self.buffer.height(), center_y + radius + 1)):
+            for x in range(max(0, center_x - radius), min(self.buffer.width(), center_x + radius + 1)):
+                pixel = self.buffer.pixel(x, y)
+                red += (pixel >> 16) & 0xFF
+                green += (pixel >> 8) & 0xFF
+                blue += pixel & 0xFF
+                count += 1
+
+        return QColor(round(red / count), round(green / count), round(blue / count))
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        loupe = QRect(0, 0, self.width(), self.width())
+
+        painter.fillRect(self.rect(), QColor("#292929"))
+        if not self.buffer.isNull():
+            painter.drawImage(loupe, self.buffer)
+
+        center = QRect(self.grab_radius * self.zoom, self.grab_radius * self.zoom,
+                       self.zoom, self.zoom)
+        painter.setPen(QPen(QColor("#FFF"), 1))
+        painter.drawRect(center.adjusted(-1, -1, 0, 0))
+
+        label = QRect(0, loupe.height(), self.width(), self.label_height)
+        painter.fillRect(label.adjusted(2, 2, -self.width() + self.label_height - 2, -2), self.color)
+        painter.drawText(label.adjusted(self.label_height, 0, 0, 0), Qt.AlignCenter,
+                         self.color.name(QColor.HexRgb).upper() if self.color.isValid() else "")
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        if event.button() == Qt.LeftButton:
+            self.sample()
+            self.stop()
+            if self.color.isValid():
+                self.color_picked.emit(self.color)
+        else:
+            self.stop()
+
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        if event.key() == Qt.Key_Escape:
+            self.stop()
@@ -0,0 +1,275 @@
+"""
+Float colour pipeline with ICC-aware conversion between colour spaces.
+
+Colours are float32 arrays in 0 - 1 whose last axis holds R, G and B in one of the
+SPACES, or in any space QColorSpace can describe, such as an ICC profile read from
+a file. Between the SPACES, which all have the D65 white point, colours are
+converted in float64 with the primaries' matrices and the sRGB transfer function,
+values outside 0 - 1 are kept. Any other space goes through Qt's colour management
+on a float QImage, which is vectorised as well but only about 12 bits precise.
+
+Gradients for the screen are quantised to 8 bits with an ordered dither, which
+hides their banding. Images for export keep 16 bits per channel and carry their
+colour space, the PNG and TIFF writers embed it as an ICC profile.
+"""
+
+import numpy as np
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColorSpace, QImage
+
+SPACES = {
+    "srgb": QColorSpace.SRgb,
+    "display-p3": QColorSpace.DisplayP3,
+    "linear-srgb": QColorSpace.SRgbLinear,
+}
+
+# CIE xy of the red, green and blue primaries and of the D65 white point
+SRGB_PRIMARIES = ((0.64, 0.33), (0.30, 0.60), (0.15, 0.06))
+P3_PRIMARIES = ((0.680, 0.320), (0.265, 0.690), (0.150, 0.060))
+D65 = (0.3127, 0.3290)
+
+
+def rgb_to_xyz_matrix(primaries, white=D65) -> np.ndarray:
+    def xyz(x, y):
+        return np.array([x / y, 1, (1 - x - y) / y])
+
+    columns = np.stack([xyz(*primary) for primary in primaries], axis=1)
+    scale = np.linalg.solve(columns, xyz(*white))
+    return columns * scale
+
+
+_SRGB_TO_XYZ = rgb_to_xyz_matrix(SRGB_PRIMARIES)
+
+# Primaries and whether values are encoded with the sRGB transfer function
+_SPACE_MODELS = {
+    "srgb": (_SRGB_TO_XYZ, True),
+    "display-p3": (rgb_to_xyz_matrix(P3_PRIMARIES), True),
+    "linear-srgb": (_SRGB_TO_XYZ, False),
+}
+
+# Linear sRGB to cone responses and the cube roots of those to OKLab
+_LINEAR_SRGB_TO_LMS = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+])
+_LMS_TO_OKLAB = np.array([
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660],
+])
+_OKLAB_TO_LMS = np.linalg.inv(_LMS_TO_OKLAB)
+_LMS_TO_LINEAR_SRGB = np.linalg.inv(_LINEAR_SRGB_TO_LMS)
+
+# Normalised 8x8 Bayer matrix, thresholds in (0, 1)
+BAYER = np.array([
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21],
+], dtype=np.float32) / 64 + np.float32(1 / 128)
+
+# QImage sizes are limited, long colour lists are converted in rows of this width
+CONVERT_WIDTH = 4096
+
+
+def color_space(space) -> QColorSpace:
+    """A QColorSpace, one of SPACES or the path of an ICC profile."""
+    if isinstance(space, QColorSpace):
+        return space
+    if space in SPACES:
+        return QColorSpace(SPACES[space])
+
+    with open(space, "rb") as file:
+        result = QColorSpace.fromIccProfile(file.read())
+    if not result.isValid():
+        raise ValueError(f"{space} is not a usable ICC profile")
+    return result
+
+
+def hsl_to_rgb(hsl) -> np.ndarray:
+    """sRGB in 0 - 1 of hue in degrees, saturation and lightness in 0 - 1, unrounded."""
+    hsl = np.asarray(hsl, dtype=np.float64)
+    hue, saturation, lightness = hsl[..., 0:1], hsl[..., 1:2], hsl[..., 2:3]
+
+    k = (np.array([0, 8, 4]) + hue / 30) % 12
+    a = saturation * np.minimum(lightness, 1 - lightness)
+    return lightness - a * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+
+
+def rgb_to_hsl(rgb) -> np.ndarray:
+    """Hue in degrees, saturation and lightness in 0 - 1, the inverse of hsl_to_rgb."""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    high = rgb.max(axis=-1)
+    low = rgb.min(axis=-1)
+    chroma = high - low
+    lightness = (high + low) / 2
+
+    # Achromatic colours get hue and saturation 0, the divisions by 0 are discarded
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hue = np.select(
+            [chroma == 0, high == red, high == green],
+            [0, (green - blue) / chroma % 6, (blue - red) / chroma + 2],
+            (red - green) / chroma + 4) * 60
+        saturation = np.where(chroma == 0, 0, chroma / (1 - np.abs(2 * lightness - 1)))
+    return np.stack([hue, saturation, lightness], axis=-1)
+
+
+def srgb_to_oklab(rgb) -> np.ndarray:
+    """OKLab of sRGB in 0 - 1, float64."""
+    lms = srgb_decode(np.asarray(rgb, dtype=np.float64)) @ _LINEAR_SRGB_TO_LMS.T
+    return np.cbrt(lms) @ _LMS_TO_OKLAB.T
+
+
+def oklab_to_srgb(lab) -> np.ndarray:
+    """sRGB of OKLab, colours outside the gamut leave 0 - 1."""
+    lms = (np.asarray(lab, dtype=np.float64) @ _OKLAB_TO_LMS.T) ** 3
+    return srgb_encode(lms @ _LMS_TO_LINEAR_SRGB.T)
+
+
+def srgb_decode(values: np.ndarray) -> np.ndarray:
+    # Mirrored at zero, so out of gamut colours with negative components survive
+    magnitude = np.abs(values)
+    linear = np.where(magnitude <= 0.04045, magnitude / 12.92,
+                      ((magnitude + 0.055) / 1.055) ** 2.4)
+    return np.copysign(linear, values)
+
+
+def srgb_encode(values: np.ndarray) -> np.ndarray:
+    magnitude = np.abs(values)
+    encoded = np.where(magnitude <= 0.0031308, magnitude * 12.92,
+                       1.055 * magnitude ** (1 / 2.4) - 0.055)
+    return np.copysign(encoded, values)
+
+
+def _pixels(image: QImage, dtype, channels: int) -> np.ndarray:
+    # (height, width, channels) view of the image memory, without the row padding
+    height, width = image.height(), image.width()
+    rows = np.frombuffer(image.bits(), dtype).reshape(
+        height, image.bytesPerLine() // np.dtype(dtype).itemsize)
+    return rows[:, :width * channels].reshape(height, width, channels)
+
+
+def float_image(rgb: np.ndarray, space="srgb") -> QImage:
+    """Opaque RGBA32FPx4 image of an (height, width, 3) array, tagged with space."""
+    height, width = rgb.shape[:2]
+    image = QImage(width, height, QImage.Format_RGBA32FPx4)
+    image.setColorSpace(color_space(space))
+
+    pixels = _pixels(image, np.float32, 4)
+    pixels[..., :3] = rgb
+    pixels[..., 3] = 1
+    return image
+
+
+def image_array(image: QImage) -> np.ndarray:
+    """RGB of a float image as an (height, width, 3) array."""
+    if image.format() != QImage.Format_RGBA32FPx4:
+        image = image.convertToFormat(QImage.Format_RGBA32FPx4)
+    return _pixels(image, np.float32, 4)[..., :3].copy()
+
+
+def convert(rgb, source="srgb", target="display-p3") -> np.ndarray:
+    """Convert colours of any leading shape from source to target."""
+    # float64 input stays float64 between the SPACES, everything else is float32
+    rgb = np.asarray(rgb)
+    if rgb.dtype != np.float64:
+        rgb = rgb.astype(np.float32)
+    if isinstance(source, str) and isinstance(target, str) \
+            and source in _SPACE_MODELS and target in _SPACE_MODELS:
+        return _convert_exact(rgb, source, target)
+    return _convert_icc(rgb, source, target)
+
+
+def _convert_exact(rgb: np.ndarray, source: str, target: str) -> np.ndarray:
+    if source == target:
+        return rgb.copy()
+
+    source_matrix, source_encoded = _SPACE_MODELS[source]
+    target_matrix, target_encoded = _SPACE_MODELS[target]
+
+    values = rgb.astype(np.float64)
+    if source_encoded:
+        values = srgb_decode(values)
+    if source_matrix is not target_matrix:
+        values = values @ (np.linalg.inv(target_matrix) @ source_matrix).T
+    if target_encoded:
+        values = srgb_encode(values)
+    return values.astype(rgb.dtype)
+
+
+def _convert_icc(rgb: np.ndarray, source, target) -> np.ndarray:
+    rgb = rgb.astype(np.float32)
+    shape = rgb.shape
+    colors = rgb.reshape(-1, 3)
+    count = len(colors)
+    if count == 0:
+        return rgb.copy()
+
+    # Padded to whole rows, the padding is cut off again below
+    width = min(count, CONVERT_WIDTH)
+    rows = -(-count // width)
+    padded = np.zeros((rows * width, 3), dtype=np.float32)
+    padded[:count] = colors
+
+    image = float_image(padded.reshape(rows, width, 3), source)
+    converted = image.convertedToColorSpace(color_space(target))
+    return image_array(converted).reshape(-1, 3)[:count].reshape(shape)
+
+
+def quantize(rgb: np.ndarray, maximum: int = 255, dtype=np.uint8, row: int = 0) -> np.ndarray:
+    """Ordered dither of an (height, width, 3) array to integers in 0 - maximum."""
+    height, width = rgb.shape[:2]
+    rows = (np.arange(height) + row) % 8
+    columns = np.arange(width) % 8
+    threshold = BAYER[rows[:, None], columns[None, :]][..., None]
+    return np.clip(np.floor(rgb * maximum + threshold), 0, maximum).astype(dtype)
+
+
+def _rgb32(rgb8: np.ndarray) -> np.ndarray:
+    rgb8 = rgb8.astype(np.uint32)
+    return 0xFF000000 | (rgb8[..., 0] << 16) | (rgb8[..., 1] << 8) | rgb8[..., 2]
+
+
+def export_image(rgb: np.ndarray, space="srgb") -> QImage:
+    """16 bit image that keeps the float precision and its colour space."""
+    height, width = rgb.shape[:2]
+    image = QImage(width, height, QImage.Format_RGBA64)
+    image.setColorSpace(color_space(space))
+
+    pixels = _pixels(image, np.uint16, 4)
+    pixels[..., :3] = quantize(rgb, 65535, np.uint16)
+    pixels[..., 3] = 65535
+    return image
+
+
+def gradient(start, end, width: int, height: int, mix="linear-srgb",
+             image: QImage = None) -> QImage:
+    """
+    Horizontal gradient between two sRGB colours for the screen, interpolated in
+    the mix space. A previous gradient of the same size can be passed as image,
+    its memory is reused.
+
+    Every column has one colour, so only width colours are converted. The dither
+    repeats every 8 rows, 8 rows are quantised and copied down the image.
+    """
+    ends = convert(np.array([start, end], dtype=np.float32), "srgb", mix)
+    weights = np.linspace(0, 1, width, dtype=np.float32)[:, None]
+    colors = convert(ends[0] + (ends[1] - ends[0]) * weights, mix, "srgb")
+
+    band = _rgb32(quantize(np.broadcast_to(colors, (min(height, 8), width, 3))))
+
+    # Writing to fresh memory costs several times more than the copy itself
+    if image is None or image.size() != QSize(width, height) \
+            or image.format() != QImage.Format_RGB32:
+        image = QImage(width, height, QImage.Format_RGB32)
+    pixels = _pixels(image, np.uint32, 1)[..., 0]
+    whole = height - height % 8
+    pixels[:whole].reshape(-1, 8, width)[:] = band
+    pixels[whole:] = band[:height - whole]
+    return image
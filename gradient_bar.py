@@ -0,0 +1,40 @@
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QPainter, QPaintEvent
+from PySide6.QtWidgets import QFrame, QWidget
+
+import float_color
+import palette_generator
+
+
+class PyGradientBar(QFrame):
+    """
+    Dithered gradient from a colour to its complement, mixed in linear light. The
+    image is rendered at the device pixel ratio and its memory reused.
+    """
+
+    def __init__(self, parent: QWidget = None, height: int = 30, mix: str = "linear-srgb"):
+        super().__init__(parent)
+
+        self.setFixedHeight(height)
+        self.mix = mix
+        self.rgbf = (1.0, 0.0, 0.0)
+        self.image = None
+
+    def set_color(self, rgbf: tuple):
+        if rgbf != self.rgbf:
+            self.rgbf = rgbf
+            self.update()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        dpr = self.devicePixelRatioF()
+        rect = self.contentsRect().adjusted(10, 0, -10, 0)
+        width, height = round(rect.width() * dpr), round(rect.height() * dpr)
+        if width <= 0 or height <= 0:
+            return
+
+        start, end = palette_generator.harmony(self.rgbf, "complementary").tolist()
+        self.image = float_color.gradient(start, end, width, height, self.mix, self.image)
+        self.image.setDevicePixelRatio(dpr)
+
+        painter = QPainter(self)
+        painter.drawImage(QRectF(rect), self.image)
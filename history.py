@@ -0,0 +1,268 @@
+"""
+Persistent colour history in an append-only log of fixed size records.
+
+    header   32 bytes   magic "PCHL", version, record size, committed count
+    record   16 bytes   R, G, B, A, timestamp (ms since the epoch), source
+
+A single writer appends a record and only then bumps the committed count in the
+header. Readers memory-map the file and never look past the count, so they need no
+lock and always see whole records. One process at a time can hold the writer, it
+keeps an exclusive lock on "<log>.lock".
+
+Compaction keeps the newest records. It copies them to a new file in a background
+thread and swaps the file in with an atomic rename, readers notice the new file
+on their next refresh() and map it. On systems where an open file cannot be
+replaced the compaction is skipped.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from PySide6.QtCore import QStandardPaths
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+MAGIC = b"PCHL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ16x")
+RECORD = struct.Struct("<4BqB3x")
+COUNT_OFFSET = 8
+
+RECORD_DTYPE = np.dtype([("rgba", np.uint8, 4), ("timestamp", "<i8"), ("source", np.uint8),
+                         ("padding", np.uint8, 3)])
+
+# Stored as the index, new sources only ever go to the end
+SOURCES = ("hex", "rgb", "cmyk", "screenshot", "eyedropper", "all")
+
+# The file grows in steps of this many records, so appends rarely resize it
+GROW_RECORDS = 1024
+
+
+class HistoryRecord(NamedTuple):
+    rgba: tuple
+    # Seconds since the epoch
+    timestamp: float
+    source: str
+
+
+class HistoryLocked(OSError):
+    """Another process holds the writer."""
+
+
+def default_path() -> str:
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation),
+                        "py_color_picker", "history.log")
+
+
+class HistoryReader:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.map = None
+        self.inode = None
+        self.open()
+
+    def open(self):
+        self.unmap()
+        self.file = open(self.path, "rb")
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.remap()
+
+    def remap(self):
+        if self.map is not None:
+            self.map.close()
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, _ = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.path} is not a colour history log")
+
+    def unmap(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        self.unmap()
+
+    def refresh(self):
+        """Pick up a compacted file or a file that grew beyond the mapping."""
+        try:
+            replaced = os.stat(self.path).st_ino != self.inode
+        except OSError:
+            replaced = False
+        if replaced:
+            self.open()
+        elif HEADER.size + len(self) * RECORD.size > len(self.map):
+            self.remap()
+
+    def __len__(self) -> int:
+        return struct.unpack_from("<Q", self.map, COUNT_OFFSET)[0]
+
+    def records(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Copy of the records in [start, stop) as a RECORD_DTYPE array."""
+        self.refresh()
+        count = len(self)
+        start, stop, _ = slice(start, stop).indices(count)
+        if stop <= start:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.frombuffer(self.map, dtype=RECORD_DTYPE, count=stop - start,
+                             offset=HEADER.size + start * RECORD.size).copy()
+
+    def recent(self, count: int) -> list:
+        """The newest count records, newest first."""
+        return [HistoryRecord(tuple(record["rgba"].tolist()), int(record["timestamp"]) / 1000,
+                              SOURCES[record["source"]] if record["source"] < len(SOURCES) else "")
+                for record in self.records(-count)[::-1]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HistoryWriter(HistoryReader):
+    def __init__(self, path: str = None, max_records: int = 10000):
+        path = path or default_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.max_records = max_records
+        self.mutex = threading.RLock()
+        self.compacting = None
+        self.fd = None
+
+        self.lock_file = open(path + ".lock", "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.lock_file.close()
+            raise HistoryLocked(f"{path} is written by another process")
+
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            self.create(path, b"")
+
+        super().__init__(path)
+        self.fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        # The only writer always knows the count, it never has to read it back
+        self.count = super().__len__()
+
+    @staticmethod
+    def create(path: str, records: bytes):
+        count = len(records) // RECORD.size
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count))
+            file.write(records)
+            file.truncate(HEADER.size + (count + GROW_RECORDS) * RECORD.size)
+        os.replace(temporary, path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        compacting = self.compacting
+        if compacting is not None:
+            compacting.join()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        super().close()
+        self.lock_file.close()
+
+    def write_at(self, data: bytes, offset: int):
+        if hasattr(os, "pwrite"):
+            os.pwrite(self.fd, data, offset)
+        else:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            os.write(self.fd, data)
+
+    def read_at(self, size: int, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self.fd, size, offset)
+        with self.mutex:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.read(self.fd, size)
+
+    def append(self, rgba, source: str, timestamp: float = None) -> int:
+        """Append a colour, returns the number of records."""
+        rgba = tuple(rgba) + (255,) * (4 - len(rgba))
+        milliseconds = round((time.time() if timestamp is None else timestamp) * 1000)
+        record = RECORD.pack(*rgba, milliseconds, SOURCES.index(source))
+
+        with self.mutex:
+            offset = HEADER.size + self.count * RECORD.size
+            if offset + RECORD.size > os.fstat(self.fd).st_size:
+                os.ftruncate(self.fd, offset + GROW_RECORDS * RECORD.size)
+
+            # The record has to be complete before the count makes it visible
+            self.write_at(record, offset)
+            self.write_at(struct.pack("<Q", self.count + 1), COUNT_OFFSET)
+            self.count += 1
+            count = self.count
+
+        if count > 2 * self.max_records and self.compacting is None:
+            self.compact_in_background()
+        return count
+
+    def records(self, start: int = 0, stop: int = None) -> np.ndarray:
+        # A compaction may swap the mapping from its thread
+        with self.mutex:
+            return super().records(start, stop)
+
+    def refresh(self):
+        if self.map is not None and HEADER.size + self.count * RECORD.size > len(self.map):
+            self.remap()
+
+    def compact(self, keep: int = None) -> bool:
+        """Keep the newest keep records (max_records by default)."""
+        keep = self.max_records if keep is None else keep
+
+        # The bulk copy runs without the mutex, appends go on meanwhile and only
+        # their records are copied after taking it.
+        snapshot = self.count
+        start = max(0, snapshot - keep)
+        records = self.read_at((snapshot - start) * RECORD.size, HEADER.size + start * RECORD.size)
+
+        with self.mutex:
+            records += self.read_at((self.count - snapshot) * RECORD.size,
+                                    HEADER.size + snapshot * RECORD.size)
+            try:
+                self.create(self.path, records)
+            except PermissionError:
+                return False
+
+            os.close(self.fd)
+            self.fd = os.open(self.path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+            self.open()
+            self.count = len(records) // RECORD.size
+        return True
+
+    def compact_in_background(self, keep: int = None):
+        def run():
+            try:
+                self.compact(keep)
+            finally:
+                self.compacting = None
+
+        self.compacting = threading.Thread(target=run, name="history compaction", daemon=True)
+        self.compacting.start()
@@ -0,0 +1,106 @@
+"""
+Saturation/lightness square of one hue, rendered with NumPy into a QImage.
+
+Columns go from saturation 0 to 100, rows from lightness 100 at the top to 0. In
+HSL every pixel of the square is
+
+    gray(l) + chroma(l, s) * (hue_rgb - 0.5)
+
+and of the hue's RGB one channel is 1, one is 0 and only the middle one depends
+on the hue. The largest and smallest channel are the same for every hue and are
+precomputed per size, a new hue only computes the middle channel and packs the
+three straight into the image buffer. The last CACHE_SIZE squares are kept, so
+dragging back and forth over the same hues only blits.
+
+The channels are computed in float and quantised with an ordered dither instead
+of rounding, which keeps the dark corner free of bands. The threshold pattern is
+part of the per size tables, so dithering costs nothing per hue.
+"""
+
+from collections import Counter, OrderedDict
+
+import numpy as np
+from PySide6.QtGui import QImage
+
+import float_color
+
+CACHE_SIZE = 32
+
+# Channels (largest, middle, smallest) of the hue in each 60 degree sector
+SECTOR_CHANNELS = ((0, 1, 2), (1, 0, 2), (1, 2, 0), (2, 1, 0), (2, 0, 1), (0, 2, 1))
+# Bit positions of red, green and blue in a 0xffRRGGBB pixel
+CHANNEL_SHIFTS = (16, 8, 0)
+
+_tables = {}
+_images = OrderedDict()
+
+# Hits and misses of the image cache
+stats = Counter()
+
+
+def tables(size: int) -> tuple:
+    cached = _tables.get(size)
+    if cached is not None:
+        return cached
+
+    lightness = np.linspace(1, 0, size, dtype=np.float32)[:, None]
+    saturation = np.linspace(0, 1, size, dtype=np.float32)[None, :]
+    chroma = (saturation * (1 - np.abs(2 * lightness - 1)) * 255).astype(np.float32)
+    # The dither threshold is added before the float channels are truncated
+    threshold = np.tile(float_color.BAYER, (size // 8 + 1, size // 8 + 1))[:size, :size]
+    gray = (lightness * 255 + threshold).astype(np.float32)
+    largest = np.minimum(gray + chroma / 2, 255).astype(np.uint32)
+    smallest = np.maximum(gray - chroma / 2, 0).astype(np.uint32)
+
+    # Scratch buffers, rendering only ever happens on the GUI thread
+    cached = (gray, chroma, largest, smallest,
+              np.empty((size, size), np.float32), np.empty((size, size), np.uint32))
+    _tables[size] = cached
+    return cached
+
+
+def render(hue: float, size: int) -> QImage:
+    gray, chroma, largest, smallest, middle, shifted = tables(size)
+
+    sector, position = divmod((hue % 360) / 60, 1)
+    sector = int(sector)
+    # The middle channel rises in even sectors and falls in odd ones
+    factor = (position if sector % 2 == 0 else 1 - position) - 0.5
+    large_channel, middle_channel, small_channel = SECTOR_CHANNELS[sector]
+
+    # RGB32 is what the raster backing store uses, so painting it is a plain copy
+    image = QImage(size, size, QImage.Format_RGB32)
+    pixels = np.frombuffer(image.bits(), np.uint32).reshape(
+        size, image.bytesPerLine() // 4)[:, :size]
+
+    np.multiply(chroma, factor, out=middle)
+    middle += gray
+    np.copyto(pixels, middle, casting="unsafe")
+    pixels <<= CHANNEL_SHIFTS[middle_channel]
+    np.left_shift(largest, CHANNEL_SHIFTS[large_channel], out=shifted)
+    pixels |= shifted
+    np.left_shift(smallest, CHANNEL_SHIFTS[small_channel], out=shifted)
+    pixels |= shifted
+    pixels |= 0xFF000000
+    return image
+
+
+def image(hue: float, size: int) -> QImage:
+    key = hue, size
+    cached = _images.get(key)
+    if cached is not None:
+        stats["hits"] += 1
+        _images.move_to_end(key)
+        return cached
+
+    stats["misses"] += 1
+    cached = _images[key] = render(hue, size)
+    if len(_images) > CACHE_SIZE:
+        _images.popitem(last=False)
+    return cached
+
+
+def clear():
+    _tables.clear()
+    _images.clear()
+    stats.clear()
@@ -0,0 +1,79 @@
+"""
+Pointer and scroll input applied at most once per display frame.
+
+A 1000 Hz mouse sends many more moves than a 60 Hz screen can show. The
+coalescer only keeps the latest state, or merges it with the pending one, and
+applies it when the next frame is due. The frame interval comes from the refresh
+rate of the widget's screen. Nothing runs while no input arrives, the timer is
+single shot and only started by new input.
+"""
+
+import math
+import time
+
+from PySide6.QtCore import QObject, Qt, QTimer
+from PySide6.QtWidgets import QWidget
+
+import profiler
+
+# Used when the platform does not report a refresh rate
+FALLBACK_REFRESH_RATE = 60.0
+
+
+class InputCoalescer(QObject):
+    # Tests that send an event and check its effect right away turn this off
+    enabled = True
+
+    def __init__(self, widget: QWidget, apply):
+        super().__init__(widget)
+
+        self.widget = widget
+        self.apply = apply
+
+        self.pending = None
+        self.last_applied = -math.inf
+
+        # Inputs pushed and states applied, received / applied is the saving
+        self.received = 0
+        self.applied = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+
+    def frame_interval(self) -> float:
+        """Milliseconds between two frames of the widget's screen."""
+        screen = self.widget.screen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return 1000 / (rate if rate > 0 else FALLBACK_REFRESH_RATE)
+
+    def push(self, state, merge=None):
+        """Queue state, merge(pending, state) combines it with a pending one."""
+        self.received += 1
+        if self.pending is not None and merge is not None:
+            state = merge(self.pending, state)
+        self.pending = state
+        profiler.hop_start(self)
+
+        if not self.enabled:
+            self.flush()
+        elif not self.timer.isActive():
+            due = self.last_applied + self.frame_interval() - time.monotonic() * 1000
+            self.timer.start(math.ceil(max(0.0, due)))
+
+    def flush(self):
+        """Apply the pending state now, for example when the button is released."""
+        self.timer.stop()
+        if self.pending is None:
+            return
+
+        state, self.pending = self.pending, None
+        profiler.hop_end(self, "coalesced input to apply")
+        self.applied += 1
+        self.last_applied = time.monotonic() * 1000
+        self.apply(state)
+
+    def discard(self):
+        self.timer.stop()
+        self.pending = None
@@ -1,42 +1,92 @@
 import sys
 
+from PySide6.QtCore import QTimer, QUrl
 from PySide6.QtGui import QIcon, QAction, QDesktopServices
 from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
 
-from color_window import ColorWindow
+import color_server
+import pixmap_cache
+import profiler
 
+# Milliseconds between the tray coming up and building the window in the background,
+# so a login with autostart is not slowed down. A negative value disables it.
+PREWARM_DELAY = 3000
 
-def main():
-    app = QApplication(sys.argv)
-    app.setQuitOnLastWindowClosed(False)
 
-    icon = QIcon("icons/tray_icon.png")
+class ColorTray(QSystemTrayIcon):
+    """
+    The tray icon comes up first. The window, and with it NumPy and everything
+    else the picker imports, is built on the first open or once the tray is idle.
+    """
 
-    tray = QSystemTrayIcon()
-    tray.setIcon(icon)
-    tray.setVisible(True)
+    def __init__(self, prewarm_delay: int = PREWARM_DELAY, server=None):
+        super().__init__(QIcon(pixmap_cache.resolve("icons/tray_icon.png")))
+
+        self.window = None
+        self.server = server
 
-    menu = QMenu()
-    window = ColorWindow()
+        self.menu = QMenu()
 
-    close_action = QAction("Schließen")
-    close_action.triggered.connect(app.quit)
+        self.close_action = QAction("Schließen")
+        self.close_action.triggered.connect(QApplication.quit)
 
-    open_action = QAction("Fenster öffnen")
-    open_action.triggered.connect(window.show)
+        self.open_action = QAction("Fenster öffnen")
+        self.open_action.triggered.connect(self.open_window)
 
-    google_color_picker_action = QAction("Color Picker Google")
-    google_color_picker_action.triggered.connect(
-        QDesktopServices.openUrl(
-            "https://imagecolorpicker.com/color-code/0051ff"
+        self.google_color_picker_action = QAction("Color Picker Google")
+        self.google_color_picker_action.triggered.connect(
+            lambda: QDesktopServices.openUrl(
+                QUrl("https://imagecolorpicker.com/color-code/0051ff")
+            )
         )
-    )
 
-    menu.addAction(close_action)
-    menu.addAction(open_action)
-    menu.addAction(google_color_picker_action)
+        self.menu.addAction(self.close_action)
+        self.menu.addAction(self.open_action)
+        self.menu.addAction(self.google_color_picker_action)
+
+        self.setContextMenu(self.menu)
+
+        if prewarm_delay >= 0:
+            QTimer.singleShot(prewarm_delay, self.prewarm)
+
+    def prewarm(self):
+        if self.window is not None:
+            return
+
+        # Imports and construction run in separate event loop turns so neither
+        # blocks the tray menu for long.
+        import color_window  # noqa: F401
+        QTimer.singleShot(0, self.get_window)
+
+    def get_window(self):
+        if self.window is None:
+            from color_window import ColorWindow
+            self.window = ColorWindow()
+            if self.server is not None:
+                self.server.set_state(self.window.color_picker.state)
+        return self.window
+
+    def open_window(self):
+        window = self.get_window()
+        window.show()
+        window.raise_()
+        window.activateWindow()
+
+
+def main():
+    profiler.enable_from_environment()
+
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+
+    # The served colour is the picker's, so the window is built right away
+    server = color_server.start_from_environment()
+    tray = ColorTray(0 if server is not None else PREWARM_DELAY, server)
+    tray.setVisible(True)
+    if server is not None:
+        # Disconnects the clients while the sockets are still whole
+        app.aboutToQuit.connect(server.close)
 
-    tray.setContextMenu(menu)
     sys.exit((app.exec_()))
 
 
@@ -0,0 +1,436 @@
+"""
+Nearest named colour lookup.
+
+Palettes are plain text files in the X11 rgb.txt format, one colour per line as
+"R G B name" or "#RRGGBB name", "!" starts a comment. The CSS and X11 names ship in
+palettes/, further files dropped there (brand palettes, ...) are picked up as well:
+
+    index = named_colors.default_index()
+    index.nearest((255, 99, 70))        # NamedColor('tomato', (255, 99, 71), 'css', 0.5)
+    index.nearest_many(rgb_array)       # names, palettes and distances as arrays
+
+Distances are CIE76 delta E, the euclidean distance in CIELAB. Every palette gets
+its own k-d tree, built lazily on the first query, so adding a palette never
+rebuilds the others. A whole index including its trees is saved to and loaded from
+a single .npz file, default_index() keeps one in the user cache directory.
+"""
+
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+from PySide6.QtCore import QStandardPaths
+
+import colorspace
+
+PALETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "palettes")
+
+
+class NamedColor(NamedTuple):
+    name: str
+    rgb: tuple
+    palette: str
+    distance: float
+
+
+def read_palette(path: str) -> tuple:
+    """Return the names and an (n, 3) RGB array of a palette file."""
+    names, rgb = [], []
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("!"):
+                continue
+
+            try:
+                if line.startswith("#"):
+                    code, name = line.split(None, 1)
+                    rgb.append(tuple(colorspace.hex_to_rgb(code).tolist()))
+                else:
+                    red, green, blue, name = line.split(None, 3)
+                    rgb.append((int(red), int(green), int(blue)))
+            except ValueError:
+                raise ValueError(f"{path}, line {number}: expected 'R G B name' or '#RRGGBB name'")
+            names.append(name.strip())
+
+    return names, np.array(rgb, dtype=np.uint8).reshape(-1, 3)
+
+
+class KDTree:
+    """
+    Static k-d tree over 3D points with the nodes stored in flat arrays.
+
+    Node i has the children 2i+1 and 2i+2, the tree is complete and every range is
+    split at its median along the axis of largest spread, so the leaves are
+    contiguous ranges of `order` with at most leaf_size points. Single queries walk
+    the tree in plain Python, which is cheaper than NumPy for a handful of points
+    per step. query_many descends with all points at once and prunes by bounding
+    boxes level by level.
+    """
+
+    BRUTE_FORCE_SIZE = 2048
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        leaf_size = max(2, leaf_size)
+        depth = max(0, math.ceil(math.log2(len(points) / leaf_size))) if len(points) else 0
+
+        order = np.arange(len(points))
+        dims = np.zeros(2 ** depth - 1, dtype=np.int8)
+        splits = np.zeros(2 ** depth - 1)
+        bounds = [0, len(points)]
+
+        node = 0
+        for _ in range(depth):
+            level_bounds = [0]
+            for low, high in zip(bounds[:-1], bounds[1:]):
+                middle = (low + high) // 2
+                indices = order[low:high]
+                if high - low > 1:
+                    values = points[indices]
+                    dim = int(np.argmax(np.ptp(values, axis=0)))
+                    order[low:high] = indices[np.argpartition(values[:, dim], middle - low)]
+                    dims[node] = dim
+                    splits[node] = points[order[middle], dim]
+                node += 1
+                level_bounds += [middle, high]
+            bounds = level_bounds
+
+        self.points = points
+        self.order = order
+        self.dims = dims
+        self.splits = splits
+        self.bounds = np.array(bounds)
+        self.prepare()
+
+    @classmethod
+    def from_arrays(cls, points, order, dims, splits, bounds) -> "KDTree":
+        tree = cls.__new__(cls)
+        tree.points = points
+        tree.order = order
+        tree.dims = dims
+        tree.splits = splits
+        tree.bounds = bounds
+        tree.prepare()
+        return tree
+
+    def arrays(self) -> dict:
+        return {"points": self.points, "order": self.order, "dims": self.dims,
+                "splits": self.splits, "bounds": self.bounds}
+
+    def prepare(self):
+        self.internal = len(self.dims)
+        self.depth = int(math.log2(self.internal + 1))
+        leaves = len(self.bounds) - 1
+        sizes = np.diff(self.bounds)
+
+        # Leaf points padded to the largest leaf, padding is infinitely far away
+        width = int(sizes.max(initial=0))
+        slots = self.bounds[:-1, None] + np.arange(width)
+        valid = np.arange(width) < sizes[:, None]
+        self.leaf_index = np.where(valid, self.order[np.minimum(slots, len(self.order) - 1)]
+                                   if len(self.order) else 0, -1)
+        self.leaf_points = np.where(valid[..., None], self.points[self.leaf_index], np.inf)
+
+        # Bounding boxes of all nodes, leaves first and then every level from the
+        # bottom up.
+        self.low = np.full((self.internal + leaves, 3), np.inf)
+        self.high = np.full((self.internal + leaves, 3), -np.inf)
+        self.low[self.internal:] = self.leaf_points.min(axis=1, initial=np.inf)
+        self.high[self.internal:] = np.where(valid[..., None], self.leaf_points, -np.inf).max(
+            axis=1, initial=-np.inf)
+        for level in range(self.depth - 1, -1, -1):
+            nodes = np.arange(2 ** level - 1, 2 ** (level + 1) - 1)
+            self.low[nodes] = np.minimum(self.low[2 * nodes + 1], self.low[2 * nodes + 2])
+            self.high[nodes] = np.maximum(self.high[2 * nodes + 1], self.high[2 * nodes + 2])
+
+        # Plain Python copies for single queries, built on the first one
+        self.python_nodes = None
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(self, point) -> tuple:
+        """Return (index, squared distance) of the point closest to point."""
+        if self.python_nodes is None:
+            self.python_nodes = (
+                self.dims.tolist(),
+                self.splits.tolist(),
+                [[(*self.points[index].tolist(), index) for index in leaf[leaf >= 0].tolist()]
+                 for leaf in self.leaf_index]
+            )
+        dims, splits, leaves = self.python_nodes
+        internal = self.internal
+        x, y, z = point
+
+        best_distance, best_index = math.inf, -1
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound > best_distance:
+                continue
+
+            while node < internal:
+                difference = point[dims[node]] - splits[node]
+                if difference >= 0:
+                    stack.append((2 * node + 1, difference * difference))
+                    node = 2 * node + 2
+                else:
+                    stack.append((2 * node + 2, difference * difference))
+                    node = 2 * node + 1
+
+            for px, py, pz, index in leaves[node - internal]:
+                distance = (px - x) * (px - x) + (py - y) * (py - y) + (pz - z) * (pz - z)
+                # Ties go to the lower index, the same as in query_many
+                if distance < best_distance or (distance == best_distance and index < best_index):
+                    best_distance, best_index = distance, index
+
+        return best_index, best_distance
+
+    def query_many(self, points, chunk_size: int = 8192) -> tuple:
+        """Return the indices and squared distances of the closest points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        indices = np.full(len(points), -1)
+        distances = np.full(len(points), np.inf)
+        if not len(self):
+            return indices, distances
+
+        # Below a few thousand points one matrix product per chunk beats walking the
+        # tree, even though it compares against every point.
+        if len(self) > self.BRUTE_FORCE_SIZE:
+            query = self._query_chunk
+        else:
+            query = self._brute_force
+            chunk_size = min(chunk_size, max(1, (1 << 22) // len(self)))
+        for start in range(0, len(points), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            indices[chunk], distances[chunk] = query(points[chunk])
+        return indices, distances
+
+    def _brute_force(self, points: np.ndarray) -> tuple:
+        # |p - c|^2 - |p|^2, argmin picks the lowest index on exact ties. The returned
+        # distance is computed exactly like in query.
+        partial = (self.points * self.points).sum(axis=1) - 2 * points @ self.points.T
+        indices = partial.argmin(axis=1)
+        difference = self.points[indices] - points
+        return indices, (difference * difference).sum(axis=1)
+
+    def _query_chunk(self, points: np.ndarray) -> tuple:
+        rows = np.arange(len(points))
+
+        # The leaf the point falls into gives a first bound for the pruning
+        node = np.zeros(len(points), dtype=np.int64)
+        for _ in range(self.depth):
+            node = 2 * node + 1 + (points[rows, self.dims[node]] >= self.splits[node])
+        own_leaf = node - self.internal
+        indices, distances = self._scan_leaves(points, rows, own_leaf)
+
+        for level in range(self.depth + 1):
+            if level:
+                rows = np.repeat(rows, 2)
+                node = (2 * node[:, None] + np.array([1, 2])).ravel()
+            else:
+                node = np.zeros(len(points), dtype=np.int64)
+
+            gap = np.maximum(self.low[node] - points[rows], 0) \
+                + np.maximum(points[rows] - self.high[node], 0)
+            keep = (gap * gap).sum(axis=1) <= distances[rows]
+            rows, node = rows[keep], node[keep]
+
+        leaf = node - self.internal
+        other = leaf != own_leaf[rows]
+        rows, leaf = rows[other], leaf[other]
+        if len(rows):
+            candidates, candidate_distances = self._scan_leaves(points, rows, leaf)
+
+            # Best candidate per row, ties to the lower index
+            order = np.lexsort((candidates, candidate_distances, rows))
+            rows, first = np.unique(rows[order], return_index=True)
+            candidates = candidates[order][first]
+            candidate_distances = candidate_distances[order][first]
+
+            better = (candidate_distances < distances[rows]) | (
+                (candidate_distances == distances[rows]) & (candidates < indices[rows]))
+            indices[rows[better]] = candidates[better]
+            distances[rows[better]] = candidate_distances[better]
+
+        return indices, distances
+
+    def _scan_leaves(self, points: np.ndarray, rows: np.ndarray, leaves: np.ndarray) -> tuple:
+        difference = self.leaf_points[leaves] - points[rows][:, None]
+        distance = (difference * difference).sum(axis=2)
+        minimum = distance.min(axis=1)
+        # Leaves are not sorted by index, so ties are resolved explicitly
+        chosen = np.where(distance == minimum[:, None], self.leaf_index[leaves],
+                          np.iinfo(np.int64).max).min(axis=1)
+        return chosen, minimum
+
+
+class Palette:
+    def __init__(self, names, rgb, signature: str = "", tree: KDTree = None):
+        self.names = np.asarray(names, dtype=str)
+        self.rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+        self.signature = signature
+        self.tree = tree
+
+
+class NamedColorIndex:
+    def __init__(self, leaf_size: int = 16):
+        self.leaf_size = leaf_size
+        self.palettes = {}
+
+    def __len__(self) -> int:
+        return sum(len(palette.names) for palette in self.palettes.values())
+
+    def add_palette(self, name: str, names, rgb, signature: str = ""):
+        """Add or replace a palette, its tree is built on the next query."""
+        self.palettes[name] = Palette(names, rgb, signature)
+
+    def remove_palette(self, name: str):
+        self.palettes.pop(name, None)
+
+    def load_palette(self, path: str, name: str = None) -> bool:
+        """
+        Add a palette file, named after the file by default. Returns False without
+        reading the file if the palette is already loaded from the same file version.
+        """
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        stat = os.stat(path)
+        signature = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+        palette = self.palettes.get(name)
+        if palette is not None and palette.signature == signature:
+            return False
+
+        self.add_palette(name, *read_palette(path), signature=signature)
+        return True
+
+    def build(self) -> int:
+        """Build the missing trees, returns how many were built."""
+        built = 0
+        for palette in self.palettes.values():
+            if palette.tree is None:
+                palette.tree = KDTree(colorspace.rgb_to_lab(palette.rgb), self.leaf_size)
+                built += 1
+        return built
+
+    def nearest(self, rgb, palettes=None) -> NamedColor:
+        """Closest named colour to an (r, g, b) tuple, None for an empty index."""
+        self.build()
+        lab = colorspace.rgb_to_lab(rgb).tolist()
+
+        best = None
+        for name in palettes or self.palettes:
+            palette = self.palettes[name]
+            index, distance = palette.tree.query(lab)
+            if index >= 0 and (best is None or distance < best[2]):
+                best = name, index, distance
+        if best is None:
+            return None
+
+        name, index, distance = best
+        palette = self.palettes[name]
+        return NamedColor(str(palette.names[index]), tuple(palette.rgb[index].tolist()), name,
+                          math.sqrt(distance))
+
+    def nearest_many(self, rgb, palettes=None) -> tuple:
+        """Return the names, palette names and distances for an (..., 3) array of 0-255 RGB."""
+        self.build()
+        rgb = np.asarray(rgb)
+
+        # Images repeat colours a lot, so every distinct colour is only looked up once
+        packed = (rgb.reshape(-1, 3).astype(np.int64) * (1 << 16, 1 << 8, 1)).sum(axis=1)
+        packed, inverse = np.unique(packed, return_inverse=True)
+        lab = colorspace.rgb_to_lab(np.stack([packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF],
+                                             axis=1))
+
+        names = np.full(len(lab), "", dtype=object)
+        sources = np.full(len(lab), "", dtype=object)
+        distances = np.full(len(lab), np.inf)
+        for name in palettes or self.palettes:
+            palette = self.palettes[name]
+            indices, palette_distances = palette.tree.query_many(lab)
+            better = palette_distances < distances
+            names[better] = palette.names[indices[better]]
+            sources[better] = name
+            distances[better] = palette_distances[better]
+
+        shape = rgb.shape[:-1]
+        return (names.astype(str)[inverse].reshape(shape),
+                sources.astype(str)[inverse].reshape(shape),
+                np.sqrt(distances)[inverse].reshape(shape))
+
+    def save(self, path: str):
+        """Write the palettes and their trees to an .npz file, building missing trees."""
+        self.build()
+        arrays = {"palettes": np.array(list(self.palettes), dtype=str),
+                  "leaf_size": np.array(self.leaf_size)}
+        for number, palette in enumerate(self.palettes.values()):
+            arrays[f"{number}.names"] = palette.names
+            arrays[f"{number}.rgb"] = palette.rgb
+            arrays[f"{number}.signature"] = np.array(palette.signature)
+            for key, value in palette.tree.arrays().items():
+                arrays[f"{number}.{key}"] = value
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Written next to the target first so a crash never leaves half a file behind
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NamedColorIndex":
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(int(data["leaf_size"]))
+            for number, name in enumerate(data["palettes"].tolist()):
+                tree = KDTree.from_arrays(*(data[f"{number}.{key}"] for key in
+                                            ("points", "order", "dims", "splits", "bounds")))
+                index.palettes[name] = Palette(
+                    data[f"{number}.names"], data[f"{number}.rgb"],
+                    str(data[f"{number}.signature"]), tree)
+        return index
+
+
+def cache_path() -> str:
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation),
+                        "py_color_picker", "named_colors.npz")
+
+
+_default_index = None
+
+
+def default_index() -> NamedColorIndex:
+    """
+    Index of the palettes in palettes/, loaded from the cache when it is up to date.
+    Only palette files that changed since the cache was written are read and rebuilt.
+    """
+    global _default_index
+    if _default_index is not None:
+        return _default_index
+
+    path = cache_path()
+    try:
+        index = NamedColorIndex.load(path)
+    except (OSError, ValueError, KeyError):
+        index = NamedColorIndex()
+
+    files = {os.path.splitext(file)[0]: os.path.join(PALETTE_DIR, file)
+             for file in sorted(os.listdir(PALETTE_DIR)) if file.endswith(".txt")}
+    changed = False
+    for name in list(index.palettes):
+        if name not in files:
+            index.remove_palette(name)
+            changed = True
+    for name, file in files.items():
+        changed |= index.load_palette(file, name)
+
+    if changed:
+        try:
+            index.save(path)
+        except OSError:
+            # A read-only cache only costs the rebuild on the next start
+            index.build()
+
+    _default_index = index
+    return index
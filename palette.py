@@ -0,0 +1,281 @@
+"""
+Dominant colour palettes of images.
+
+    swatches = palette.extract_palette("photo.jpg", count=6)
+    swatches = palette.extract_palette(array, method="median-cut")
+
+Works headless on image files, QImages and NumPy arrays of shape (height, width,
+3 or 4) or (pixels, 3 or 4). Large inputs are downsampled by striding before
+anything is copied, so the cost is bounded by max_pixels and not by the image
+size. Files are already scaled down by the decoder where it supports it. Two
+methods are available:
+
+    median-cut  splits the colour box with the largest spread at its median
+    kmeans      mini-batch k-means seeded with the median-cut palette
+
+PaletteExtractor runs the extraction on a worker thread for the GUI.
+"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage, QImageReader
+
+METHODS = ("kmeans", "median-cut")
+
+# About half a megapixel keeps the palette stable while extraction stays well below
+# a second on a single core
+DEFAULT_MAX_PIXELS = 1 << 19
+
+
+class Swatch(NamedTuple):
+    rgb: tuple
+    # Share of the sampled pixels closest to this colour
+    weight: float
+
+
+def stride(pixel_count: int, max_pixels: int) -> int:
+    return max(1, math.ceil(math.sqrt(pixel_count / max_pixels))) if max_pixels else 1
+
+
+def downsample(pixels: np.ndarray, max_pixels: int = DEFAULT_MAX_PIXELS) -> np.ndarray:
+    """Sample an image array on a regular grid and flatten it to (pixels, channels)."""
+    if pixels.ndim == 3:
+        step = stride(pixels.shape[0] * pixels.shape[1], max_pixels)
+        pixels = pixels[::step, ::step]
+    else:
+        step = stride(len(pixels), max_pixels) ** 2
+        pixels = pixels[::step]
+    return pixels.reshape(-1, pixels.shape[-1])
+
+
+def image_pixels(image: QImage, max_pixels: int = DEFAULT_MAX_PIXELS) -> np.ndarray:
+    """Downsampled (pixels, 4) RGBA array of a QImage, only the samples are copied."""
+    if image.format() != QImage.Format_RGBA8888:
+        image = image.convertToFormat(QImage.Format_RGBA8888)
+
+    view = np.frombuffer(image.constBits(), np.uint8).reshape(
+        image.height(), image.bytesPerLine() // 4, 4)[:, :image.width()]
+    # The copy detaches the samples from the image buffer
+    return downsample(view, max_pixels).copy()
+
+
+def load_image(path: str, max_pixels: int = DEFAULT_MAX_PIXELS) -> QImage:
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+
+    # JPEG decodes straight to a fraction of the size, which is much cheaper than
+    # decoding every pixel of a large photo and striding afterwards.
+    size = reader.size()
+    if size.isValid() and max_pixels:
+        step = stride(size.width() * size.height(), max_pixels)
+        if step > 1:
+            reader.setScaledSize(QSize(max(1, size.width() // step),
+                                       max(1, size.height() // step)))
+
+    image = reader.read()
+    if image.isNull():
+        raise OSError(f"{path}: {reader.errorString()}")
+    return image
+
+
+def opaque_rgb(pixels: np.ndarray) -> np.ndarray:
+    if pixels.shape[-1] == 4:
+        pixels = pixels[pixels[:, 3] >= 128]
+    return pixels[:, :3]
+
+
+def median_cut(pixels: np.ndarray, count: int, progress=None) -> np.ndarray:
+    """Return the mean colours of at most count boxes."""
+    pixels = np.asarray(pixels)
+    boxes = [np.arange(len(pixels))]
+    spreads = [np.ptp(pixels, axis=0)]
+
+    while len(boxes) < count:
+        # Spread times population favours big boxes over a few outliers
+        scores = [int(spread.max()) * len(box) if len(box) > 1 else -1
+                  for box, spread in zip(boxes, spreads)]
+        index = int(np.argmax(scores))
+        if scores[index] <= 0:
+            break
+
+        box = boxes.pop(index)
+        channel = int(np.argmax(spreads.pop(index)))
+        half = len(box) // 2
+        order = np.argpartition(pixels[box, channel], half)
+
+        for part in (box[order[:half]], box[order[half:]]):
+            boxes.append(part)
+            spreads.append(np.ptp(pixels[part], axis=0))
+
+        if progress is not None:
+            progress(len(boxes) / count)
+
+    return np.array([pixels[box].mean(axis=0) for box in boxes], dtype=np.float32)
+
+
+def nearest(points: np.ndarray, centres: np.ndarray) -> np.ndarray:
+    # |p - c|^2 without the |p|^2 term, which is the same for every centre
+    distances = (centres * centres).sum(axis=1) - 2 * points @ centres.T
+    return distances.argmin(axis=1)
+
+
+def populations(pixels: np.ndarray, centres: np.ndarray, chunk_size: int = 1 << 16) -> np.ndarray:
+    """Number of pixels closest to each centre, computed in chunks to bound memory."""
+    points = np.asarray(pixels, dtype=np.float32)
+    counts = np.zeros(len(centres), dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        counts += np.bincount(nearest(points[start:start + chunk_size], centres),
+                              minlength=len(centres))
+    return counts
+
+
+def kmeans(pixels: np.ndarray, count: int, batch_size: int = 4096, iterations: int = 100,
+           tolerance: float = 0.1, seed: int = 0, progress=None) -> np.ndarray:
+    """
+    Mini-batch k-means (Sculley 2010). Every centre moves towards the running mean
+    of the batch samples assigned to it, so the step size shrinks with its count.
+    Returns the centres.
+    """
+    points = np.asarray(pixels, dtype=np.float32)
+    centres = median_cut(pixels, count)
+    counts = np.zeros(len(centres))
+    rng = np.random.default_rng(seed)
+
+    for iteration in range(iterations):
+        batch = points[rng.integers(0, len(points), batch_size)]
+        labels = nearest(batch, centres)
+
+        batch_counts = np.bincount(labels, minlength=len(centres))
+        sums = np.stack([np.bincount(labels, batch[:, channel], len(centres))
+                         for channel in range(3)], axis=1)
+
+        assigned = batch_counts > 0
+        counts += batch_counts
+        shift = (sums[assigned] - batch_counts[assigned, None] * centres[assigned]) \
+            / counts[assigned, None]
+        centres[assigned] += shift.astype(np.float32)
+
+        if progress is not None:
+            progress((iteration + 1) / iterations)
+        if np.abs(shift).max(initial=0) < tolerance:
+            break
+
+    return centres
+
+
+def extract_palette(source, count: int = 6, method: str = "kmeans",
+                    max_pixels: int = DEFAULT_MAX_PIXELS, progress=None) -> list:
+    """
+    Return up to count Swatches of an image file, a QImage or an RGB(A) array, most
+    frequent first.
+    Transparent pixels are ignored. progress is called with the completed fraction.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, expected one of {', '.join(METHODS)}")
+
+    if isinstance(source, str):
+        source = load_image(source, max_pixels)
+
+    if isinstance(source, QImage):
+        pixels = image_pixels(source, max_pixels)
+    else:
+        pixels = downsample(np.asarray(source), max_pixels)
+    pixels = opaque_rgb(pixels)
+    if not len(pixels):
+        return []
+
+    if method == "kmeans":
+        centres = kmeans(pixels, count, progress=progress)
+    else:
+        centres = median_cut(pixels, count, progress=progress)
+
+    # Weights always come from the nearest centre, the median-cut boxes are
+    # equally populated by construction and would say nothing.
+    counts = populations(pixels, centres)
+    if progress is not None:
+        progress(1.0)
+
+    order = np.argsort(-counts, kind="stable")
+    rgb = np.clip(np.rint(centres[order]), 0, 255).astype(np.uint8).tolist()
+    weights = (counts[order] / counts.sum()).tolist()
+    return [Swatch(tuple(color), weight)
+            for color, weight in zip(rgb, weights) if weight > 0]
+
+
+class ExtractTask(QRunnable):
+    def __init__(self, extractor: "PaletteExtractor", job: int, source, count: int, method: str):
+        super().__init__()
+
+        self.extractor = extractor
+        self.job = job
+        self.source = source
+        self.count = count
+        self.method = method
+        self.percent = -1
+
+    def report(self, fraction: float):
+        # Only whole percent steps are sent across the thread boundary
+        percent = int(fraction * 100)
+        if percent != self.percent:
+            self.percent = percent
+            self.extractor.task_progress.emit(self.job, percent)
+
+    def run(self):
+        try:
+            swatches = extract_palette(self.source, self.count, self.method, progress=self.report)
+        except Exception as error:
+            self.extractor.task_finished.emit(self.job, [], str(error))
+        else:
+            self.extractor.task_finished.emit(self.job, swatches, "")
+
+
+class PaletteExtractor(QObject):
+    """
+    Extracts palettes on a worker thread. Only the newest request is reported, the
+    results of requests it replaced are dropped.
+    """
+
+    # Emitted from the worker thread with the job number
+    task_progress = Signal(int, int)
+    task_finished = Signal(int, object, str)
+
+    progress = Signal(int)
+    extracted = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, count: int = 6, method: str = "kmeans", parent: QObject = None):
+        super().__init__(parent)
+
+        self.count = count
+        self.method = method
+        self.job = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.task_progress.connect(self.on_progress)
+        self.task_finished.connect(self.on_finished)
+
+    def extract(self, source):
+        self.job += 1
+        self.pool.start(ExtractTask(self, self.job, source, self.count, self.method))
+
+    @Slot(int, int)
+    def on_progress(self, job: int, percent: int):
+        if job == self.job:
+            self.progress.emit(percent)
+
+    @Slot(int, object, str)
+    def on_finished(self, job: int, swatches: list, error: str):
+        if job != self.job:
+            return
+        if error:
+            self.failed.emit(error)
+        else:
+            self.extracted.emit(swatches)
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
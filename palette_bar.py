@@ -0,0 +1,53 @@
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QAction, QColor, QCursor
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QPushButton, QWidget
+
+import clipboard
+
+
+class PyPaletteBar(QFrame):
+    """Row of colour swatches, a click picks the colour."""
+
+    color_clicked = Signal(QColor)
+
+    def __init__(self, parent: QWidget = None, height: int = 30):
+        super().__init__(parent)
+
+        self.setFixedHeight(height)
+
+        self.layout_ = QHBoxLayout(self)
+        self.layout_.setContentsMargins(10, 0, 10, 0)
+        self.layout_.setSpacing(5)
+
+        self.colors = []
+
+        self.copy_action = QAction("Copy all colours", self)
+        self.copy_action.triggered.connect(self.copy_colors)
+        self.addAction(self.copy_action)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+    def set_swatches(self, swatches: list):
+        colors = [QColor(*swatch.rgb) for swatch in swatches]
+        self.set_colors(colors, [f"{color.name().upper()} ({swatch.weight:.0%})"
+                                 for color, swatch in zip(colors, swatches)])
+
+    def set_colors(self, colors: list, tooltips: list = None):
+        while self.layout_.count():
+            self.layout_.takeAt(0).widget().deleteLater()
+
+        self.colors = colors
+        tooltips = tooltips or [color.name().upper() for color in colors]
+        for color, tooltip in zip(colors, tooltips):
+            button = QPushButton(self)
+            button.setFixedHeight(self.height())
+            button.setCursor(QCursor(Qt.PointingHandCursor))
+            button.setToolTip(tooltip)
+            button.setStyleSheet(
+                f"background: {color.name()}; border: 1px solid #8A8A8A; border-radius: 4px")
+            button.clicked.connect(lambda checked=False, color=color: self.color_clicked.emit(color))
+
+            self.layout_.addWidget(button)
+
+    def copy_colors(self):
+        clipboard.copy_colors(clipboard.format_colors(
+            [(color.red(), color.green(), color.blue()) for color in self.colors]))
@@ -0,0 +1,272 @@
+"""
+Colour harmonies and interpolated ramps, and a headless generator for palette files.
+
+Every input line names a colour and optionally further stops, the parts are
+separated by ";" so RGB and CMYK values can keep their commas:
+
+    primary: #3366CC
+    sunset: #FF5E3A; 255, 149, 0; cmyk(0%, 10%, 80%, 0%)
+
+A single colour gives a tonal scale from white through the colour to black, more
+stops give a ramp through them. Harmonies of the first colour are added on request:
+
+    python -m palette_generator brand.txt --steps 11 --space oklab -f css -o brand.css
+    python -m palette_generator brand.txt --harmony triadic --harmony tints -f ase -o brand.ase
+    cat brand.txt | python -m palette_generator --workers 4 -f json > tokens.json
+
+Ramps are interpolated in HSL, OKLab or linear sRGB with NumPy, all steps at
+once. The lines are generated and encoded in chunks, optionally by a pool of
+worker processes, and written as they arrive, so memory does not grow with the
+number of ramps.
+"""
+
+import argparse
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+import colorspace
+import float_color
+import parsers
+import swatch_files
+from batch import chunked, read_lines, report
+
+SPACES = ("hsl", "oklab", "linear")
+
+# Hue offsets in degrees
+HUE_HARMONIES = {
+    "complementary": (0, 180),
+    "split-complementary": (0, 150, 210),
+    "triadic": (0, 120, 240),
+    "tetradic": (0, 90, 180, 270),
+    "analogous": (-30, 0, 30),
+}
+HARMONIES = tuple(HUE_HARMONIES) + ("tints", "shades")
+
+WHITE = (1.0, 1.0, 1.0)
+BLACK = (0.0, 0.0, 0.0)
+
+
+class Options(NamedTuple):
+    steps: int = 11
+    space: str = "oklab"
+    harmonies: tuple = ()
+    format: str = "css"
+
+
+def to_space(rgb: np.ndarray, space: str) -> np.ndarray:
+    if space == "hsl":
+        return float_color.rgb_to_hsl(rgb)
+    if space == "oklab":
+        return float_color.srgb_to_oklab(rgb)
+    if space == "linear":
+        return float_color.srgb_decode(np.asarray(rgb, dtype=np.float64))
+    raise ValueError(f"unknown interpolation space {space!r}, expected one of {SPACES}")
+
+
+def from_space(values: np.ndarray, space: str) -> np.ndarray:
+    if space == "hsl":
+        return float_color.hsl_to_rgb(values)
+    if space == "oklab":
+        return float_color.oklab_to_srgb(values)
+    return float_color.srgb_encode(values)
+
+
+def _hsl_stops(hsl: np.ndarray) -> np.ndarray:
+    # Grays have no hue of their own, they take the hue of the nearest colourful
+    # stop, and every hue step goes the short way round the circle
+    hsl = hsl.copy()
+    count = hsl.shape[-2]
+    indices = np.arange(count)
+    distances = np.where((hsl[..., 1] > 0)[..., None, :],
+                         np.abs(indices[:, None] - indices[None, :]), count)
+    hsl[..., 0] = np.take_along_axis(hsl[..., 0], distances.argmin(axis=-1), axis=-1)
+    hsl[..., 0] = np.unwrap(hsl[..., 0], period=360, axis=-1)
+    return hsl
+
+
+def ramp(stops, steps: int, space: str = "oklab") -> np.ndarray:
+    """
+    steps sRGB colours through the sRGB stops, evenly spaced, in 0 - 1. stops has
+    the shape (..., stop count, 3), the leading axes are ramps computed together.
+    """
+    stops = np.asarray(stops, dtype=np.float64)
+    count = stops.shape[-2]
+    values = to_space(stops, space)
+    if space == "hsl":
+        values = _hsl_stops(values)
+
+    # Position of every step between the stops, then a linear blend of the two
+    positions = np.linspace(0, count - 1, steps)
+    lower = np.minimum(positions.astype(np.intp), max(count - 2, 0))
+    upper = np.minimum(lower + 1, count - 1)
+    weights = (positions - lower)[:, None]
+    mixed = values[..., lower, :] + (values[..., upper, :] - values[..., lower, :]) * weights
+
+    if space == "hsl":
+        mixed[..., 0] %= 360
+    return np.clip(from_space(mixed, space), 0, 1)
+
+
+def _with_ends(rgb: np.ndarray, *ends) -> np.ndarray:
+    # Stops (..., len(ends) + 1, 3) with None in ends standing for rgb
+    rgb = np.asarray(rgb, dtype=np.float64)
+    return np.stack([rgb if end is None else np.broadcast_to(end, rgb.shape) for end in ends],
+                    axis=-2)
+
+
+def tonal_scale(rgb, steps: int, space: str = "oklab") -> np.ndarray:
+    """steps colours from near white through rgb to near black, without the ends."""
+    return ramp(_with_ends(rgb, WHITE, None, BLACK), steps + 2, space)[..., 1:-1, :]
+
+
+def harmony(rgb, kind: str, steps: int = 5, space: str = "oklab") -> np.ndarray:
+    """The colours of a harmony, starting with rgb itself, shape (..., n, 3)."""
+    if kind in HUE_HARMONIES:
+        offsets = np.array(HUE_HARMONIES[kind], dtype=np.float64)
+        hsl = np.repeat(float_color.rgb_to_hsl(rgb)[..., None, :], len(offsets), axis=-2)
+        hsl[..., 0] = (hsl[..., 0] + offsets) % 360
+        return float_color.hsl_to_rgb(hsl)
+    if kind == "tints":
+        return ramp(_with_ends(rgb, None, WHITE), steps + 1, space)[..., :-1, :]
+    if kind == "shades":
+        return ramp(_with_ends(rgb, None, BLACK), steps + 1, space)[..., :-1, :]
+    raise ValueError(f"unknown harmony {kind!r}, expected one of {HARMONIES}")
+
+
+def parse_rgb(text: str):
+    """Float sRGB of any colour the picker fields accept, or the ParseError."""
+    result = parsers.parse_color(text)
+    if isinstance(result, parsers.ParseError):
+        return result
+    if result.kind == "cmyk":
+        return colorspace.cmyk_to_rgb16(result.values) / 65535
+    return np.asarray(result.values, dtype=np.float64) / 255
+
+
+def parse_line(line: str):
+    """(name, stops) of an input line, or a ParseError."""
+    name, separator, colors = line.partition(":")
+    if not separator or not name.strip():
+        return parsers.ParseError(0, "expected 'name: colour'")
+
+    stops = []
+    position = len(name) + 1
+    for text in colors.split(";"):
+        result = parse_rgb(text)
+        if isinstance(result, parsers.ParseError):
+            return parsers.ParseError(position + result.position, result.message)
+        stops.append(result)
+        position += len(text) + 1
+    return name.strip(), np.array(stops)
+
+
+def generate_chunk(chunk, options: Options):
+    """Encode a list of (line number, text) pairs into ([(data, size)], errors)."""
+    names, stops, errors = [], [], []
+    for number, line in chunk:
+        result = parse_line(line)
+        if isinstance(result, parsers.ParseError):
+            errors.append((number, line, result))
+        else:
+            names.append(result[0])
+            stops.append(result[1])
+    if not names:
+        return [], errors
+
+    # Every palette of the chunk is computed in one go, lines with the same number
+    # of stops share their ramps' arrays
+    ramps = [None] * len(names)
+    for count in set(map(len, stops)):
+        members = [index for index, line_stops in enumerate(stops) if len(line_stops) == count]
+        group = np.array([stops[index] for index in members])
+        if count == 1:
+            colors = tonal_scale(group[:, 0], options.steps, options.space)
+        else:
+            colors = ramp(group, options.steps, options.space)
+        for index, line_colors in zip(members, colors):
+            ramps[index] = line_colors
+
+    firsts = np.array([line_stops[0] for line_stops in stops])
+    harmonies = [harmony(firsts, kind, options.steps, options.space)
+                 for kind in options.harmonies]
+
+    encode = swatch_files.WRITERS[options.format].encode
+    encoded = []
+    for index, name in enumerate(names):
+        encoded.append((encode(name, ramps[index]), options.steps))
+        for kind, colors in zip(options.harmonies, harmonies):
+            encoded.append((encode(f"{name}-{kind}", colors[index]), len(colors[index])))
+    return encoded, errors
+
+
+def generate(lines, options: Options, chunk_size: int = 1000, workers: int = 1):
+    """Yield (encoded palettes, errors) per chunk, in input order."""
+    chunks = chunked(lines, chunk_size)
+
+    if workers <= 1:
+        yield from (generate_chunk(chunk, options) for chunk in chunks)
+        return
+
+    # Same as batch.convert, a bounded number of chunks is in flight
+    with ProcessPoolExecutor(workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(generate_chunk, chunk, options))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def write(results, writer: swatch_files.SwatchWriter):
+    for encoded, errors in results:
+        report(errors)
+        for data, size in encoded:
+            writer.write_encoded(data, size)
+    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m palette_generator",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", nargs="?", default="-", help="input file, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-f", "--format", choices=tuple(swatch_files.WRITERS), default="css")
+    parser.add_argument("-n", "--steps", type=int, default=11, help="colours per ramp")
+    parser.add_argument("-s", "--space", choices=SPACES, default="oklab",
+                        help="interpolation space")
+    parser.add_argument("--harmony", action="append", choices=HARMONIES, default=[],
+                        help="add a harmony of the first colour, can be repeated")
+    parser.add_argument("--title", default="Palette")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    options = Options(args.steps, args.space, tuple(args.harmony), args.format)
+    writer_class = swatch_files.WRITERS[args.format]
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    if args.output == "-":
+        target = sys.stdout.buffer if writer_class.binary else sys.stdout
+    else:
+        target = open(args.output, "wb") if writer_class.binary \
+            else open(args.output, "w", encoding="utf-8", newline="\n")
+    try:
+        writer = writer_class(target, args.title)
+        write(generate(read_lines(source), options, args.chunk_size, args.workers), writer)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target not in (sys.stdout, sys.stdout.buffer):
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Parsers for the text forms of the HEX, RGB and CMYK fields.
+
+Accepted forms, surrounding whitespace is ignored:
+
+    hex     #RGB, #RGBA, #RRGGBB, #RRGGBBAA
+    rgb     255, 0, 0    or    rgb(255, 0, 0)
+    cmyk    0, 100, 100, 0    or    cmyk(0%, 100%, 100%, 0%)
+
+Every parser returns a ParsedColor on success and a ParseError with the position
+of the first offending character otherwise, it never raises. The grammars are
+compiled once and error positions are only looked for when a text is rejected.
+"""
+
+import re
+from typing import NamedTuple, Union
+
+
+class ParsedColor(NamedTuple):
+    kind: str
+    values: tuple
+    alpha: int = 255
+
+
+class ParseError(NamedTuple):
+    position: int
+    message: str
+
+
+ParseResult = Union[ParsedColor, ParseError]
+
+HEX_DIGITS = "0123456789abcdefABCDEF"
+
+
+def _number_table(maximum: int) -> dict:
+    # Looking a number up is several times cheaper than int(), and a miss doubles as
+    # the range check. Leading zeros up to three digits are accepted.
+    return {f"{value:0{width}d}": value
+            for width in (1, 2, 3) for value in range(min(maximum + 1, 10 ** width))}
+
+
+# Skips the argument handling of the generated NamedTuple.__new__ on the hot path
+_new_parsed_color = tuple.__new__
+
+_HEX = re.compile(r"\s*#([0-9a-fA-F]+)\s*")
+
+
+def parse_hex(text: str, alpha: bool = True) -> ParseResult:
+    """Without alpha only #RGB and #RRGGBB are accepted."""
+    match = _HEX.fullmatch(text)
+    if match is None:
+        return _hex_error(text)
+
+    digits = match.group(1)
+    if not alpha and len(digits) not in (3, 6):
+        return ParseError(match.end(1), "expected 3 or 6 hex digits")
+    if len(digits) in (3, 4):
+        digits = "".join(digit * 2 for digit in digits)
+    elif len(digits) not in (6, 8):
+        return ParseError(match.end(1), "expected 3, 4, 6 or 8 hex digits")
+
+    value = int(digits, 16)
+    if len(digits) == 8:
+        alpha = value & 0xFF
+        value >>= 8
+    else:
+        alpha = 255
+
+    return _new_parsed_color(
+        ParsedColor, ("hex", (value >> 16, (value >> 8) & 0xFF, value & 0xFF), alpha))
+
+
+def _list_parser(kind: str, count: int, maximum: int, percent: bool):
+    number = r"([0-9]{1,3})" + ("%?" if percent else "")
+    values = r"\s*,\s*".join([number] * count)
+    # Explicit character classes instead of IGNORECASE keep the match fast. The closing
+    # parenthesis is only required (and allowed) after the function name.
+    name = "".join(f"[{char}{char.upper()}]" for char in kind)
+    fullmatch = re.compile(rf"\s*({name}\s*\(\s*)?{values}(?(1)\s*\))\s*").fullmatch
+    numbers = _number_table(maximum).get
+
+    def parse(text: str) -> ParseResult:
+        match = fullmatch(text)
+        if match is None:
+            return _list_error(text, kind, count, percent)
+
+        values = tuple(map(numbers, match.groups()[1:]))
+        if None in values:
+            return ParseError(match.start(values.index(None) + 2),
+                              f"value out of range 0-{maximum}")
+
+        return _new_parsed_color(ParsedColor, (kind, values, 255))
+
+    parse.__name__ = f"parse_{kind}"
+    return parse
+
+
+parse_rgb = _list_parser("rgb", 3, 255, percent=False)
+parse_cmyk = _list_parser("cmyk", 4, 100, percent=True)
+
+
+def parse_color(text: str) -> ParseResult:
+    """Parse any of the forms above, the kind is detected from the text."""
+    start = text.lstrip()[:4].lower()
+    if start.startswith("#"):
+        return parse_hex(text)
+    if start.startswith("cmyk") or (not start.startswith("rgb") and text.count(",") == 3):
+        return parse_cmyk(text)
+    return parse_rgb(text)
+
+
+# Error positions are only needed when a grammar does not match, so they are
+# located by a slower hand-written scan that mirrors the grammar.
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position].isspace():
+        position += 1
+    return position
+
+
+def _hex_error(text: str) -> ParseError:
+    position = _skip_whitespace(text, 0)
+    if text[position:position + 1] != "#":
+        return ParseError(position, "expected '#'")
+
+    position += 1
+    while position < len(text) and text[position] in HEX_DIGITS:
+        position += 1
+
+    if position == len(text) or text[position:].isspace():
+        return ParseError(position, "expected 3, 4, 6 or 8 hex digits")
+    return ParseError(position, "expected a hex digit")
+
+
+def _list_error(text: str, function: str, count: int, percent: bool) -> ParseError:
+    position = _skip_whitespace(text, 0)
+
+    has_function = text[position:position + len(function)].lower() == function
+    if has_function:
+        position = _skip_whitespace(text, position + len(function))
+        if text[position:position + 1] != "(":
+            return ParseError(position, "expected '('")
+        position += 1
+
+    for index in range(count):
+        position = _skip_whitespace(text, position)
+
+        end = position
+        while end < len(text) and text[end] in "0123456789":
+            end += 1
+        if end == position:
+            return ParseError(position, "expected a number")
+        if end - position > 3:
+            return ParseError(position, "number too long")
+
+        position = end
+        if percent and text[position:position + 1] == "%":
+            position += 1
+
+        position = _skip_whitespace(text, position)
+        if index < count - 1:
+            if text[position:position + 1] != ",":
+                return ParseError(position, f"expected {count} comma separated values")
+            position += 1
+
+    if has_function:
+        if text[position:position + 1] != ")":
+            return ParseError(position, "expected ')'")
+        position = _skip_whitespace(text, position + 1)
+
+    return ParseError(position, "unexpected character")
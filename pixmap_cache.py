@@ -0,0 +1,193 @@
+"""
+Icons rasterised once per size and device pixel ratio.
+
+QIcon("icon.svg") keeps the SVG and every QIcon instance renders it again through
+the icon engine. The picker shows the same few icons many times (three copy
+buttons, the title bar, the sliders), so each one is rendered to a pixmap once and
+all widgets share it.
+
+Relative paths such as "icons/copy.svg" are resolved against this directory, not
+the working directory. If an icon bundle exists next to this file it is used
+instead of the single files, so all icons are read from disk at once:
+
+    python -m pixmap_cache icons.rcc    # compiled Qt resource, needs pyside6-rcc
+    python -m pixmap_cache icons.zip    # plain zip archive
+
+Delete the bundle again to go back to the files in icons/.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import zipfile
+from collections import Counter
+
+from PySide6.QtCore import QByteArray, QResource, Qt
+from PySide6.QtGui import QGuiApplication, QIcon, QPainter, QPixmap
+from PySide6.QtSvg import QSvgRenderer
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+ICON_DIR = "icons"
+BUNDLES = ("icons.rcc", "icons.zip")
+
+_pixmaps = {}
+_icons = {}
+
+# Contents of a zip bundle by relative path, None until the bundles were looked for
+_bundle = None
+_resource_prefix = None
+
+# Hits and misses of the pixmap and icon caches, and how many files were read
+stats = Counter()
+
+
+def load_bundle(path: str = None) -> bool:
+    """Load an icon bundle, by default the first one of BUNDLES that exists."""
+    global _bundle, _resource_prefix
+    _bundle = {}
+
+    paths = [path] if path else [os.path.join(PACKAGE_DIR, name) for name in BUNDLES]
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+
+        if path.endswith(".rcc"):
+            if QResource.registerResource(path):
+                _resource_prefix = ":/"
+                stats["files read"] += 1
+                return True
+        else:
+            with zipfile.ZipFile(path) as archive:
+                _bundle = {name: archive.read(name) for name in archive.namelist()}
+            stats["files read"] += 1
+            return True
+
+    return False
+
+
+def resolve(path: str) -> str:
+    if os.path.isabs(path) or path.startswith(":"):
+        return path
+    return os.path.join(PACKAGE_DIR, path)
+
+
+def read(path: str) -> bytes:
+    if _bundle is None:
+        load_bundle()
+
+    if os.path.isabs(path) or path.startswith(":"):
+        key = None
+    else:
+        key = path.replace(os.sep, "/")
+
+    if key is not None and key in _bundle:
+        return _bundle[key]
+    if key is not None and _resource_prefix is not None:
+        resource = QResource(_resource_prefix + key)
+        if resource.isValid():
+            return bytes(resource.uncompressedData())
+
+    stats["files read"] += 1
+    with open(resolve(path), "rb") as file:
+        return file.read()
+
+
+def device_pixel_ratios() -> list:
+    # Every screen gets its own rendition, so icons stay sharp when the window
+    # moves between screens with different scaling.
+    app = QGuiApplication.instance()
+    if app is None:
+        return [1.0]
+    return sorted({screen.devicePixelRatio() for screen in app.screens()} or {1.0})
+
+
+def pixmap(path: str, size: int, dpr: float = None) -> QPixmap:
+    dpr = dpr or device_pixel_ratios()[-1]
+    key = path, size, dpr
+
+    cached = _pixmaps.get(key)
+    if cached is not None:
+        stats["pixmap hits"] += 1
+        return cached
+
+    stats["pixmap misses"] += 1
+    data = QByteArray(read(path))
+    pixels = round(size * dpr)
+
+    if path.endswith(".svg"):
+        cached = QPixmap(pixels, pixels)
+        cached.fill(Qt.transparent)
+        painter = QPainter(cached)
+        QSvgRenderer(data).render(painter)
+        painter.end()
+    else:
+        cached = QPixmap()
+        cached.loadFromData(data)
+        cached = cached.scaled(pixels, pixels, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    cached.setDevicePixelRatio(dpr)
+    _pixmaps[key] = cached
+    return cached
+
+
+def icon(path: str, size: int) -> QIcon:
+    dprs = tuple(device_pixel_ratios())
+    key = path, size, dprs
+
+    cached = _icons.get(key)
+    if cached is not None:
+        stats["icon hits"] += 1
+        return cached
+
+    stats["icon misses"] += 1
+    cached = QIcon()
+    for dpr in dprs:
+        cached.addPixmap(pixmap(path, size, dpr))
+    _icons[key] = cached
+    return cached
+
+
+def clear():
+    _pixmaps.clear()
+    _icons.clear()
+    stats.clear()
+
+
+def build_bundle(output: str):
+    """Pack icons/ into a .zip or, with pyside6-rcc, a binary .rcc next to it."""
+    files = sorted(os.path.join(ICON_DIR, name).replace(os.sep, "/")
+                   for name in os.listdir(os.path.join(PACKAGE_DIR, ICON_DIR)))
+
+    if output.endswith(".rcc"):
+        qrc = os.path.join(PACKAGE_DIR, "icons.qrc")
+        with open(qrc, "w", encoding="utf-8") as file:
+            file.write("<RCC>\n  <qresource prefix=\"/\">\n")
+            file.writelines(f"    <file>{name}</file>\n" for name in files)
+            file.write("  </qresource>\n</RCC>\n")
+        try:
+            subprocess.run(["pyside6-rcc", "--binary", qrc, "-o", output], check=True)
+        finally:
+            os.remove(qrc)
+    else:
+        # The SVGs are tiny, storing them uncompressed keeps loading a plain copy
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+            for name in files:
+                archive.write(os.path.join(PACKAGE_DIR, name), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pixmap_cache",
+                                     description="Bundle the icons into a single file.")
+    parser.add_argument("output", nargs="?", default=os.path.join(PACKAGE_DIR, BUNDLES[0]),
+                        help="a .rcc or .zip file")
+    args = parser.parse_args(argv)
+
+    if not args.output.endswith((".rcc", ".zip")):
+        parser.error("the bundle must be a .rcc or a .zip file")
+    build_bundle(args.output)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from PySide6.QtCore import Qt, QTimer, QRect
+from PySide6.QtGui import QAction, QColor, QFont, QPainter, QPaintEvent
+from PySide6.QtWidgets import QFileDialog, QWidget
+
+import profiler
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class PyProfileOverlay(QWidget):
+    """
+    Wheel frames per second, paint time and input latency of the last second,
+    refreshed a few times per second while profiling is on. The context menu
+    exports the trace.
+    """
+
+    INTERVAL = 250
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+
+        self.setFixedSize(210, 64)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.font_ = QFont("Courier New", 9)
+        self.lines = []
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+        self.export_action = QAction("Export trace...", self)
+        self.export_action.triggered.connect(self.export_trace)
+        self.clear_action = QAction("Clear", self)
+        self.clear_action.triggered.connect(profiler.clear)
+        self.addActions([self.export_action, self.clear_action])
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+        self.hide()
+
+    def start(self):
+        self.refresh()
+        self.show()
+        self.raise_()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.hide()
+
+    def refresh(self):
+        paints = profiler.recent("wheel paint")
+        latencies = profiler.recent("input to frame")
+        self.lines = [f"{len(paints):3d} fps  {len(profiler.events):5d} events"] + [
+            f"{name:<8}p50 {percentile(values, 0.5):5.1f}  p95 {percentile(values, 0.95):5.1f} ms"
+            for name, values in (("paint", paints), ("latency", latencies))]
+        self.update()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export trace", "picker-trace.json",
+                                              "Chrome trace (*.json)")
+        if path:
+            profiler.export_trace(path)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 180))
+        painter.drawRoundedRect(self.rect(), 4, 4)
+
+        painter.setFont(self.font_)
+        painter.setPen(QColor("#7CFC00"))
+        line_height = self.height() // max(1, len(self.lines))
+        for index, line in enumerate(self.lines):
+            painter.drawText(QRect(8, index * line_height, self.width() - 8, line_height),
+                             Qt.AlignLeft | Qt.AlignVCenter, line)
@@ -0,0 +1,149 @@
+"""
+Opt-in timing of the picker UI, exported as Chrome trace events.
+
+Profiling is off unless the COLOR_PICKER_PROFILE environment variable is set, or
+until it is switched on with Ctrl+Shift and a double click on the title bar. A
+value other than 1 is taken as a path, the trace is written there when the
+program exits:
+
+    COLOR_PICKER_PROFILE=picker-trace.json python main.py
+
+Functions decorated with timed() append (name, track, start, end) to a ring
+buffer of the last CAPACITY events, in perf_counter_ns() nanoseconds. While
+profiling is off the decorator only checks a module flag. hop_start() and
+hop_end() time the way through the event loop between a queued input and the
+code that handles it. Every input starts a latency span that ends with the next
+wheel paint, the delay until the user sees the change.
+
+The trace opens in chrome://tracing or ui.perfetto.dev, every track is a thread.
+"""
+
+import atexit
+import inspect
+import json
+import os
+import time
+from collections import deque
+
+ENV_VAR = "COLOR_PICKER_PROFILE"
+
+CAPACITY = 1 << 16
+
+# Tracks in the order they are listed in a trace viewer
+TRACKS = ("input", "signals", "state", "paint", "latency")
+
+enabled = False
+events = deque(maxlen=CAPACITY)
+
+# Start of a hop that has not ended yet, per key
+_hops = {}
+# Time of the first input that no paint has shown yet
+_input_start = None
+
+
+def enable(trace_path: str = None):
+    global enabled
+    enabled = True
+    if trace_path:
+        atexit.register(export_trace, trace_path)
+
+
+def disable():
+    global enabled, _input_start
+    enabled = False
+    _hops.clear()
+    _input_start = None
+
+
+def clear():
+    events.clear()
+
+
+def enable_from_environment():
+    value = os.environ.get(ENV_VAR, "")
+    if value and value != "0":
+        enable(None if value == "1" else value)
+
+
+def record(name: str, track: str, start: int, end: int):
+    events.append((name, track, start, end))
+
+
+def timed(name: str, track: str = "state"):
+    """
+    Decorator that records every call of the function. Functions on the "input"
+    track start a latency span, functions on the "paint" track end it.
+    """
+    def decorator(function):
+        # A slot wrapped in *args would get every argument of the signal it is
+        # connected to, so the extra ones are cut off like Qt does for the slot
+        code = function.__code__
+        count = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+        def wrapper(*args, **kwargs):
+            args = args[:count]
+            if not enabled:
+                return function(*args, **kwargs)
+
+            global _input_start
+            start = time.perf_counter_ns()
+            if track == "input" and _input_start is None:
+                _input_start = start
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = time.perf_counter_ns()
+                events.append((name, track, start, end))
+                if track == "paint" and _input_start is not None:
+                    events.append(("input to frame", "latency", _input_start, end))
+                    _input_start = None
+
+        wrapper.__name__ = function.__name__
+        wrapper.__qualname__ = function.__qualname__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorator
+
+
+def hop_start(key):
+    """The first call wins until hop_end(), later ones are merged into the same hop."""
+    if enabled and key not in _hops:
+        _hops[key] = time.perf_counter_ns()
+
+
+def hop_end(key, name: str):
+    if enabled:
+        start = _hops.pop(key, None)
+        if start is not None:
+            events.append((name, "signals", start, time.perf_counter_ns()))
+
+
+def recent(name: str, seconds: float = 1.0) -> list:
+    """Durations in milliseconds of the events called name in the last seconds."""
+    since = time.perf_counter_ns() - int(seconds * 1e9)
+    durations = []
+    for event_name, _, start, end in reversed(events):
+        if end < since:
+            break
+        if event_name == name:
+            durations.append((end - start) / 1e6)
+    return durations
+
+
+def export_trace(path: str):
+    """Write the buffered events as Chrome trace-event JSON, one event per line."""
+    pid = os.getpid()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        for tid, track in enumerate(TRACKS):
+            file.write(json.dumps({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                   "args": {"name": track}}) + ",\n")
+            file.write(json.dumps({"name": "thread_sort_index", "ph": "M", "pid": pid,
+                                   "tid": tid, "args": {"sort_index": tid}}) + ",\n")
+        file.write(json.dumps({"name": "process_name", "ph": "M", "pid": pid,
+                               "args": {"name": "PyColorPicker"}}))
+        for name, track, start, end in list(events):
+            file.write(",\n" + json.dumps({
+                "name": name, "cat": track, "ph": "X", "pid": pid, "tid": TRACKS.index(track),
+                "ts": start / 1000, "dur": (end - start) / 1000}))
+        file.write("\n]}\n")
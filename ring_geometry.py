@@ -0,0 +1,44 @@
+import math
+
+from PySide6.QtCore import QPointF
+
+# Wheel angles run clockwise from the top, this turns them into the ring position
+ANGLE_OFFSET = 180
+
+
+class RingGeometry:
+    """
+    Sub-pixel positions on the hue ring, precomputed for the 360 integer angles.
+
+    Fractional angles are interpolated between their two neighbours. The chord
+    between them is off the circle by at most radius * (1 - cos(0.5°)), below
+    0.02 px for any ring that fits on a screen.
+    """
+
+    def __init__(self, center: float, radius: float):
+        self.center = center
+        self.radius = radius
+
+        # One extra entry so angle 359.x interpolates towards 360 without wrapping
+        radians = [math.radians(angle + ANGLE_OFFSET) for angle in range(361)]
+        self.xs = [center + radius * math.sin(value) for value in radians]
+        self.ys = [center + radius * math.cos(value) for value in radians]
+        self.points = [QPointF(x, y) for x, y in zip(self.xs, self.ys)]
+
+    def point(self, angle: float) -> QPointF:
+        """Position of angle, integer angles return a shared point that must not be changed."""
+        angle %= 360
+        index = int(angle)
+        fraction = angle - index
+        if not fraction:
+            return self.points[index]
+
+        x = self.xs[index]
+        y = self.ys[index]
+        return QPointF(x + (self.xs[index + 1] - x) * fraction,
+                       y + (self.ys[index + 1] - y) * fraction)
+
+    @staticmethod
+    def angle_at(center: float, x: float, y: float) -> float:
+        """Wheel angle of a point, the inverse of point()."""
+        return -(math.degrees(math.atan2(y - center, x - center)) + 90) % 360
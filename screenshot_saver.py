@@ -0,0 +1,175 @@
+import datetime
+import os
+import struct
+
+import numpy as np
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage, QImageWriter
+
+
+def encode_qoi(image: QImage) -> bytes:
+    """
+    Encode an image losslessly in the Quite OK Image format (https://qoiformat.org).
+
+    Every pixel's operation is worked out for the whole image at once with NumPy,
+    so a save on the thread pool does not hold the GIL for a Python loop per pixel.
+    """
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    width, height = image.width(), image.height()
+    header = b"qoif" + struct.pack(">IIBB", width, height, 4, 0)
+    end = b"\x00" * 7 + b"\x01"
+    if not width or not height:
+        return header + end
+
+    # One 32 bit value per pixel so identical pixels compare as a single int. Scan lines
+    # of a 32 bit format are never padded.
+    pixels = np.frombuffer(bytes(image.constBits()), dtype=np.uint32)[:width * height]
+    count = len(pixels)
+    positions = np.arange(count)
+
+    # The encoder starts from opaque black
+    start = np.frombuffer(bytes((0, 0, 0, 255)), dtype=np.uint32)
+    previous = np.concatenate((start, pixels[:-1]))
+
+    # Runs of the previous pixel, a byte for every 62 pixels and for the rest at the end
+    in_run = pixels == previous
+    run_start = in_run & ~np.concatenate(([False], in_run[:-1]))
+    run_length = positions - np.maximum.accumulate(np.where(run_start, positions, 0))
+    run_end = in_run & ~np.concatenate((in_run[1:], [False]))
+    run_byte = in_run & ((run_length % 62 == 61) | run_end)
+
+    # Only the pixels that write something are looked at from here on, in a
+    # screenshot most of them are inside runs
+    written = run_byte | ~in_run
+    is_run = run_byte[written]
+    run_length = run_length[written]
+    pixels, previous = pixels[written], previous[written]
+    channels = pixels.view(np.uint8).reshape(-1, 4).astype(np.int16)
+    previous_channels = previous.view(np.uint8).reshape(-1, 4).astype(np.int16)
+
+    # After every pixel outside a run the index slot of its hash holds that pixel,
+    # so a pixel is found in the index if the latest earlier one with the same hash
+    # equals it. The index starts as zeros, transparent black in every slot.
+    slots = (channels[:, 0] * 3 + channels[:, 1] * 5 + channels[:, 2] * 7
+             + channels[:, 3] * 11) % 64
+    order = np.flatnonzero(~is_run)
+    order = order[np.argsort(slots[order], kind="stable")]
+    earlier = np.zeros(len(pixels), dtype=np.uint32)
+    same_slot = slots[order[1:]] == slots[order[:-1]]
+    earlier[order[1:][same_slot]] = pixels[order[:-1][same_slot]]
+    index_hit = ~is_run & (earlier == pixels)
+
+    # Wrapped channel differences to the previous pixel
+    dr, dg, db = (((channels[:, :3] - previous_channels[:, :3] + 128) & 0xFF) - 128).T
+    dr_dg, db_dg = dr - dg, db - dg
+    new_alpha = channels[:, 3] != previous_channels[:, 3]
+    diff = (dr > -3) & (dr < 2) & (dg > -3) & (dg < 2) & (db > -3) & (db < 2)
+    luma = (dg > -33) & (dg < 32) & (dr_dg > -9) & (dr_dg < 8) & (db_dg > -9) & (db_dg < 8)
+
+    # Up to 5 bytes per pixel, each column for all of them at once, of which the
+    # first length bytes of every row are written
+    kinds = [is_run, index_hit, new_alpha, diff, luma]
+    lengths = np.select(kinds, [1, 1, 5, 1, 2], 4)
+    red, green, blue, alpha = channels.T
+    ops = np.stack([
+        np.select(kinds, [0xC0 | run_length % 62, slots, 0xFF,
+                          0x40 | (dr + 2) << 4 | (dg + 2) << 2 | (db + 2), 0x80 | (dg + 32)],
+                  0xFE),
+        np.where(luma & ~diff & ~new_alpha, (dr_dg + 8) << 4 | (db_dg + 8), red),
+        green, blue, alpha,
+    ], axis=1).astype(np.uint8)
+
+    data = ops[np.arange(5) < lengths[:, None]]
+    return header + data.tobytes() + end
+
+
+class SaveTask(QRunnable):
+    def __init__(self, saver: "ScreenshotSaver", image: QImage, path: str, image_format: str):
+        super().__init__()
+
+        self.saver = saver
+        self.image = image
+        self.path = path
+        self.image_format = image_format
+
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+            if self.image_format == "qoi":
+                with open(self.path, "wb") as file:
+                    file.write(encode_qoi(self.image))
+            else:
+                writer = QImageWriter(self.path, self.image_format.encode())
+                if self.image_format == "webp":
+                    writer.setQuality(100)
+                if not writer.write(self.image):
+                    raise OSError(writer.errorString())
+        except Exception as error:
+            self.saver.finished.emit(self.path, str(error))
+        else:
+            self.saver.finished.emit(self.path, "")
+
+
+class ScreenshotSaver(QObject):
+    """
+    Encodes and writes screenshots on a thread pool.
+
+    The GUI thread only grabs the image and hands it over. At most max_pending
+    screenshots are queued, further ones are dropped instead of piling up.
+    """
+
+    FORMATS = ("png", "webp", "qoi")
+
+    # Emitted on the thread of the saver with the error message, empty on success
+    finished = Signal(str, str)
+    saved = Signal(str)
+    failed = Signal(str, str)
+    dropped = Signal()
+
+    def __init__(self, directory: str = "screenshots", image_format: str = "png",
+                 max_pending: int = 8, max_threads: int = 2, parent: QObject = None):
+        super().__init__(parent)
+
+        self.directory = directory
+        self.image_format = image_format
+        self.max_pending = max_pending
+        self.pending = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        self.finished.connect(self.on_finished)
+
+    @staticmethod
+    def available_formats() -> list:
+        supported = {bytes(image_format).decode() for image_format in
+                     QImageWriter.supportedImageFormats()}
+        return [image_format for image_format in ScreenshotSaver.FORMATS
+                if image_format == "qoi" or image_format in supported]
+
+    def save(self, image: QImage) -> bool:
+        if self.pending >= self.max_pending:
+            self.dropped.emit()
+            return False
+
+        now = datetime.datetime.now()
+        path = os.path.join(
+            self.directory,
+            f"{now.strftime('%Y-%m-%d-%H-%M-%S')}-{now.microsecond // 1000:03d}_img.{self.image_format}"
+        )
+
+        self.pending += 1
+        self.pool.start(SaveTask(self, image, path, self.image_format))
+        return True
+
+    @Slot(str, str)
+    def on_finished(self, path: str, error: str):
+        self.pending -= 1
+        if error:
+            self.failed.emit(path, error)
+        else:
+            self.saved.emit(path)
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
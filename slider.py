@@ -2,9 +2,11 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QPixmap, QIntValidator, QColor
 from PySide6.QtWidgets import QSlider, QWidget, QLabel, QLineEdit, QHBoxLayout, QFrame, QSpinBox
 
+import pixmap_cache
+
 
 class PyIconSlider(QFrame):
-    def __init__(self, parent: QWidget, icon: QIcon, orientation: Qt.Orientation = Qt.Horizontal):
+    def __init__(self, parent: QWidget, icon: str, orientation: Qt.Orientation = Qt.Horizontal):
         super().__init__(parent)
 
         self.setFixedHeight(40)
@@ -23,7 +25,7 @@ class PyIconSlider(QFrame):
 
         self.icon_label.setFixedSize(40, 40)
         self.icon_label.setAlignment(Qt.AlignVCenter | Qt.AlignHCenter)
-        self.icon_label.setPixmap(icon.pixmap(24, 24))
+        self.icon_label.setPixmap(pixmap_cache.pixmap(icon, 24))
 
         self.value_edit.setFixedSize(40, 40)
         self.value_edit.setButtonSymbols(QSpinBox.NoButtons)
@@ -33,5 +35,5 @@ class PyIconSlider(QFrame):
 
 
     def set_slider(self):
-        self.slider.setValue(int(self.value_edit.text()))
+        self.slider.setValue(self.value_edit.value())
 
@@ -0,0 +1,231 @@
+"""
+Streaming writers for palette files: CSS custom properties, Adobe Swatch Exchange,
+GIMP palettes, JSON design tokens and 16 bit PNG swatch images.
+
+Palettes are written one at a time, only the encoded palette is ever in memory:
+
+    with open("brand.css", "w", encoding="utf-8") as file:
+        writer = swatch_files.CssWriter(file, "Brand")
+        for name, colors in palettes:
+            writer.write(name, colors)
+        writer.close()
+
+Colours are float sRGB arrays of shape (n, 3) in 0 - 1. encode() is a static
+method, so worker processes can encode palettes and the writing process only
+appends the results with write_encoded(). The PNG image is the exception, it is
+only written by close() and meant for the few palettes of the picker, it is in
+IMAGE_WRITERS and not in WRITERS.
+"""
+
+import json
+import re
+import struct
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QIODevice
+
+import colorspace
+import float_color
+
+
+def rgb8(colors: np.ndarray) -> np.ndarray:
+    return np.round(np.clip(np.asarray(colors, dtype=np.float64), 0, 1) * 255).astype(np.int32)
+
+
+def hex_codes(colors: np.ndarray) -> list:
+    return colorspace.rgb_to_hex(rgb8(colors).reshape(-1, 3)).tolist()
+
+
+def css_name(name: str) -> str:
+    # Custom property names are identifiers, anything else becomes a dash
+    return re.sub(r"[^a-z0-9_-]+", "-", name.lower()).strip("-") or "color"
+
+
+class SwatchWriter:
+    """Header, palettes with a separator between them and a footer."""
+
+    binary = False
+    separator = ""
+
+    def __init__(self, output, title: str = "Palette"):
+        self.output = output
+        self.palettes = 0
+        self.colors = 0
+        self.output.write(self.header(title))
+
+    def header(self, title: str):
+        return ""
+
+    def footer(self):
+        return ""
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray):
+        raise NotImplementedError
+
+    def write(self, name: str, colors: np.ndarray):
+        self.write_encoded(self.encode(name, colors), len(colors))
+
+    def write_encoded(self, data, size: int):
+        if self.palettes:
+            self.output.write(self.separator)
+        self.output.write(data)
+        self.palettes += 1
+        self.colors += size
+
+    def close(self):
+        self.output.write(self.footer())
+
+
+class CssWriter(SwatchWriter):
+    def header(self, title: str) -> str:
+        return f"/* {title} */\n:root {{\n"
+
+    def footer(self) -> str:
+        return "}\n"
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray) -> str:
+        name = css_name(name)
+        return "".join(f"  --{name}-{index}: {code};\n"
+                       for index, code in enumerate(hex_codes(colors)))
+
+
+class GplWriter(SwatchWriter):
+    def header(self, title: str) -> str:
+        return f"GIMP Palette\nName: {title}\nColumns: 0\n#\n"
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray) -> str:
+        return "".join(f"{red:3d} {green:3d} {blue:3d}\t{name}-{index}\n"
+                       for index, (red, green, blue) in enumerate(rgb8(colors).tolist()))
+
+
+class JsonWriter(SwatchWriter):
+    """Design tokens, one group per palette, the float components are kept."""
+
+    separator = ",\n"
+
+    def header(self, title: str) -> str:
+        return "{\n"
+
+    def footer(self) -> str:
+        return "\n}\n"
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray) -> str:
+        # Rounded floats print as valid JSON numbers, json.dumps per token is slower
+        components = np.round(np.asarray(colors, dtype=np.float64), 6).tolist()
+        tokens = ",\n".join(
+            f'    "{index}": {{"$type": "color", "$value": {{"colorSpace": "srgb", '
+            f'"components": [{red!r}, {green!r}, {blue!r}], "hex": "{code}"}}}}'
+            for index, ((red, green, blue), code)
+            in enumerate(zip(components, hex_codes(colors))))
+        return f"  {json.dumps(name)}: {{\n{tokens}\n  }}"
+
+
+class AseWriter(SwatchWriter):
+    """
+    Adobe Swatch Exchange 1.0, one group per palette. The header holds the number
+    of blocks, it is written as 0 and patched by close(), so the output has to be
+    seekable.
+    """
+
+    binary = True
+    separator = b""
+
+    # Block types and the colour type of every swatch, 2 is a normal process colour
+    GROUP_START = 0xC001
+    GROUP_END = 0xC002
+    COLOR_ENTRY = 0x0001
+    NORMAL_COLOR = 2
+
+    def __init__(self, output, title: str = "Palette"):
+        if not output.seekable():
+            raise ValueError("ASE files need a seekable output for their block count")
+        self.start = output.tell()
+        super().__init__(output, title)
+
+    def header(self, title: str) -> bytes:
+        return b"ASEF" + struct.pack(">HHI", 1, 0, 0)
+
+    @staticmethod
+    def name_bytes(name: str) -> bytes:
+        encoded = (name + "\0").encode("utf-16-be")
+        return struct.pack(">H", len(encoded) // 2) + encoded
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray) -> bytes:
+        group_name = AseWriter.name_bytes(name)
+        blocks = [struct.pack(">HI", AseWriter.GROUP_START, len(group_name)), group_name]
+
+        values = np.asarray(colors, dtype=">f4").reshape(-1, 3)
+        color_type = struct.pack(">H", AseWriter.NORMAL_COLOR)
+        for index, rgb in enumerate(values):
+            body = AseWriter.name_bytes(f"{name}-{index}") + b"RGB " + rgb.tobytes() + color_type
+            blocks += [struct.pack(">HI", AseWriter.COLOR_ENTRY, len(body)), body]
+
+        blocks.append(struct.pack(">HI", AseWriter.GROUP_END, 0))
+        return b"".join(blocks)
+
+    def close(self):
+        # A group start and end around every palette's colours
+        end = self.output.tell()
+        self.output.seek(self.start + 8)
+        self.output.write(struct.pack(">I", self.colors + 2 * self.palettes))
+        self.output.seek(end)
+
+
+class PngWriter(SwatchWriter):
+    """
+    One band per palette, its colours side by side, in a 16 bit PNG tagged as sRGB.
+    The float colours are dithered to 16 bits instead of rounded to 8.
+    """
+
+    binary = True
+    separator = b""
+
+    WIDTH = 660
+    BAND_HEIGHT = 60
+
+    def __init__(self, output, title: str = "Palette"):
+        self.title = title
+        self.bands = []
+        super().__init__(output, title)
+
+    def header(self, title: str) -> bytes:
+        return b""
+
+    @staticmethod
+    def encode(name: str, colors: np.ndarray) -> np.ndarray:
+        colors = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+        columns = np.arange(PngWriter.WIDTH) * len(colors) // PngWriter.WIDTH
+        return np.broadcast_to(colors[columns], (PngWriter.BAND_HEIGHT, PngWriter.WIDTH, 3))
+
+    def write_encoded(self, data, size: int):
+        self.bands.append(data)
+        self.palettes += 1
+        self.colors += size
+
+    def close(self):
+        if not self.bands:
+            return
+        image = float_color.export_image(np.concatenate(self.bands), "srgb")
+        image.setText("Title", self.title)
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        if not image.save(buffer, "PNG"):
+            raise OSError("the PNG could not be encoded")
+        self.output.write(bytes(buffer.data()))
+
+
+WRITERS = {
+    "css": CssWriter,
+    "ase": AseWriter,
+    "gpl": GplWriter,
+    "json": JsonWriter,
+}
+
+IMAGE_WRITERS = {
+    "png": PngWriter,
+}